@@ -0,0 +1,24 @@
+"""add user data version
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Incremented by the sync pipeline whenever matches gain details
+    op.add_column('users', sa.Column('data_version', sa.BigInteger(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('users', 'data_version')
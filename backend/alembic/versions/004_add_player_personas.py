@@ -0,0 +1,31 @@
+"""add player personas cache
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'player_personas',
+        sa.Column('account_id', sa.BigInteger(), primary_key=True),
+        sa.Column('persona_name', sa.String(), nullable=True),
+        sa.Column('avatar_url', sa.String(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_player_personas_resolved_at', 'player_personas', ['resolved_at'])
+
+
+def downgrade():
+    op.drop_index('ix_player_personas_resolved_at', table_name='player_personas')
+    op.drop_table('player_personas')
@@ -0,0 +1,39 @@
+"""add match item occurrence index
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('matches', sa.Column('item_ids', postgresql.ARRAY(sa.Integer()), nullable=True))
+
+    # Backfill from the ten item slots (0 = empty slot)
+    op.execute("""
+        UPDATE matches SET item_ids = ARRAY(
+            SELECT DISTINCT item
+            FROM unnest(ARRAY[item_0, item_1, item_2, item_3, item_4, item_5,
+                              backpack_0, backpack_1, backpack_2, item_neutral]) AS item
+            WHERE item IS NOT NULL AND item <> 0
+            ORDER BY item
+        )
+        WHERE has_details = TRUE
+    """)
+
+    op.create_index('ix_matches_item_ids', 'matches', ['item_ids'], postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_matches_item_ids', table_name='matches')
+    op.drop_column('matches', 'item_ids')
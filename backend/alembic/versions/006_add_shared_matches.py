@@ -0,0 +1,71 @@
+"""add shared match store
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'shared_matches',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('start_time', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('duration', sa.Integer(), nullable=True),
+        sa.Column('game_mode', sa.Integer(), nullable=True),
+        sa.Column('lobby_type', sa.Integer(), nullable=True),
+        sa.Column('radiant_win', sa.Boolean(), nullable=True),
+        sa.Column('raw_data', sa.JSON(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    # Every detailed match so far was fetched exactly once
+    op.execute("""
+        INSERT INTO shared_matches (id, start_time, duration, game_mode, lobby_type, radiant_win, raw_data, fetched_at)
+        SELECT id, start_time, duration, game_mode, lobby_type, radiant_win, raw_data,
+               COALESCE(last_fetch_attempt, created_at, now())
+        FROM matches
+        WHERE has_details = TRUE
+    """)
+
+    # Players now hang off the shared match, one row per slot
+    op.drop_constraint('match_players_match_id_fkey', 'match_players', type_='foreignkey')
+    op.execute("""
+        DELETE FROM match_players a USING match_players b
+        WHERE a.match_id = b.match_id AND a.player_slot = b.player_slot AND a.id > b.id
+    """)
+    op.execute("DELETE FROM match_players WHERE match_id NOT IN (SELECT id FROM shared_matches)")
+    op.create_foreign_key(
+        'match_players_match_id_fkey', 'match_players', 'shared_matches', ['match_id'], ['id']
+    )
+    op.create_unique_constraint('uq_match_players_match_slot', 'match_players', ['match_id', 'player_slot'])
+
+    # One row per user per match
+    op.drop_constraint('matches_pkey', 'matches', type_='primary')
+    op.create_primary_key('matches_pkey', 'matches', ['id', 'user_id'])
+
+    op.drop_column('matches', 'raw_data')
+
+
+def downgrade():
+    op.add_column('matches', sa.Column('raw_data', sa.JSON(), nullable=True))
+    op.execute("UPDATE matches m SET raw_data = s.raw_data FROM shared_matches s WHERE s.id = m.id")
+
+    # Only safe if no match is shared by two users
+    op.drop_constraint('matches_pkey', 'matches', type_='primary')
+    op.create_primary_key('matches_pkey', 'matches', ['id'])
+
+    op.drop_constraint('uq_match_players_match_slot', 'match_players', type_='unique')
+    op.drop_constraint('match_players_match_id_fkey', 'match_players', type_='foreignkey')
+    op.create_foreign_key('match_players_match_id_fkey', 'match_players', 'matches', ['match_id'], ['id'])
+
+    op.drop_table('shared_matches')
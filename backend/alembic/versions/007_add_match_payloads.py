@@ -0,0 +1,79 @@
+"""move match payloads to compressed storage
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+import zstandard
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    op.create_table(
+        'match_payloads',
+        sa.Column('match_id', sa.BigInteger(), sa.ForeignKey('shared_matches.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('raw_size', sa.Integer(), nullable=False),
+    )
+    # Already zstd-compressed, so TOAST shouldn't try to compress it again
+    op.execute("ALTER TABLE match_payloads ALTER COLUMN data SET STORAGE EXTERNAL")
+
+    # zstd isn't available in Postgres, so payloads are compressed here in batches
+    connection = op.get_bind()
+    compressor = zstandard.ZstdCompressor(level=3)
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, raw_data::text FROM shared_matches "
+                "WHERE id > :last_id AND raw_data IS NOT NULL ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        values = []
+        for match_id, raw_text in rows:
+            raw = json.dumps(json.loads(raw_text), separators=(",", ":")).encode()
+            values.append({"match_id": match_id, "data": compressor.compress(raw), "raw_size": len(raw)})
+        connection.execute(
+            sa.text("INSERT INTO match_payloads (match_id, data, raw_size) VALUES (:match_id, :data, :raw_size)"),
+            values,
+        )
+        last_id = rows[-1][0]
+
+    op.drop_column('shared_matches', 'raw_data')
+
+
+def downgrade():
+    op.add_column('shared_matches', sa.Column('raw_data', sa.JSON(), nullable=True))
+
+    connection = op.get_bind()
+    decompressor = zstandard.ZstdDecompressor()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text("SELECT match_id, data FROM match_payloads WHERE match_id > :last_id ORDER BY match_id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            sa.text("UPDATE shared_matches SET raw_data = CAST(:raw_data AS json) WHERE id = :id"),
+            [{"id": match_id, "raw_data": decompressor.decompress(bytes(data)).decode()} for match_id, data in rows],
+        )
+        last_id = rows[-1][0]
+
+    op.drop_table('match_payloads')
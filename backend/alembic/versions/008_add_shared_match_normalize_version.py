@@ -0,0 +1,27 @@
+"""add shared match normalize version
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows start at 0, so the first renormalize run reprocesses them
+    op.add_column(
+        'shared_matches',
+        sa.Column('normalize_version', sa.Integer(), nullable=False, server_default='0')
+    )
+
+
+def downgrade():
+    op.drop_column('shared_matches', 'normalize_version')
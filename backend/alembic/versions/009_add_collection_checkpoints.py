@@ -0,0 +1,26 @@
+"""add collection checkpoints
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('sync_jobs', sa.Column('cursor', sa.BigInteger(), nullable=True))
+    # Left NULL for existing users: their next full sync walks the whole history once
+    op.add_column('users', sa.Column('history_collected_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('users', 'history_collected_at')
+    op.drop_column('sync_jobs', 'cursor')
@@ -0,0 +1,32 @@
+"""add user high water match id
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('high_water_match_id', sa.BigInteger(), nullable=True))
+
+    # Stubs only come from collections walking newest first, so a user's
+    # newest match is where the next incremental sync can stop
+    op.execute("""
+        UPDATE users
+        SET high_water_match_id = latest.match_id
+        FROM (SELECT user_id, max(id) AS match_id FROM matches GROUP BY user_id) latest
+        WHERE latest.user_id = users.id
+    """)
+
+
+def downgrade():
+    op.drop_column('users', 'high_water_match_id')
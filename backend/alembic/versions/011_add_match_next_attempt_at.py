@@ -0,0 +1,35 @@
+"""add match next attempt at
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('matches', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Stubs and failed matches with retries left are due right away, as before
+    op.execute("""
+        UPDATE matches SET next_attempt_at = now()
+        WHERE has_details IS NULL OR (has_details = FALSE AND retry_count < 3)
+    """)
+
+    op.create_index(
+        'ix_matches_user_next_attempt', 'matches', ['user_id', 'next_attempt_at'],
+        postgresql_where=sa.text('next_attempt_at IS NOT NULL')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_matches_user_next_attempt', table_name='matches')
+    op.drop_column('matches', 'next_attempt_at')
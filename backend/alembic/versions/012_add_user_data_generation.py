@@ -0,0 +1,26 @@
+"""add user data generation
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'users',
+        sa.Column('data_generation', sa.BigInteger(), nullable=False, server_default='0')
+    )
+
+
+def downgrade():
+    op.drop_column('users', 'data_generation')
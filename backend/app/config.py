@@ -37,14 +37,28 @@ class Settings(BaseSettings):
     STEAM_OPENID_CALLBACK_URL: str
 
     # API Configuration
-    API_PROVIDER: Literal["valve", "opendota"] = "valve"
+    API_PROVIDER: Literal["valve", "opendota", "multi"] = "valve"
+    # With API_PROVIDER=multi: provider used for match history, heroes and normalization
+    MULTI_PRIMARY_PROVIDER: Literal["valve", "opendota"] = "opendota"
     VALVE_API_BASE_URL: str = "https://api.steampowered.com"
     OPENDOTA_API_BASE_URL: str = "https://api.opendota.com/api"
     OPENDOTA_API_KEY: Optional[str] = None  # Optional API key for higher rate limits
 
     # Sync Configuration
     SYNC_INTERVAL_MINUTES: int = 60
-    VALVE_RATE_LIMIT_DELAY: float = 7.0  # seconds between Valve API calls
+    VALVE_RATE_LIMIT_DELAY: float = 7.0  # starting delay between Valve API calls (seconds)
+    VALVE_RATE_LIMIT_MIN_DELAY: float = 1.0  # fastest spacing adaptive control may reach for Valve
+
+    # Adaptive rate control (AIMD driven by 429 / Retry-After / quota headers)
+    ADAPTIVE_RATE_LIMIT: bool = True
+    RATE_LIMIT_MAX_DELAY: float = 60.0  # slowest spacing after repeated 429s (seconds)
+    RATE_LIMIT_MAX_RETRIES: int = 5  # 429 retries for a single history page
+    RATE_LIMIT_MAX_REQUEUES: int = 5  # times a rate-limited match is requeued within one run
+
+    # Failed match detail fetches wait before their next attempt, doubling each
+    # time (with jitter) from the base up to the max
+    RETRY_BACKOFF_BASE_MINUTES: int = 60
+    RETRY_BACKOFF_MAX_HOURS: int = 168
 
     @property
     def OPENDOTA_RATE_LIMIT_DELAY(self) -> float:
@@ -57,6 +71,33 @@ class Settings(BaseSettings):
             return 0.05  # 1200 calls per minute
         return 1.0  # 60 calls per minute
 
+    # Persona names of players encountered (Steam GetPlayerSummaries, 100 accounts per call)
+    PERSONA_RESOLVE_INTERVAL_MINUTES: int = 30
+    PERSONA_RESOLVE_MAX_BATCHES: int = 20  # calls per run
+    PERSONA_REFRESH_HOURS: int = 168  # re-resolve cached names after a week
+    STEAM_API_RATE_LIMIT_DELAY: float = 1.0
+
+    # Provider payloads of fetched matches are stored zstd-compressed (1-22)
+    MATCH_PAYLOAD_ZSTD_LEVEL: int = 3
+    # Directory of the on-disk payload archive; when set, payloads are written
+    # there instead of Postgres (existing ones are still read from Postgres)
+    MATCH_ARCHIVE_DIR: Optional[str] = None
+    MATCH_ARCHIVE_SEGMENT_MB: int = 256
+
+    # Stats engine: "sql" queries Postgres per request, "columnar" answers from
+    # per-user in-memory NumPy columns (requires numpy)
+    STATS_ENGINE: Literal["sql", "columnar"] = "sql"
+    STATS_COLUMN_STORE_MAX_MB: int = 256  # per API process
+    STATS_MATCHUP_CACHE_USERS: int = 200  # users whose hero matchup matrices stay cached (~0.6MB each)
+
+    # Performance instrumentation (Server-Timing header, SQL counts, slow request log)
+    PERF_INSTRUMENTATION: bool = False
+    SLOW_REQUEST_THRESHOLD_MS: float = 500.0
+    SLOW_REQUEST_TOP_STATEMENTS: int = 5
+
+    # Prometheus exporter port for Celery workers (API serves /metrics itself)
+    WORKER_METRICS_PORT: int = 9808
+
     # Security
     SECRET_KEY: str
     SESSION_COOKIE_NAME: str = "dota_stats_session"
@@ -0,0 +1 @@
+"""Development and benchmarking tools (not used by the running app)"""
@@ -0,0 +1,372 @@
+"""
+Bulk synthetic dataset generator for load and capacity testing.
+
+Creates users with realistic match histories (hero, game mode and time
+distributions from `synthetic`), all ten match_players per match and the
+matching players_encountered aggregates. Detailed matches also get their
+shared_matches row and compressed payload, as phase 2 would store them.
+Rows are streamed to Postgres with COPY in chunks, and users can be
+generated in parallel worker processes.
+"""
+import csv
+import io
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, Sequence
+
+from ..database import engine
+from ..models.match import item_occurrences
+from ..services import SteamAuthService
+from ..services.match_mapping import NORMALIZE_VERSION
+from ..services.match_payloads import payload_values
+from ..services.shared_matches import delete_user_matches
+from . import synthetic
+
+logger = logging.getLogger(__name__)
+
+# Generated users live far away from real account IDs
+GENERATED_ACCOUNT_BASE = 900_000_000
+COPY_CHUNK = 5_000
+
+MATCH_COLUMNS = (
+    "id", "user_id", "has_details", "retry_count", "start_time", "duration", "game_mode",
+    "lobby_type", "radiant_win", "hero_id", "player_slot", "radiant_team", "kills", "deaths",
+    "assists", "last_hits", "denies", "gold_per_min", "xp_per_min", "hero_damage",
+    "tower_damage", "hero_healing", "level", "item_0", "item_1", "item_2", "item_3", "item_4",
+    "item_5", "backpack_0", "backpack_1", "backpack_2", "item_neutral", "ability_upgrades",
+    "net_worth", "rank_tier", "item_ids", "next_attempt_at",
+)
+
+SHARED_MATCH_COLUMNS = (
+    "id", "start_time", "duration", "game_mode", "lobby_type", "radiant_win", "normalize_version",
+)
+
+MATCH_PAYLOAD_COLUMNS = ("match_id", "data", "raw_size")
+
+MATCH_PLAYER_COLUMNS = (
+    "match_id", "account_id", "player_slot", "hero_id", "kills", "deaths", "assists",
+    "gold_per_min", "xp_per_min", "hero_damage", "tower_damage", "hero_healing", "last_hits",
+    "denies", "level", "net_worth", "item_0", "item_1", "item_2", "item_3", "item_4", "item_5",
+)
+
+PLAYER_ENCOUNTERED_COLUMNS = (
+    "user_id", "account_id", "games_together", "games_won", "games_lost",
+    "first_match_at", "last_match_at",
+)
+
+# Columns copied straight from the provider's player entry
+_PLAYER_STAT_COLUMNS = (
+    "kills", "deaths", "assists", "last_hits", "denies", "gold_per_min", "xp_per_min",
+    "hero_damage", "tower_damage", "hero_healing", "level", "net_worth",
+    "item_0", "item_1", "item_2", "item_3", "item_4", "item_5",
+    "backpack_0", "backpack_1", "backpack_2", "item_neutral",
+)
+
+
+@dataclass
+class GenerationResult:
+    users: int = 0
+    matches: int = 0
+    match_players: int = 0
+    players_encountered: int = 0
+    seconds: float = 0.0
+
+    def add(self, other: "GenerationResult"):
+        self.users += other.users
+        self.matches += other.matches
+        self.match_players += other.match_players
+        self.players_encountered += other.players_encountered
+
+    @property
+    def rows_per_second(self) -> float:
+        rows = self.matches + self.match_players + self.players_encountered
+        return rows / self.seconds if self.seconds else 0.0
+
+
+def generated_user_id(index: int) -> int:
+    return int(SteamAuthService.account_id_to_steam_id(GENERATED_ACCOUNT_BASE + index))
+
+
+def match_row(user_id: int, account_id: int, match: Dict) -> Dict:
+    """Column values for a detailed Match row, as update_match_with_details would write them"""
+    player = next(p for p in match["players"] if p["account_id"] == account_id)
+    row = {
+        "id": match["match_id"],
+        "user_id": user_id,
+        "has_details": True,
+        "retry_count": 0,
+        "start_time": datetime.fromtimestamp(match["start_time"]),
+        "duration": match["duration"],
+        "game_mode": match["game_mode"],
+        "lobby_type": match["lobby_type"],
+        "radiant_win": match["radiant_win"],
+        "hero_id": player["hero_id"],
+        "player_slot": player["player_slot"],
+        "radiant_team": player["player_slot"] < 128,
+        "ability_upgrades": player["ability_upgrades"],
+        "rank_tier": player.get("rank_tier"),
+        # Postgres array literal, COPY can't take a JSON list here
+        "item_ids": "{" + ",".join(str(i) for i in item_occurrences(player)) + "}",
+    }
+    for column in _PLAYER_STAT_COLUMNS:
+        row[column] = player.get(column)
+    return row
+
+
+def shared_match_row(match: Dict) -> Dict:
+    """Column values for the SharedMatch row of a detailed match"""
+    return {
+        "id": match["match_id"],
+        "start_time": datetime.fromtimestamp(match["start_time"]),
+        "duration": match["duration"],
+        "game_mode": match["game_mode"],
+        "lobby_type": match["lobby_type"],
+        "radiant_win": match["radiant_win"],
+        "normalize_version": NORMALIZE_VERSION,
+    }
+
+
+def stub_row(user_id: int, match_id: int) -> Dict:
+    """Column values for a Match stub waiting for phase 2"""
+    return {
+        "id": match_id, "user_id": user_id, "has_details": None, "retry_count": 0,
+        "next_attempt_at": datetime.utcnow(),
+    }
+
+
+def player_rows(match: Dict) -> List[Dict]:
+    """Column values for the ten MatchPlayer rows of a match"""
+    return [
+        {"match_id": match["match_id"], **{c: p.get(c) for c in MATCH_PLAYER_COLUMNS[1:]}}
+        for p in match["players"]
+    ]
+
+
+def _csv_value(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, bytes):
+        # bytea hex format
+        return "\\x" + value.hex()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Dict]) -> int:
+    """
+    COPY rows into a table. Missing keys and None become NULL.
+
+    Returns:
+        Number of rows written
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(row.get(c)) for c in columns])
+        count += 1
+    if not count:
+        return 0
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    return count
+
+
+def delete_user(cursor, user_id: int):
+    """Remove a user and everything the generator creates for it"""
+    delete_user_matches(cursor, [user_id])
+    cursor.execute("DELETE FROM players_encountered WHERE user_id = %s", (user_id,))
+    cursor.execute("DELETE FROM sync_jobs WHERE user_id = %s", (user_id,))
+    cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+
+
+def generate_user(
+    cursor,
+    user_id: int,
+    match_count: int,
+    first_match_id: int,
+    persona_name: str,
+    seed: int,
+    with_raw_data: bool = True,
+    stub_fraction: float = 0.0,
+) -> GenerationResult:
+    """
+    Write one user and its full history through COPY (caller commits).
+
+    Match IDs descend from `first_match_id`, so callers must hand out
+    non-overlapping ranges of `match_count` IDs.
+
+    Args:
+        stub_fraction: Fraction of the oldest matches left as stubs (no details yet)
+    """
+    account_id = SteamAuthService.steam_id_to_account_id(str(user_id))
+    rng = random.Random(seed)
+    hero_weights = synthetic.player_hero_weights(rng)
+    friends = [rng.randint(10_000_000, 1_500_000_000) for _ in range(40)]
+    start_times = synthetic.match_start_times(rng, match_count)
+    detailed_count = match_count - int(match_count * stub_fraction)
+
+    result = GenerationResult(users=1)
+    delete_user(cursor, user_id)
+    cursor.execute(
+        "INSERT INTO users (id, steam_id, persona_name) VALUES (%s, %s, %s)",
+        (user_id, str(user_id), persona_name),
+    )
+
+    encountered: Dict[int, List] = {}
+    matches, shared, payloads, players = [], [], [], []
+    match_id = first_match_id
+    for index, start_time in enumerate(start_times):
+        match_id -= 1
+        if index >= detailed_count:
+            matches.append(stub_row(user_id, match_id))
+        else:
+            teammates = rng.sample(friends, rng.choice((0, 0, 1, 1, 2, 4)))
+            match = synthetic.synthetic_match(match_id, account_id, start_time, hero_weights, teammates)
+            row = match_row(user_id, account_id, match)
+            matches.append(row)
+            shared.append(shared_match_row(match))
+            if with_raw_data:
+                payloads.append(payload_values(match_id, match))
+            players.extend(player_rows(match))
+
+            won = row["radiant_team"] == row["radiant_win"]
+            for p in match["players"]:
+                teammate = p["account_id"]
+                if teammate and teammate != account_id and (p["player_slot"] < 128) == row["radiant_team"]:
+                    stats = encountered.setdefault(teammate, [0, 0, row["start_time"], row["start_time"]])
+                    stats[0] += 1
+                    stats[1] += int(won)
+                    stats[2] = min(stats[2], row["start_time"])
+                    stats[3] = max(stats[3], row["start_time"])
+
+        if len(matches) >= COPY_CHUNK:
+            result.matches += copy_rows(cursor, "matches", MATCH_COLUMNS, matches)
+            copy_rows(cursor, "shared_matches", SHARED_MATCH_COLUMNS, shared)
+            copy_rows(cursor, "match_payloads", MATCH_PAYLOAD_COLUMNS, payloads)
+            result.match_players += copy_rows(cursor, "match_players", MATCH_PLAYER_COLUMNS, players)
+            matches, shared, payloads, players = [], [], [], []
+
+    result.matches += copy_rows(cursor, "matches", MATCH_COLUMNS, matches)
+    copy_rows(cursor, "shared_matches", SHARED_MATCH_COLUMNS, shared)
+    copy_rows(cursor, "match_payloads", MATCH_PAYLOAD_COLUMNS, payloads)
+    result.match_players += copy_rows(cursor, "match_players", MATCH_PLAYER_COLUMNS, players)
+    result.players_encountered += copy_rows(cursor, "players_encountered", PLAYER_ENCOUNTERED_COLUMNS, (
+        {
+            "user_id": user_id,
+            "account_id": teammate,
+            "games_together": games,
+            "games_won": won,
+            "games_lost": games - won,
+            "first_match_at": first,
+            "last_match_at": last,
+        }
+        for teammate, (games, won, first, last) in encountered.items()
+    ))
+    return result
+
+
+def _generate_user_job(args) -> GenerationResult:
+    index, match_count, seed, with_raw_data, stub_fraction = args
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        result = generate_user(
+            cursor,
+            user_id=generated_user_id(index),
+            match_count=match_count,
+            # Each user gets its own block of match IDs
+            first_match_id=6_000_000_000 + (index + 1) * 1_000_000,
+            persona_name=f"generated-{index}",
+            seed=seed * 1_000_003 + index,
+            with_raw_data=with_raw_data,
+            stub_fraction=stub_fraction,
+        )
+        connection.commit()
+        logger.info(f"Generated user {index}: {result.matches} matches, {result.match_players} match players")
+        return result
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def _worker_init():
+    # Connections inherited from the parent process must not be reused after fork
+    engine.dispose(close=False)
+
+
+def generate_dataset(
+    users: int,
+    matches_per_user: int,
+    user_offset: int = 0,
+    seed: int = 1,
+    with_raw_data: bool = True,
+    stub_fraction: float = 0.0,
+    workers: int = 1,
+) -> GenerationResult:
+    """
+    Generate `users` synthetic users with `matches_per_user` matches each.
+
+    Existing generated users with the same index are replaced, so the command
+    can be rerun. Each user is written in its own transaction.
+    """
+    if matches_per_user > 1_000_000:
+        raise ValueError("matches_per_user is limited to 1,000,000 (size of each user's match ID block)")
+
+    jobs = [
+        (index, matches_per_user, seed, with_raw_data, stub_fraction)
+        for index in range(user_offset, user_offset + users)
+    ]
+
+    total = GenerationResult()
+    started = time.perf_counter()
+    if workers > 1:
+        with Pool(processes=workers, initializer=_worker_init) as pool:
+            for result in pool.imap_unordered(_generate_user_job, jobs):
+                total.add(result)
+    else:
+        for job in jobs:
+            total.add(_generate_user_job(job))
+    total.seconds = time.perf_counter() - started
+    return total
+
+
+def generate_benchmark_user(
+    user_id: int,
+    match_count: int,
+    first_match_id: int,
+    persona_name: str,
+    seed: int,
+    with_raw_data: bool = True,
+) -> GenerationResult:
+    """Generate a single user with a caller-chosen ID (used by the stats benchmark)"""
+    started = time.perf_counter()
+    connection = engine.raw_connection()
+    try:
+        result = generate_user(
+            connection.cursor(),
+            user_id=user_id,
+            match_count=match_count,
+            first_match_id=first_match_id,
+            persona_name=persona_name,
+            seed=seed,
+            with_raw_data=with_raw_data,
+        )
+        connection.commit()
+        result.seconds = time.perf_counter() - started
+        return result
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
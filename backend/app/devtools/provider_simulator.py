@@ -0,0 +1,228 @@
+"""
+Local stand-in for the Valve and OpenDota endpoints used by the sync pipeline.
+
+Serves synthetic match history, match details and heroes with configurable
+latency, error rates, injected 429s and a per-minute rate limit, so sync
+performance can be measured without touching the real APIs.
+
+Point the app at it with:
+    VALVE_API_BASE_URL=http://localhost:8555
+    OPENDOTA_API_BASE_URL=http://localhost:8555/api
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+from . import synthetic
+
+
+@dataclass
+class SimulatorConfig:
+    matches_per_account: int = 500
+    latency_ms: float = 50.0  # mean response latency
+    latency_jitter_ms: float = 20.0
+    error_rate: float = 0.0  # fraction of detail requests answered 500
+    not_found_rate: float = 0.0  # fraction of detail requests answered 404
+    throttle_rate: float = 0.0  # fraction of requests answered 429 regardless of quota
+    rate_limit_per_minute: Optional[int] = None  # per provider, None = unlimited
+    retry_after: int = 1  # Retry-After seconds sent with 429s
+    seed: int = 1
+
+
+@dataclass
+class _AccountHistory:
+    match_ids: List[int]
+    start_times: List[datetime]
+    hero_weights: List[float]
+
+
+@dataclass
+class SimulatorState:
+    config: SimulatorConfig
+    histories: Dict[int, _AccountHistory] = field(default_factory=dict)
+    match_owner: Dict[int, Tuple[int, datetime]] = field(default_factory=dict)
+    windows: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # provider -> (minute, count)
+    requests: Dict[str, int] = field(default_factory=dict)
+
+    def history(self, account_id: int) -> _AccountHistory:
+        """Generate (once) a descending match history for an account"""
+        history = self.histories.get(account_id)
+        if history is not None:
+            return history
+
+        rng = random.Random(self.config.seed * 1_000_003 + account_id)
+        count = min(self.config.matches_per_account, 10_000)
+        # Spread accounts out so their match IDs never collide
+        match_id = 7_000_000_000 + (account_id % 10_000) * 1_000_000
+        match_ids = []
+        for _ in range(count):
+            match_id -= rng.randint(1, 99)
+            match_ids.append(match_id)
+
+        history = _AccountHistory(
+            match_ids=match_ids,
+            start_times=synthetic.match_start_times(rng, count),
+            hero_weights=synthetic.player_hero_weights(rng),
+        )
+        for match_id, start_time in zip(history.match_ids, history.start_times):
+            self.match_owner[match_id] = (account_id, start_time)
+        self.histories[account_id] = history
+        return history
+
+    def match(self, match_id: int) -> Optional[Dict]:
+        owner = self.match_owner.get(match_id)
+        if owner is None:
+            return None
+        account_id, start_time = owner
+        return synthetic.synthetic_match(
+            match_id,
+            account_id,
+            start_time,
+            hero_weights=self.histories[account_id].hero_weights,
+        )
+
+
+def create_app(config: Optional[SimulatorConfig] = None) -> FastAPI:
+    """Build the simulator app. Valve routes live at /, OpenDota routes under /api."""
+    state = SimulatorState(config=config or SimulatorConfig())
+    rng = random.Random(state.config.seed)
+    app = FastAPI(title="Dota provider simulator")
+    app.state.simulator = state
+
+    async def gate(provider: str, details: bool = False) -> Tuple[Optional[JSONResponse], Dict[str, str]]:
+        """
+        Apply latency, quota and error injection.
+
+        Returns:
+            (error response or None, headers to send with a successful response)
+        """
+        cfg = state.config
+        state.requests[provider] = state.requests.get(provider, 0) + 1
+
+        latency = max(0.0, rng.gauss(cfg.latency_ms, cfg.latency_jitter_ms)) / 1000.0
+        if latency:
+            await asyncio.sleep(latency)
+
+        headers = {}
+        if cfg.rate_limit_per_minute is not None:
+            minute = int(time.time() // 60)
+            window_minute, count = state.windows.get(provider, (minute, 0))
+            if window_minute != minute:
+                count = 0
+            count += 1
+            state.windows[provider] = (minute, count)
+            remaining = max(0, cfg.rate_limit_per_minute - count)
+            if provider == "opendota":
+                headers["X-Rate-Limit-Remaining-Minute"] = str(remaining)
+            if count > cfg.rate_limit_per_minute:
+                headers["Retry-After"] = str(max(1, int(60 - time.time() % 60)))
+                return JSONResponse({"error": "rate limit exceeded"}, status_code=429, headers=headers), headers
+
+        if rng.random() < cfg.throttle_rate:
+            headers["Retry-After"] = str(cfg.retry_after)
+            return JSONResponse({"error": "rate limit exceeded"}, status_code=429, headers=headers), headers
+
+        if details:
+            roll = rng.random()
+            if roll < cfg.error_rate:
+                return JSONResponse({"error": "internal error"}, status_code=500, headers=headers), headers
+            if roll < cfg.error_rate + cfg.not_found_rate:
+                return JSONResponse({"error": "Not Found"}, status_code=404, headers=headers), headers
+
+        return None, headers
+
+    # Valve Web API
+
+    @app.get("/IDOTA2Match_570/GetMatchHistory/v1/")
+    async def valve_match_history(
+        account_id: int,
+        matches_requested: int = 100,
+        start_at_match_id: Optional[int] = None,
+    ):
+        error, headers = await gate("valve")
+        if error:
+            return error
+        history = state.history(account_id)
+        # start_at_match_id is inclusive, like the real API
+        start = 0
+        if start_at_match_id:
+            start = next((i for i, m in enumerate(history.match_ids) if m <= start_at_match_id), len(history.match_ids))
+        page = history.match_ids[start:start + min(matches_requested, 100)]
+        matches = [
+            {
+                "match_id": match_id,
+                "start_time": int(state.match_owner[match_id][1].timestamp()),
+                "lobby_type": 7,
+                "players": [{"account_id": account_id, "player_slot": 0, "hero_id": 1}],
+            }
+            for match_id in page
+        ]
+        return JSONResponse({"result": {"status": 1, "num_results": len(matches), "matches": matches}}, headers=headers)
+
+    @app.get("/IDOTA2Match_570/GetMatchDetails/v1/")
+    async def valve_match_details(match_id: int):
+        error, headers = await gate("valve", details=True)
+        if error:
+            return error
+        match = state.match(match_id)
+        if match is None:
+            return JSONResponse({"result": {"error": "Match ID not found"}}, headers=headers)
+        return JSONResponse({"result": match}, headers=headers)
+
+    @app.get("/IEconDOTA2_570/GetHeroes/v1/")
+    async def valve_heroes():
+        error, headers = await gate("valve")
+        if error:
+            return error
+        return JSONResponse({"result": {"heroes": synthetic.heroes("valve")}}, headers=headers)
+
+    # OpenDota API
+
+    @app.get("/api/players/{account_id}/matches")
+    async def opendota_match_history(
+        account_id: int,
+        limit: int = Query(100),
+        offset: int = Query(0),
+    ):
+        error, headers = await gate("opendota")
+        if error:
+            return error
+        history = state.history(account_id)
+        page = history.match_ids[offset:offset + limit]
+        return JSONResponse([
+            {
+                "match_id": match_id,
+                "start_time": int(state.match_owner[match_id][1].timestamp()),
+                "player_slot": 0,
+            }
+            for match_id in page
+        ], headers=headers)
+
+    @app.get("/api/matches/{match_id}")
+    async def opendota_match_details(match_id: int):
+        error, headers = await gate("opendota", details=True)
+        if error:
+            return error
+        match = state.match(match_id)
+        if match is None:
+            return JSONResponse({"error": "Not Found"}, status_code=404)
+        return JSONResponse(match, headers=headers)
+
+    @app.get("/api/heroes")
+    async def opendota_heroes():
+        error, headers = await gate("opendota")
+        if error:
+            return error
+        return JSONResponse(synthetic.heroes("opendota"), headers=headers)
+
+    @app.get("/_stats")
+    async def simulator_stats():
+        return {"requests": state.requests, "accounts": len(state.histories)}
+
+    return app
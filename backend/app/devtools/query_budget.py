@@ -0,0 +1,253 @@
+"""
+Query-count budgets for routes and services.
+
+Every case runs against seeded users of different history sizes and records
+the SQL statements it executes. A case passes when it stays within its budget
+and issues the same number of statements at every size, which is what an N+1
+pattern (a query per match, per player, per API call...) breaks. Failures
+list the statements of the offending run.
+
+Route cases call the handlers directly with the user already loaded, so the
+authentication query is not part of the budgets.
+"""
+import asyncio
+import logging
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import event
+
+from ..database import SessionLocal, engine
+from ..models import Match, User
+from ..services import DotaAPIService, SteamAuthService
+from ..services.opendota_api import OpenDotaAPI
+from .stats_benchmark import seed_user
+from . import synthetic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCALES = [50, 500]
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by `query_budget` when a block executes too many statements"""
+
+
+class StatementRecorder:
+    """Records SQL statements executed on the engine while active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(" ".join(statement.split()))
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._on_execute)
+
+    def report(self, limit: int = 300) -> str:
+        return "\n".join(f"  {i:3}. {s[:limit]}" for i, s in enumerate(self.statements, start=1))
+
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "block"):
+    """
+    Fail if the enclosed block executes more than `max_queries` statements.
+
+    Raises:
+        QueryBudgetExceeded: With the executed statements in the message
+    """
+    with StatementRecorder() as recorder:
+        yield recorder
+    if recorder.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{label} executed {recorder.count} queries (budget {max_queries}):\n{recorder.report()}"
+        )
+
+
+@dataclass
+class BudgetCase:
+    name: str
+    budget: int
+    # run(db, user, **setup(db, user, size_index)); size_index is 0 for the smallest scale
+    run: Callable
+    setup: Optional[Callable] = None
+
+
+@dataclass
+class BudgetResult:
+    name: str
+    budget: int
+    counts: Dict[int, int] = field(default_factory=dict)
+    statements: Dict[int, List[str]] = field(default_factory=dict)
+
+    @property
+    def constant(self) -> bool:
+        return len(set(self.counts.values())) <= 1
+
+    @property
+    def within_budget(self) -> bool:
+        return all(count <= self.budget for count in self.counts.values())
+
+    @property
+    def ok(self) -> bool:
+        return self.constant and self.within_budget
+
+    def failure_report(self) -> str:
+        counts = ", ".join(f"{scale}: {count}" for scale, count in self.counts.items())
+        problem = "exceeds budget" if not self.within_budget else "grows with data size"
+        scale = max(self.counts, key=lambda s: self.counts[s])
+        lines = [f"{self.name} {problem} (budget {self.budget}; queries by scale {counts})"]
+        lines.append(f"Statements at scale {scale}:")
+        lines.extend(f"  {i:3}. {s[:300]}" for i, s in enumerate(self.statements[scale], start=1))
+        return "\n".join(lines)
+
+
+def _route(handler, response_model, **params):
+    """Call an async route handler and serialize its result like FastAPI would"""
+    adapter = TypeAdapter(response_model)
+
+    def run(db, user, **setup):
+        result = asyncio.run(handler(user=user, db=db, **params, **setup))
+        return adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+    return run
+
+
+def _newest_match(db, user, size_index) -> Dict:
+    match_id = (
+        db.query(Match.id)
+        .filter(Match.user_id == user.id, Match.has_details == True)
+        .order_by(Match.start_time.desc())
+        .limit(1)
+        .scalar()
+    )
+    return {"match_id": match_id}
+
+
+def _match_stub(db, user, size_index) -> Dict:
+    """
+    A flushed stub plus provider data for it. Per-match work scales with the
+    number of teammates rather than history size, so the sizes vary that.
+    """
+    account_id = SteamAuthService.steam_id_to_account_id(str(user.id))
+    rng = random.Random(size_index)
+    teammates = [rng.randint(10_000_000, 1_500_000_000) for _ in range(1 if size_index == 0 else 4)]
+    match_id = 5_000_000_000 + size_index
+
+    stub = Match(id=match_id, user_id=user.id)
+    db.add(stub)
+    db.flush()
+    return {
+        "match": stub,
+        "account_id": account_id,
+        "match_data": synthetic.synthetic_match(match_id, account_id, datetime.utcnow(), teammates=teammates),
+    }
+
+
+def _update_match_with_details(db, user, match, account_id, match_data):
+    from ..tasks.sync_helpers import update_match_with_details
+
+    update_match_with_details(db, match, account_id, match_data, DotaAPIService())
+    db.flush()
+
+
+def _api_call_count(db, user, size_index) -> Dict:
+    return {"calls": 1 if size_index == 0 else 25}
+
+
+def _track_api_calls(db, user, calls):
+    """API call tracking during a phase must not add statements per call"""
+    api = OpenDotaAPI(rate_limit_delay=0)
+    for _ in range(calls):
+        api._track_api_call(db, "/matches/{match_id}", 200)
+    db.flush()
+
+
+def _cases() -> List[BudgetCase]:
+    from ..routes import matches as matches_routes
+    from ..routes import stats as stats_routes
+    from ..routes import sync as sync_routes
+    from ..schemas import MatchDetailResponse, MatchListResponse, SyncJobResponse
+    from ..schemas.stats import DashboardStats, HeroStats, PlayerEncounteredStats, PlayerStats, TimeStats
+
+    return [
+        BudgetCase("route.matches_list", 2, _route(
+            matches_routes.get_matches, MatchListResponse, page=1, page_size=50, hero_id=None, game_mode=None,
+            lobby_type=None, start_date=None, end_date=None, include_stubs=False,
+        )),
+        BudgetCase(
+            "route.match_detail", 2, _route(matches_routes.get_match, MatchDetailResponse), setup=_newest_match,
+        ),
+        BudgetCase("route.stats_dashboard", 10, _route(stats_routes.get_dashboard, DashboardStats)),
+        BudgetCase("route.stats_player", 2, _route(
+            stats_routes.get_player_stats, PlayerStats, hero_id=None, game_mode=None, start_date=None, end_date=None,
+        )),
+        BudgetCase("route.stats_heroes", 1, _route(
+            stats_routes.get_hero_stats, List[HeroStats], hero_id=None, game_mode=None, start_date=None, end_date=None, limit=None,
+        )),
+        BudgetCase("route.stats_players_encountered", 1, _route(
+            stats_routes.get_players_encountered, List[PlayerEncounteredStats], limit=20,
+        )),
+        BudgetCase("route.stats_time_based", 6, _route(stats_routes.get_time_stats, List[TimeStats])),
+        BudgetCase("route.sync_jobs", 1, _route(sync_routes.get_sync_jobs, List[SyncJobResponse], limit=10)),
+        BudgetCase("route.sync_status", 1, _route(sync_routes.get_sync_status, Dict[str, Any])),
+        BudgetCase(
+            "service.update_match_with_details", 8, _update_match_with_details, setup=_match_stub,
+        ),
+        BudgetCase("service.track_api_calls", 1, _track_api_calls, setup=_api_call_count),
+    ]
+
+
+def run_query_budgets(
+    scales: List[int] = DEFAULT_SCALES,
+    cases: Optional[List[str]] = None,
+) -> List[BudgetResult]:
+    """
+    Run every budget case at each scale.
+
+    Each case runs in its own session that is rolled back afterwards, so
+    service cases that write leave the seeded data untouched.
+
+    Args:
+        scales: Detailed matches per seeded user, smallest first
+        cases: Only run cases whose name contains one of these strings
+    """
+    scales = sorted(scales)
+    users = {scale: seed_user(scale, with_raw_data=False) for scale in scales}
+    results = []
+
+    for case in _cases():
+        if cases and not any(c in case.name for c in cases):
+            continue
+        result = BudgetResult(case.name, case.budget)
+
+        for size_index, scale in enumerate(scales):
+            db = SessionLocal()
+            try:
+                user = db.query(User).filter(User.id == users[scale]).one()
+                params = case.setup(db, user, size_index) if case.setup else {}
+                with StatementRecorder() as recorder:
+                    case.run(db, user, **params)
+                result.counts[scale] = recorder.count
+                result.statements[scale] = recorder.statements
+            finally:
+                db.rollback()
+                db.close()
+
+        results.append(result)
+        logger.info(f"{case.name}: {result.counts} (budget {case.budget})")
+
+    return results
@@ -0,0 +1,252 @@
+"""
+StatsService and stats/match route benchmarks at several history sizes.
+
+Each scale gets its own synthetic user seeded (through the data generator's
+COPY path) with fully detailed matches, match_players and players_encountered. Every StatsService method and route
+handler is timed over several runs, with p50/p95 latency and SQL statement
+counts recorded. Results can be saved as a baseline and later runs compared
+against it, so a regression fails the command.
+"""
+import asyncio
+import json
+import logging
+import statistics
+import time
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, func
+
+from ..database import SessionLocal, engine
+from ..models import User, Match
+from ..services import StatsService, SteamAuthService
+from .data_generator import generate_benchmark_user
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parents[2] / "benchmarks" / "stats_baseline.json"
+
+# Benchmark users live far away from real account IDs
+BENCHMARK_ACCOUNT_BASE = 990_000_000
+
+
+@dataclass
+class CaseResult:
+    name: str
+    scale: int
+    runs: int
+    p50_ms: float
+    p95_ms: float
+    queries: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.scale}:{self.name}"
+
+
+@dataclass
+class Regression:
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self) -> str:
+        return f"{self.key} {self.metric}: {self.baseline:g} -> {self.current:g}"
+
+
+@dataclass
+class StatsBenchmarkReport:
+    results: List[CaseResult] = field(default_factory=list)
+    regressions: List[Regression] = field(default_factory=list)
+
+    def table(self) -> str:
+        lines = [f"{'scale':>9}  {'case':<28} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}"]
+        for r in self.results:
+            lines.append(f"{r.scale:>9}  {r.name:<28} {r.p50_ms:>9.2f} {r.p95_ms:>9.2f} {r.queries:>8}")
+        return "\n".join(lines)
+
+
+class QueryCounter:
+    """Counts SQL statements executed on the engine while active"""
+
+    def __init__(self):
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._on_execute)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def benchmark_user_id(scale: int) -> int:
+    return int(SteamAuthService.account_id_to_steam_id(BENCHMARK_ACCOUNT_BASE + scale))
+
+
+def seed_user(scale: int, with_raw_data: bool = True, reseed: bool = False) -> int:
+    """
+    Make sure the benchmark user for `scale` exists with exactly `scale` detailed matches.
+
+    Returns:
+        The user's ID
+    """
+    user_id = benchmark_user_id(scale)
+
+    db = SessionLocal()
+    try:
+        existing = db.query(func.count(Match.id)).filter(Match.user_id == user_id).scalar()
+    finally:
+        db.close()
+
+    if existing == scale and not reseed:
+        logger.info(f"Benchmark user {user_id} already seeded with {scale} matches")
+        return user_id
+
+    result = generate_benchmark_user(
+        user_id=user_id,
+        match_count=scale,
+        # Match IDs occupy (10*scale - scale, 10*scale] above 8e9, so scales an
+        # order of magnitude apart never share match IDs
+        first_match_id=8_000_000_000 + scale * 10,
+        persona_name=f"stats-benchmark-{scale}",
+        seed=scale,
+        with_raw_data=with_raw_data,
+    )
+    logger.info(f"Seeded benchmark user {user_id} with {result.matches} matches in {result.seconds:.1f}s")
+    return user_id
+
+
+def _cases(user: User, scale: int) -> Dict[str, Callable]:
+    """Benchmark cases: StatsService methods and the route handlers serving them"""
+    from ..routes import stats as stats_routes
+    from ..routes import matches as matches_routes
+    from ..schemas import MatchListResponse
+    from ..schemas.stats import DashboardStats
+
+    def service(db) -> StatsService:
+        return StatsService(db)
+
+    return {
+        "service.player_stats": lambda db: service(db).get_player_stats(user.id),
+        "service.hero_stats": lambda db: service(db).get_hero_stats(user.id),
+        "service.hero_stats_filtered": lambda db: service(db).get_hero_stats(user.id, game_mode=22),
+        "service.players_encountered": lambda db: service(db).get_players_encountered(user.id),
+        "service.time_based_stats": lambda db: service(db).get_time_based_stats(user.id),
+        "service.dashboard": lambda db: service(db).get_dashboard_stats(user.id),
+        "route.stats_dashboard": lambda db: DashboardStats.model_validate(
+            asyncio.run(stats_routes.get_dashboard(user=user, db=db))
+        ).model_dump_json(),
+        "route.stats_heroes": lambda db: [
+            h.model_dump_json() for h in asyncio.run(stats_routes.get_hero_stats(
+                hero_id=None, game_mode=None, start_date=None, end_date=None, limit=None, user=user, db=db
+            ))
+        ],
+        "route.matches_page1": lambda db: MatchListResponse.model_validate(asyncio.run(matches_routes.get_matches(
+            page=1, page_size=50, hero_id=None, game_mode=None, lobby_type=None,
+            start_date=None, end_date=None, include_stubs=False, user=user, db=db
+        ))).model_dump_json(),
+        "route.matches_last_page": lambda db: MatchListResponse.model_validate(asyncio.run(matches_routes.get_matches(
+            page=max(1, scale // 100), page_size=100, hero_id=None, game_mode=None, lobby_type=None,
+            start_date=None, end_date=None, include_stubs=False, user=user, db=db
+        ))).model_dump_json(),
+    }
+
+
+def run_stats_benchmark(
+    scales: List[int] = DEFAULT_SCALES,
+    repeat: int = 10,
+    cases: Optional[List[str]] = None,
+    with_raw_data: bool = True,
+    reseed: bool = False,
+) -> StatsBenchmarkReport:
+    """
+    Seed each scale (if needed) and time every benchmark case.
+
+    Args:
+        scales: Number of detailed matches per benchmark user
+        repeat: Timed runs per case (after one warm-up run)
+        cases: Only run cases whose name contains one of these strings
+    """
+    report = StatsBenchmarkReport()
+
+    for scale in scales:
+        user_id = seed_user(scale, with_raw_data=with_raw_data, reseed=reseed)
+
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.id == user_id).one()
+            for name, case in _cases(user, scale).items():
+                if cases and not any(c in name for c in cases):
+                    continue
+
+                # Warm-up run, also used to count statements
+                with QueryCounter() as counter:
+                    case(db)
+                db.expunge_all()
+                db.add(user)
+
+                samples = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    case(db)
+                    samples.append((time.perf_counter() - started) * 1000)
+                    db.expunge_all()
+                    db.add(user)
+
+                result = CaseResult(
+                    name=name,
+                    scale=scale,
+                    runs=repeat,
+                    p50_ms=statistics.median(samples),
+                    p95_ms=_percentile(samples, 95),
+                    queries=counter.count,
+                )
+                report.results.append(result)
+                logger.info(f"{result.key}: p50={result.p50_ms:.2f}ms p95={result.p95_ms:.2f}ms queries={result.queries}")
+        finally:
+            db.close()
+
+    return report
+
+
+def save_baseline(report: StatsBenchmarkReport, path: Path = DEFAULT_BASELINE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {r.key: asdict(r) for r in report.results}
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def compare_to_baseline(
+    report: StatsBenchmarkReport,
+    path: Path = DEFAULT_BASELINE_PATH,
+    tolerance: float = 0.25,
+) -> List[Regression]:
+    """
+    Flag cases whose p95 grew by more than `tolerance` or that issue more queries
+    than the stored baseline. Cases missing from the baseline are ignored.
+    """
+    baseline = json.loads(path.read_text())
+    regressions = []
+    for result in report.results:
+        base = baseline.get(result.key)
+        if base is None:
+            continue
+        if result.p95_ms > base["p95_ms"] * (1 + tolerance):
+            regressions.append(Regression(result.key, "p95_ms", base["p95_ms"], round(result.p95_ms, 2)))
+        if result.queries > base["queries"]:
+            regressions.append(Regression(result.key, "queries", base["queries"], result.queries))
+    report.regressions = regressions
+    return regressions
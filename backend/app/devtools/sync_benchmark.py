@@ -0,0 +1,211 @@
+"""
+End-to-end sync throughput benchmark against the provider simulator.
+
+Runs collect_match_ids_phase and fetch_match_details_phase for a throwaway user
+and reports matches/sec, time spent in the database, time spent waiting on the
+API and peak memory.
+"""
+import asyncio
+import logging
+import resource
+import socket
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+from ..config import settings
+from ..database import SessionLocal, engine
+from ..models import User, PlayerEncountered, SyncJob
+from ..models.sync_job import JobStatus, JobType
+from ..services import DotaAPIService, SteamAuthService
+from ..services.shared_matches import delete_user_matches
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_ACCOUNT_ID = 999_000_001
+
+
+@dataclass
+class SyncBenchmarkResult:
+    provider: str
+    match_ids_collected: int = 0
+    details_fetched: int = 0
+    details_failed: int = 0
+    phase1_seconds: float = 0.0
+    phase2_seconds: float = 0.0
+    db_seconds: float = 0.0
+    db_statements: int = 0
+    api_seconds: float = 0.0
+    api_calls: int = 0
+    peak_rss_mb: float = 0.0
+    peak_traced_mb: Optional[float] = None
+    extra: Dict = field(default_factory=dict)
+
+    @property
+    def total_seconds(self) -> float:
+        return self.phase1_seconds + self.phase2_seconds
+
+    @property
+    def matches_per_second(self) -> float:
+        return self.details_fetched / self.phase2_seconds if self.phase2_seconds else 0.0
+
+    def report(self) -> str:
+        lines = [
+            f"Provider:            {self.provider}",
+            f"Match IDs collected: {self.match_ids_collected} in {self.phase1_seconds:.2f}s",
+            f"Details fetched:     {self.details_fetched} ({self.details_failed} failed) in {self.phase2_seconds:.2f}s",
+            f"Throughput:          {self.matches_per_second:.1f} matches/sec",
+            f"API time:            {self.api_seconds:.2f}s over {self.api_calls} calls",
+            f"DB time:             {self.db_seconds:.2f}s over {self.db_statements} statements",
+            f"Peak RSS:            {self.peak_rss_mb:.1f} MB",
+        ]
+        if self.peak_traced_mb is not None:
+            lines.append(f"Peak traced alloc:   {self.peak_traced_mb:.1f} MB")
+        return "\n".join(lines)
+
+
+class _TimedAPI:
+    """Wraps DotaAPIService and accumulates time spent in provider calls"""
+
+    def __init__(self, api: DotaAPIService, result: SyncBenchmarkResult):
+        self._api = api
+        self._result = result
+
+    def __getattr__(self, name):
+        return getattr(self._api, name)
+
+    async def _timed(self, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self._result.api_seconds += time.perf_counter() - started
+            self._result.api_calls += 1
+
+    async def get_match_history(self, *args, **kwargs):
+        return await self._timed(self._api.get_match_history(*args, **kwargs))
+
+    async def get_match_details(self, *args, **kwargs):
+        return await self._timed(self._api.get_match_details(*args, **kwargs))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_simulator_thread(config) -> str:
+    """Start the provider simulator in a daemon thread and return its base URL"""
+    import uvicorn
+    from .provider_simulator import create_app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _cleanup_user(db, user_id: int):
+    # Runs in the session's transaction, on its DB-API connection
+    delete_user_matches(db.connection().connection.cursor(), [user_id])
+    db.query(PlayerEncountered).filter(PlayerEncountered.user_id == user_id).delete(synchronize_session=False)
+    db.query(SyncJob).filter(SyncJob.user_id == user_id).delete(synchronize_session=False)
+    db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+    db.commit()
+
+
+def run_sync_benchmark(
+    simulator_url: str,
+    provider: str = "opendota",
+    rate_limit_delay: float = 0.0,
+    account_id: int = BENCHMARK_ACCOUNT_ID,
+    trace_memory: bool = False,
+    keep_data: bool = False,
+) -> SyncBenchmarkResult:
+    """
+    Run a full sync (phase 1 + phase 2) for a throwaway user against the simulator.
+
+    Args:
+        simulator_url: Base URL of the provider simulator
+        provider: API provider to exercise (valve, opendota or multi)
+        rate_limit_delay: Client-side delay between requests, 0 to measure raw throughput
+        trace_memory: Track Python allocations with tracemalloc (slower)
+        keep_data: Leave the benchmark user and its matches in the database
+    """
+    from ..tasks.sync_helpers import collect_match_ids_phase, fetch_match_details_phase
+
+    settings.API_PROVIDER = provider
+    settings.VALVE_API_BASE_URL = simulator_url
+    settings.OPENDOTA_API_BASE_URL = f"{simulator_url}/api"
+    settings.VALVE_RATE_LIMIT_DELAY = rate_limit_delay
+    settings.VALVE_RATE_LIMIT_MIN_DELAY = rate_limit_delay
+    settings.OPENDOTA_API_KEY = None
+    # OPENDOTA_RATE_LIMIT_DELAY is derived from the key, so override it on the client below
+
+    result = SyncBenchmarkResult(provider=provider)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("benchmark_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["benchmark_started"].pop()
+        result.db_seconds += time.perf_counter() - started
+        result.db_statements += 1
+
+    steam_id = SteamAuthService.account_id_to_steam_id(account_id)
+    db = SessionLocal()
+    try:
+        _cleanup_user(db, int(steam_id))
+        user = User(id=int(steam_id), steam_id=steam_id, persona_name="sync-benchmark")
+        db.add(user)
+        collect_job = SyncJob(user_id=user.id, job_type=JobType.COLLECT_MATCH_IDS, status=JobStatus.RUNNING)
+        details_job = SyncJob(user_id=user.id, job_type=JobType.FETCH_MATCH_DETAILS, status=JobStatus.RUNNING)
+        db.add_all([collect_job, details_job])
+        db.commit()
+
+        api = DotaAPIService()
+        for client in api.providers.values():
+            client.rate_limiter.delay = rate_limit_delay
+            client.rate_limiter.min_delay = rate_limit_delay
+        timed_api = _TimedAPI(api, result)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            started = time.perf_counter()
+            phase1 = asyncio.run(collect_match_ids_phase(db, user, account_id, collect_job, timed_api, True))
+            result.phase1_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            phase2 = asyncio.run(fetch_match_details_phase(db, user, account_id, details_job, timed_api))
+            result.phase2_seconds = time.perf_counter() - started
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+            event.remove(engine, "after_cursor_execute", after_cursor_execute)
+            if trace_memory:
+                result.peak_traced_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                tracemalloc.stop()
+
+        result.match_ids_collected = phase1.get("match_ids_collected", 0)
+        result.details_fetched = phase2.get("details_fetched", 0)
+        result.details_failed = phase2.get("details_failed", 0) + phase2.get("api_down", 0)
+        result.extra = phase2
+        # ru_maxrss is reported in kilobytes on Linux
+        result.peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        if not keep_data:
+            _cleanup_user(db, user.id)
+    finally:
+        db.close()
+
+    return result
@@ -0,0 +1,197 @@
+"""
+Synthetic Dota 2 match data shaped like the provider responses.
+
+Distributions are rough approximations of a real player's history: a handful
+of comfort heroes dominate, most games are All Pick / Turbo, and games are
+clustered in the evening.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+HERO_COUNT = 124
+
+# (game_mode, weight): 22 = All Pick, 23 = Turbo, 2 = Captains Mode, 3 = Random Draft, 4 = Single Draft
+GAME_MODES = [(22, 70), (23, 20), (3, 4), (4, 4), (2, 2)]
+
+# (lobby_type, weight): 7 = Ranked, 0 = Normal
+LOBBY_TYPES = [(7, 60), (0, 40)]
+
+ITEM_IDS = list(range(1, 300))
+NEUTRAL_ITEM_IDS = list(range(300, 380))
+
+
+def hero_name(hero_id: int) -> str:
+    return f"hero_{hero_id}"
+
+
+def heroes(provider: str) -> List[Dict]:
+    """Hero list in the shape returned by the provider's heroes endpoint"""
+    if provider == "valve":
+        return [
+            {"id": hero_id, "name": f"npc_dota_hero_{hero_name(hero_id)}", "localized_name": f"Hero {hero_id}"}
+            for hero_id in range(1, HERO_COUNT + 1)
+        ]
+    return [
+        {
+            "id": hero_id,
+            "name": f"npc_dota_hero_{hero_name(hero_id)}",
+            "localized_name": f"Hero {hero_id}",
+            "primary_attr": ("str", "agi", "int", "all")[hero_id % 4],
+            "attack_type": "Melee" if hero_id % 2 else "Ranged",
+            "roles": ["Carry"] if hero_id % 3 == 0 else ["Support"],
+        }
+        for hero_id in range(1, HERO_COUNT + 1)
+    ]
+
+
+def player_hero_weights(rng: random.Random) -> List[float]:
+    """Per-player hero preference: a Zipf-like curve over a shuffled hero pool"""
+    pool = list(range(1, HERO_COUNT + 1))
+    rng.shuffle(pool)
+    weights = [0.0] * (HERO_COUNT + 1)
+    for rank, hero_id in enumerate(pool, start=1):
+        weights[hero_id] = 1.0 / rank
+    return weights
+
+
+def weighted_choice(rng: random.Random, choices: List[tuple]) -> int:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=1)[0]
+
+
+def match_start_times(rng: random.Random, count: int, end: Optional[datetime] = None) -> List[datetime]:
+    """
+    Descending start times for `count` matches ending at `end`.
+
+    Gaps follow an exponential distribution (about 2 games a day on average,
+    compressed so very large histories still fit in ~10 years) and the hour of
+    day is pulled towards the evening.
+    """
+    mean_gap_hours = min(12.0, 10 * 365 * 24 / max(count, 1))
+    min_gap = timedelta(hours=min(0.25, mean_gap_hours / 2))
+    current = (end or datetime.utcnow()).replace(microsecond=0)
+    times = []
+    for _ in range(count):
+        candidate = current - timedelta(hours=rng.expovariate(1 / mean_gap_hours))
+        if mean_gap_hours >= 6:
+            hour = min(23, max(0, int(rng.gauss(20, 3))))
+            candidate = candidate.replace(hour=hour, minute=rng.randint(0, 59), second=rng.randint(0, 59))
+        # Keep the history strictly descending
+        current = min(candidate, current - min_gap)
+        times.append(current)
+    return times
+
+
+def synthetic_player(
+    rng: random.Random,
+    account_id: Optional[int],
+    player_slot: int,
+    hero_id: int,
+    won: bool,
+    duration: int
+) -> Dict:
+    """One entry of a match's `players` list"""
+    minutes = max(duration / 60.0, 1.0)
+    kills = max(0, int(rng.gauss(8 if won else 5, 4)))
+    deaths = max(0, int(rng.gauss(5 if won else 8, 3)))
+    gold_per_min = max(150, int(rng.gauss(480 if won else 400, 120)))
+    xp_per_min = max(150, int(rng.gauss(550 if won else 460, 130)))
+
+    items = rng.sample(ITEM_IDS, 9)
+    return {
+        "account_id": account_id,
+        "player_slot": player_slot,
+        "hero_id": hero_id,
+        "kills": kills,
+        "deaths": deaths,
+        "assists": max(0, int(rng.gauss(12, 6))),
+        "last_hits": max(0, int(minutes * rng.uniform(1, 8))),
+        "denies": max(0, int(minutes * rng.uniform(0, 0.5))),
+        "gold_per_min": gold_per_min,
+        "xp_per_min": xp_per_min,
+        "hero_damage": int(minutes * rng.uniform(300, 900)),
+        "tower_damage": int(minutes * rng.uniform(0, 150)),
+        "hero_healing": int(minutes * rng.uniform(0, 60)),
+        "level": min(30, max(1, int(minutes / 1.6))),
+        "net_worth": int(gold_per_min * minutes),
+        "item_0": items[0],
+        "item_1": items[1],
+        "item_2": items[2],
+        "item_3": items[3],
+        "item_4": items[4],
+        "item_5": items[5],
+        "backpack_0": items[6],
+        "backpack_1": items[7],
+        "backpack_2": items[8],
+        "item_neutral": rng.choice(NEUTRAL_ITEM_IDS),
+        "ability_upgrades": [
+            {"ability": 5000 + rng.randint(0, 400), "time": level * 60, "level": level}
+            for level in range(1, min(18, int(minutes / 2)) + 1)
+        ],
+    }
+
+
+def synthetic_match(
+    match_id: int,
+    account_id: int,
+    start_time: datetime,
+    hero_weights: Optional[List[float]] = None,
+    teammates: Optional[List[int]] = None,
+    seed: Optional[int] = None,
+) -> Dict:
+    """
+    Full match details (OpenDota /matches/{id} and Valve GetMatchDetails result
+    share this shape) with `account_id` in one of the ten slots.
+
+    Args:
+        teammates: Account IDs to place on the player's team before random players
+        seed: RNG seed, defaults to match_id so repeated calls return the same match
+    """
+    rng = random.Random(match_id if seed is None else seed)
+    duration = int(rng.gauss(40 * 60, 9 * 60))
+    game_mode = weighted_choice(rng, GAME_MODES)
+    if game_mode == 23:
+        duration = int(duration * 0.55)
+    duration = max(duration, 10 * 60)
+    radiant_win = rng.random() < 0.5
+
+    if hero_weights:
+        own_hero = rng.choices(range(len(hero_weights)), weights=hero_weights, k=1)[0]
+    else:
+        own_hero = rng.randint(1, HERO_COUNT)
+    other_heroes = rng.sample([h for h in range(1, HERO_COUNT + 1) if h != own_hero], 9)
+
+    own_index = rng.randint(0, 9)
+    own_radiant = own_index < 5
+    slots = [i if i < 5 else 128 + (i - 5) for i in range(10)]
+    team_indices = [i for i in range(10) if (i < 5) == own_radiant and i != own_index]
+    teammate_ids = list(teammates or [])
+
+    players = []
+    heroes_iter = iter(other_heroes)
+    for index, slot in enumerate(slots):
+        if index == own_index:
+            player_account, hero_id = account_id, own_hero
+        else:
+            hero_id = next(heroes_iter)
+            if index in team_indices and teammate_ids:
+                player_account = teammate_ids.pop(0)
+            elif rng.random() < 0.25:
+                # Anonymous players have no account_id
+                player_account = None
+            else:
+                player_account = rng.randint(10_000_000, 1_500_000_000)
+        won = (slot < 128) == radiant_win
+        players.append(synthetic_player(rng, player_account, slot, hero_id, won, duration))
+
+    return {
+        "match_id": match_id,
+        "match_seq_num": match_id + 1_000_000_000,
+        "start_time": int(start_time.timestamp()),
+        "duration": duration,
+        "game_mode": game_mode,
+        "lobby_type": weighted_choice(rng, LOBBY_TYPES),
+        "radiant_win": radiant_win,
+        "players": players,
+    }
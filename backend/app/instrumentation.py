@@ -0,0 +1,196 @@
+"""
+Per-request performance instrumentation.
+
+When enabled (PERF_INSTRUMENTATION=true) every HTTP request records:
+- wall time
+- SQL statement count and total DB time (SQLAlchemy cursor events)
+- response serialization time (response model validation + JSON rendering)
+
+The numbers are returned in a Server-Timing header, and requests slower than
+SLOW_REQUEST_THRESHOLD_MS are logged with their slowest statements. When
+disabled nothing is registered, so the cost is zero.
+
+Serialization is timed through FastAPI's extension points: TimedRoute (the
+routers' route_class) notes when the endpoint returns, and TimedJSONResponse
+(the app's default response class) counts from there until it is
+constructed, which is when response model validation is done, plus its JSON
+rendering.
+"""
+import asyncio
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    db_seconds: float = 0.0
+    db_statements: int = 0
+    serialization_seconds: float = 0.0
+    endpoint_returned: Optional[float] = None
+    statements: List[Tuple[float, str]] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        return ", ".join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_statements} queries"',
+            f"ser;dur={self.serialization_seconds * 1000:.1f}",
+            f"total;dur={self.elapsed * 1000:.1f}",
+        ])
+
+    def top_statements(self, limit: int) -> List[Tuple[float, str]]:
+        return sorted(self.statements, key=lambda s: s[0], reverse=True)[:limit]
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the request being handled, or None outside a request / when disabled"""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current.get()
+    if metrics is None:
+        return
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    metrics.db_seconds += duration
+    metrics.db_statements += 1
+    metrics.statements.append((duration, statement))
+
+
+def install_sql_listeners(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _endpoint_returned():
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.endpoint_returned = time.perf_counter()
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an endpoint to note when it returns (signature kept for FastAPI's dependency analysis)"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _endpoint_returned()
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _endpoint_returned()
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """APIRoute whose endpoint marks the start of response serialization (plain APIRoute when disabled)"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if settings.PERF_INSTRUMENTATION:
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+class TimedJSONResponse(JSONResponse):
+    """
+    JSONResponse that adds response model validation (since the endpoint
+    returned) and its JSON rendering to the request's serialization time
+    """
+
+    def __init__(self, content, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is not None and metrics.endpoint_returned is not None:
+            metrics.serialization_seconds += time.perf_counter() - metrics.endpoint_returned
+            metrics.endpoint_returned = None
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content) -> bytes:
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(content)
+        started = time.perf_counter()
+        try:
+            return super().render(content)
+        finally:
+            metrics.serialization_seconds += time.perf_counter() - started
+
+
+class PerformanceMiddleware:
+    """ASGI middleware that tracks RequestMetrics and emits Server-Timing"""
+
+    def __init__(self, app, slow_threshold_ms: float, top_statements: int = 5):
+        self.app = app
+        self.slow_threshold = slow_threshold_ms / 1000.0
+        self.top_statements = top_statements
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", metrics.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = metrics.elapsed
+            if elapsed >= self.slow_threshold:
+                self._log_slow_request(scope, metrics, elapsed)
+
+    def _log_slow_request(self, scope, metrics: RequestMetrics, elapsed: float):
+        lines = [
+            f"Slow request {scope.get('method')} {scope.get('path')}: {elapsed * 1000:.1f}ms total, "
+            f"{metrics.db_seconds * 1000:.1f}ms in {metrics.db_statements} queries, "
+            f"{metrics.serialization_seconds * 1000:.1f}ms serializing"
+        ]
+        for duration, statement in metrics.top_statements(self.top_statements):
+            lines.append(f"  {duration * 1000:8.1f}ms  {' '.join(statement.split())[:500]}")
+        logger.warning("\n".join(lines))
+
+
+def setup_instrumentation(app, engine: Engine, slow_threshold_ms: float, top_statements: int = 5):
+    """Register SQL listeners and the middleware"""
+    install_sql_listeners(engine)
+    app.add_middleware(PerformanceMiddleware, slow_threshold_ms=slow_threshold_ms, top_statements=top_statements)
+    logger.info(f"Performance instrumentation enabled (slow request threshold {slow_threshold_ms:.0f}ms)")
@@ -1,9 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import init_db
+from .database import init_db, engine
 from .routes import auth_router, matches_router, stats_router, sync_router, heroes_router, api_usage_router
 from .config import settings
 from .logging_config import setup_logging
+from .instrumentation import setup_instrumentation, TimedJSONResponse
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from .metrics import HTTPMetricsMiddleware
 import logging
 
 # Setup logging
@@ -13,7 +17,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title=settings.APP_NAME,
     description="Dota 2 statistics tracking API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TimedJSONResponse if settings.PERF_INSTRUMENTATION else JSONResponse
 )
 
 # CORS middleware
@@ -25,6 +30,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Route latency histograms for /metrics
+app.add_middleware(HTTPMetricsMiddleware)
+
+# Per-request Server-Timing / slow request logging (no-op unless enabled)
+if settings.PERF_INSTRUMENTATION:
+    setup_instrumentation(
+        app,
+        engine,
+        slow_threshold_ms=settings.SLOW_REQUEST_THRESHOLD_MS,
+        top_statements=settings.SLOW_REQUEST_TOP_STATEMENTS,
+    )
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(matches_router)
@@ -56,3 +73,9 @@ async def root():
 async def health():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
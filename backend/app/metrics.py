@@ -0,0 +1,154 @@
+"""
+Prometheus metrics for the API and the Celery workers.
+
+The API serves them at /metrics. Workers run prefork processes, so they write
+to PROMETHEUS_MULTIPROC_DIR and the main worker process exposes the merged
+values (plus Celery queue depth) on WORKER_METRICS_PORT.
+"""
+import logging
+import os
+import time
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_REQUEST_SECONDS = Histogram(
+    "dota_provider_request_seconds",
+    "Latency of requests to Valve/OpenDota",
+    ["provider", "endpoint", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+RATE_LIMITER_WAIT_SECONDS = Histogram(
+    "dota_rate_limiter_wait_seconds",
+    "Time spent waiting on the provider rate limiter before a request",
+    ["provider"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60),
+)
+SYNC_MATCHES = Counter(
+    "dota_sync_matches_total",
+    "Matches handled by the sync pipeline",
+    ["phase", "outcome"],
+)
+SYNC_PHASE_THROUGHPUT = Gauge(
+    "dota_sync_phase_matches_per_second",
+    "Matches per second of the most recent sync phase run",
+    ["phase"],
+    multiprocess_mode="livemax",
+)
+STUB_BACKLOG = Gauge(
+    "dota_sync_stub_backlog",
+    "Matches per user still waiting for details",
+    ["user_id"],
+    multiprocess_mode="livemax",
+)
+DB_COMMIT_SECONDS = Histogram(
+    "dota_sync_commit_seconds",
+    "Latency of sync pipeline commits",
+    ["phase"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "dota_http_request_seconds",
+    "API request latency by route",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def commit(db, phase: str):
+    """Commit the session and record the commit latency"""
+    started = time.perf_counter()
+    db.commit()
+    DB_COMMIT_SECONDS.labels(phase=phase).observe(time.perf_counter() - started)
+
+
+class HTTPMetricsMiddleware:
+    """ASGI middleware recording request latency labelled by route template"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            # Route templates keep label cardinality bounded (/matches/{match_id})
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            self._route_paths[endpoint] = path = path or "unmatched"
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"],
+                route=self._route_label(scope),
+                status=str(status["code"]),
+            ).observe(time.perf_counter() - started)
+
+
+class CeleryQueueCollector:
+    """Reports the number of messages waiting in each Celery queue at scrape time"""
+
+    def __init__(self, celery_app, queues=("celery",)):
+        self.celery_app = celery_app
+        self.queues = queues
+
+    def collect(self):
+        gauge = GaugeMetricFamily("dota_celery_queue_depth", "Messages waiting in a Celery queue", labels=["queue"])
+        try:
+            with self.celery_app.connection_for_read() as connection:
+                channel = connection.default_channel
+                for queue in self.queues:
+                    declared = channel.queue_declare(queue=queue, passive=True)
+                    gauge.add_metric([queue], declared.message_count)
+        except Exception as e:
+            logger.warning(f"Could not read Celery queue depth: {e}")
+        yield gauge
+
+
+def start_worker_exporter(celery_app, port: int):
+    """
+    Expose worker metrics on `port` from the main Celery process.
+
+    Requires PROMETHEUS_MULTIPROC_DIR so that values written by the prefork
+    child processes can be merged.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        logger.warning("PROMETHEUS_MULTIPROC_DIR not set, worker metrics exporter disabled")
+        return
+
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(CeleryQueueCollector(celery_app))
+    start_http_server(port, registry=registry)
+    logger.info(f"Worker metrics exporter listening on :{port}")
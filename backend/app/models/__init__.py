@@ -1,8 +1,9 @@
 from .user import User
-from .match import Match, MatchPlayer
+from .match import Match, MatchPlayer, SharedMatch, MatchPayload
 from .hero import Hero
 from .player_encountered import PlayerEncountered
 from .sync_job import SyncJob
 from .api_call import APICall
+from .player_persona import PlayerPersona
 
-__all__ = ["User", "Match", "MatchPlayer", "Hero", "PlayerEncountered", "SyncJob", "APICall"]
+__all__ = ["User", "Match", "MatchPlayer", "SharedMatch", "MatchPayload", "Hero", "PlayerEncountered", "SyncJob", "APICall", "PlayerPersona"]
@@ -1,20 +1,79 @@
-from sqlalchemy import Column, BigInteger, Integer, String, Boolean, DateTime, JSON, ForeignKey, Float
+from sqlalchemy import (
+    Column, BigInteger, Integer, String, Boolean, DateTime, JSON, ForeignKey, Float, Index, LargeBinary,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from ..database import Base
 
 
+# Slots whose items make up Match.item_ids
+ITEM_SLOTS = (
+    "item_0", "item_1", "item_2", "item_3", "item_4", "item_5",
+    "backpack_0", "backpack_1", "backpack_2", "item_neutral",
+)
+
+
+def item_occurrences(player: dict) -> list:
+    """Distinct item IDs across a player's item slots (0 is an empty slot)"""
+    return sorted({player.get(slot) for slot in ITEM_SLOTS} - {None, 0})
+
+
+class SharedMatch(Base):
+    """
+    Match-level data, stored once per match however many users played it.
+
+    Each participating user has their own Match row; the provider payload
+    (in MatchPayload) and all ten players live here so the match is only
+    fetched once.
+    """
+    __tablename__ = "shared_matches"
+
+    id = Column(BigInteger, primary_key=True)  # Match ID
+    start_time = Column(DateTime(timezone=True), nullable=True)
+    duration = Column(Integer, nullable=True)
+    game_mode = Column(Integer, nullable=True)
+    lobby_type = Column(Integer, nullable=True)
+    radiant_win = Column(Boolean, nullable=True)
+
+    # match_mapping.NORMALIZE_VERSION the rows were derived with (see services.renormalize)
+    normalize_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    players = relationship("MatchPlayer", back_populates="match", cascade="all, delete-orphan")
+
+
+class MatchPayload(Base):
+    """
+    Full provider payload of a shared match, zstd-compressed JSON.
+
+    Kept in its own table so no match query ever reads it; load it with
+    services.match_payloads.load_payload.
+    """
+    __tablename__ = "match_payloads"
+
+    match_id = Column(BigInteger, ForeignKey("shared_matches.id", ondelete="CASCADE"), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    raw_size = Column(Integer, nullable=False)  # Uncompressed JSON bytes
+
+
 class Match(Base):
+    """A user's participation in a match (one row per user per match)"""
     __tablename__ = "matches"
 
     id = Column(BigInteger, primary_key=True, index=True)  # Match ID
-    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True, index=True)
 
     # Two-phase sync columns
     has_details = Column(Boolean, nullable=True, index=True)  # NULL=stub, TRUE=complete, FALSE=failed
     retry_count = Column(Integer, nullable=False, default=0)
     last_fetch_attempt = Column(DateTime(timezone=True), nullable=True)
     fetch_error = Column(String, nullable=True)
+    # When phase 2 should (re)try fetching details; NULL once fetched or out of retries
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
 
     # Match data (nullable to support stubs without details)
     start_time = Column(DateTime(timezone=True), nullable=True, index=True)
@@ -53,6 +112,9 @@ class Match(Base):
     backpack_2 = Column(Integer)
     item_neutral = Column(Integer)
 
+    # Distinct item IDs from all ten slots above, GIN-indexed for "matches with item X"
+    item_ids = Column(ARRAY(Integer))
+
     # Abilities (stored as JSON array)
     ability_upgrades = Column(JSON)
 
@@ -60,20 +122,30 @@ class Match(Base):
     net_worth = Column(Integer)
     rank_tier = Column(Integer)  # MMR tier
 
-    # Full match data (cached from API)
-    raw_data = Column(JSON)
-
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    # Relationships
-    players = relationship("MatchPlayer", back_populates="match", cascade="all, delete-orphan")
+    # Relationships (players belong to the SharedMatch)
+    players = relationship(
+        "MatchPlayer",
+        primaryjoin="Match.id == foreign(MatchPlayer.match_id)",
+        viewonly=True,
+    )
+
+    __table_args__ = (
+        Index("ix_matches_item_ids", "item_ids", postgresql_using="gin"),
+        # Phase 2's due matches, a range scan per user over pending rows only
+        Index(
+            "ix_matches_user_next_attempt", "user_id", "next_attempt_at",
+            postgresql_where=text("next_attempt_at IS NOT NULL"),
+        ),
+    )
 
 
 class MatchPlayer(Base):
     __tablename__ = "match_players"
 
     id = Column(Integer, primary_key=True, index=True)
-    match_id = Column(BigInteger, ForeignKey("matches.id"), nullable=False, index=True)
+    match_id = Column(BigInteger, ForeignKey("shared_matches.id"), nullable=False, index=True)
     account_id = Column(BigInteger, nullable=True, index=True)  # Can be null for anonymous
     player_slot = Column(Integer, nullable=False)
     hero_id = Column(Integer, nullable=False)
@@ -101,4 +173,8 @@ class MatchPlayer(Base):
     item_5 = Column(Integer)
 
     # Relationship
-    match = relationship("Match", back_populates="players")
+    match = relationship("SharedMatch", back_populates="players")
+
+    __table_args__ = (
+        UniqueConstraint("match_id", "player_slot", name="uq_match_players_match_slot"),
+    )
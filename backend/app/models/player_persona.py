@@ -0,0 +1,13 @@
+from sqlalchemy import Column, BigInteger, String, DateTime
+from ..database import Base
+
+
+class PlayerPersona(Base):
+    """Steam profile names shared by every user's players encountered"""
+
+    __tablename__ = "player_personas"
+
+    account_id = Column(BigInteger, primary_key=True)  # Dota 2 account ID
+    persona_name = Column(String, nullable=True)  # NULL when Steam returned no profile
+    avatar_url = Column(String, nullable=True)
+    resolved_at = Column(DateTime(timezone=True), nullable=False, index=True)
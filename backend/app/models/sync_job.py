@@ -36,6 +36,10 @@ class SyncJob(Base):
     processed_matches = Column(Integer, default=0)
     new_matches = Column(Integer, default=0)
 
+    # Match history page reached by an ID collection (OpenDota offset or Valve
+    # start_at_match_id), checkpointed after every page so the job can resume
+    cursor = Column(BigInteger, nullable=True)
+
     # Celery task info
     task_id = Column(String, nullable=True, index=True)
 
@@ -14,3 +14,13 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     last_sync_at = Column(DateTime(timezone=True), nullable=True)
+    # Bumped whenever a sync adds detailed matches, so caches can tell they are stale
+    data_version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Bumped when existing matches are rewritten (renormalize), so caches rebuild from scratch
+    data_generation = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Set when a full ID collection walks the whole match history, after which
+    # full syncs can stop at the first page of matches they already know
+    history_collected_at = Column(DateTime(timezone=True), nullable=True)
+    # Newest match ID collected with nothing newer missing; incremental syncs
+    # page back through the match history until they reach it
+    high_water_match_id = Column(BigInteger, nullable=True)
@@ -9,10 +9,11 @@ from ..models import User, APICall
 from ..schemas import APIUsageStats, APIUsageSummary, DailyAPIUsage
 from .auth import get_current_user
 from ..config import settings
+from ..instrumentation import TimedRoute
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api-usage", tags=["api-usage"])
+router = APIRouter(prefix="/api-usage", tags=["api-usage"], route_class=TimedRoute)
 
 
 @router.get("/summary", response_model=APIUsageSummary)
@@ -6,9 +6,10 @@ from ..models import User
 from ..schemas import UserResponse
 from ..services import SteamAuthService
 from ..config import settings
+from ..instrumentation import TimedRoute
 from itsdangerous import URLSafeSerializer
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=TimedRoute)
 serializer = URLSafeSerializer(settings.SECRET_KEY)
 
 
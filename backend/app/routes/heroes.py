@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from typing import List
 from ..database import get_db
 from ..models import Hero
+from ..instrumentation import TimedRoute
 
-router = APIRouter(prefix="/heroes", tags=["heroes"])
+router = APIRouter(prefix="/heroes", tags=["heroes"], route_class=TimedRoute)
 
 
 @router.get("")
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import Optional
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.orm import Session, selectinload
+from typing import Literal, Optional
 from datetime import datetime
-from ..database import get_db
+from ..database import get_db, SessionLocal
 from ..models import User, Match
 from ..schemas import MatchListResponse, MatchResponse, MatchDetailResponse
+from ..services import MatchExportService
+from ..instrumentation import TimedRoute
 from .auth import get_current_user
 
-router = APIRouter(prefix="/matches", tags=["matches"])
+router = APIRouter(prefix="/matches", tags=["matches"], route_class=TimedRoute)
 
 
 @router.get("", response_model=MatchListResponse)
@@ -60,6 +68,78 @@ async def get_matches(
     )
 
 
+@router.get("/export")
+async def export_matches(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    include_players: bool = Query(False, description="Include the ten match players of each match"),
+    hero_id: Optional[int] = None,
+    game_mode: Optional[int] = None,
+    lobby_type: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    include_stubs: bool = Query(False, description="Include matches without details (stubs)"),
+    user: User = Depends(get_current_user),
+):
+    """Stream the user's full match history as NDJSON or CSV"""
+    user_id = user.id
+
+    def stream():
+        # The response is streamed after the handler returns, so the export
+        # reads through its own session instead of the request's
+        db = SessionLocal()
+        try:
+            service = MatchExportService(db)
+            matches = service.iter_matches(
+                user_id,
+                include_players=include_players,
+                include_stubs=include_stubs,
+                hero_id=hero_id,
+                game_mode=game_mode,
+                lobby_type=lobby_type,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            if format == "csv":
+                yield from service.to_csv(matches, include_players=include_players)
+            else:
+                yield from service.to_ndjson(matches)
+        finally:
+            db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="matches-{user_id}.{format}"'},
+    )
+
+
+@router.get("/export/parquet")
+def export_matches_parquet(user: User = Depends(get_current_user)):
+    """Download the user's matches, match players and players encountered as a zip of Parquet files"""
+    from ..services.parquet_snapshot import export_snapshot
+
+    workdir = Path(tempfile.mkdtemp(prefix="snapshot-"))
+    try:
+        export_snapshot(workdir / "snapshot", user_ids=[user.id])
+    except RuntimeError as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise HTTPException(status_code=501, detail=str(e))
+
+    # Parquet files are already compressed, so the zip only stores them
+    archive = workdir / f"matches-{user.id}.zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as zf:
+        for path in sorted((workdir / "snapshot").glob("*.parquet")):
+            zf.write(path, arcname=path.name)
+
+    return FileResponse(
+        archive,
+        media_type="application/zip",
+        filename=archive.name,
+        background=BackgroundTask(shutil.rmtree, workdir, ignore_errors=True),
+    )
+
+
 @router.get("/{match_id}", response_model=MatchDetailResponse)
 async def get_match(
     match_id: int,
@@ -69,12 +149,12 @@ async def get_match(
     """Get detailed match information"""
     match = (
         db.query(Match)
+        .options(selectinload(Match.players))
         .filter(Match.id == match_id, Match.user_id == user.id)
         .first()
     )
 
     if not match:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Match not found")
 
     return match
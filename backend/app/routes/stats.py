@@ -4,11 +4,14 @@ from typing import Optional, List
 from datetime import datetime
 from ..database import get_db
 from ..models import User
-from ..schemas.stats import HeroStats, PlayerStats, TimeStats, DashboardStats, PlayerEncounteredStats
+from ..schemas.stats import HeroStats, PlayerStats, TimeStats, DashboardStats, PlayerEncounteredStats, HeroPairStats
+from ..schemas.stats import ItemStats, ItemHeroStats
 from ..services import StatsService
+from ..services.hero_matchups import get_matchup_cache
+from ..instrumentation import TimedRoute
 from .auth import get_current_user
 
-router = APIRouter(prefix="/stats", tags=["stats"])
+router = APIRouter(prefix="/stats", tags=["stats"], route_class=TimedRoute)
 
 
 @router.get("/dashboard", response_model=DashboardStats)
@@ -63,6 +66,48 @@ async def get_hero_stats(
     )
 
 
+@router.get("/items", response_model=List[ItemStats])
+async def get_item_stats(
+    hero_id: Optional[int] = None,
+    game_mode: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get most-built items and their win rates (optionally for one hero)"""
+    stats_service = StatsService(db)
+    return stats_service.get_item_stats(
+        user.id,
+        hero_id=hero_id,
+        game_mode=game_mode,
+        start_date=start_date,
+        end_date=end_date,
+        limit=limit
+    )
+
+
+@router.get("/items/{item_id}", response_model=List[ItemHeroStats])
+async def get_item_hero_stats(
+    item_id: int,
+    game_mode: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get per-hero win rates with an item"""
+    stats_service = StatsService(db)
+    return stats_service.get_item_hero_stats(
+        user.id,
+        item_id,
+        game_mode=game_mode,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+
 @router.get("/players-encountered", response_model=List[PlayerEncounteredStats])
 async def get_players_encountered(
     limit: int = Query(20, ge=1, le=100),
@@ -82,3 +127,27 @@ async def get_time_stats(
     """Get time-based statistics"""
     stats_service = StatsService(db)
     return stats_service.get_time_based_stats(user.id)
+
+
+@router.get("/matchups", response_model=List[HeroPairStats])
+async def get_hero_matchups(
+    hero_id: Optional[int] = Query(None, description="Only matches where you played this hero"),
+    min_games: int = Query(1, ge=1),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get win rate against each enemy hero"""
+    counts = get_matchup_cache().get(db, user.id)
+    return counts.pair_stats(allies=False, hero_id=hero_id, min_games=min_games)
+
+
+@router.get("/synergies", response_model=List[HeroPairStats])
+async def get_hero_synergies(
+    hero_id: Optional[int] = Query(None, description="Only matches where you played this hero"),
+    min_games: int = Query(1, ge=1),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get win rate alongside each allied hero"""
+    counts = get_matchup_cache().get(db, user.id)
+    return counts.pair_stats(allies=True, hero_id=hero_id, min_games=min_games)
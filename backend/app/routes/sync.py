@@ -8,9 +8,11 @@ from ..models.sync_job import JobStatus, JobType
 from ..schemas import SyncJobResponse, SyncJobCreate
 from ..tasks import collect_match_ids, fetch_match_details
 from ..tasks.celery_app import celery_app
+from ..tasks.sync_helpers import interrupted_collection, synced_back_to
+from ..instrumentation import TimedRoute
 from .auth import get_current_user
 
-router = APIRouter(prefix="/sync", tags=["sync"])
+router = APIRouter(prefix="/sync", tags=["sync"], route_class=TimedRoute)
 
 
 @router.post("/trigger", response_model=SyncJobResponse)
@@ -39,13 +41,20 @@ async def trigger_sync(
     # Use the job type from request
     job_type = sync_data.job_type
 
-    # Create sync job
-    sync_job = SyncJob(
-        user_id=user.id,
-        job_type=job_type,
-        status=JobStatus.PENDING
-    )
-    db.add(sync_job)
+    # A full sync picks up an interrupted ID collection where it stopped
+    sync_job = interrupted_collection(db, user.id) if job_type == JobType.SYNC_ALL else None
+    if sync_job:
+        sync_job.status = JobStatus.PENDING
+        sync_job.error_message = None
+        sync_job.completed_at = None
+    else:
+        # Create sync job
+        sync_job = SyncJob(
+            user_id=user.id,
+            job_type=job_type,
+            status=JobStatus.PENDING
+        )
+        db.add(sync_job)
     db.commit()
     db.refresh(sync_job)
 
@@ -172,7 +181,9 @@ async def get_sync_status(
 
     return {
         "is_syncing": active_job is not None,
-        "active_job": SyncJobResponse.model_validate(active_job) if active_job else None
+        "active_job": SyncJobResponse.model_validate(active_job) if active_job else None,
+        # Match history is complete from this date on (details are fetched newest first)
+        "synced_back_to": synced_back_to(db, user.id)
     }
 
 
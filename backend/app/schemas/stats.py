@@ -20,6 +20,33 @@ class HeroStats(BaseModel):
     total_hero_healing: Optional[int] = None
 
 
+class HeroPairStats(BaseModel):
+    """The user's record with (synergy) or against (matchup) another hero"""
+    hero_id: int
+    games: int
+    wins: int
+    losses: int
+    win_rate: float
+
+
+class ItemStats(BaseModel):
+    """How often the user finished with an item, and the win rate when they did"""
+    item_id: int
+    games: int
+    wins: int
+    losses: int
+    win_rate: float
+
+
+class ItemHeroStats(BaseModel):
+    """Win rate with one item, per hero the user played"""
+    hero_id: int
+    games: int
+    wins: int
+    losses: int
+    win_rate: float
+
+
 class PlayerEncounteredStats(BaseModel):
     account_id: int
     persona_name: Optional[str] = None
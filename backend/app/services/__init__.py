@@ -1,5 +1,6 @@
 from .steam_auth import SteamAuthService
 from .dota_api import DotaAPIService
 from .stats_service import StatsService
+from .match_export_service import MatchExportService
 
-__all__ = ["SteamAuthService", "DotaAPIService", "StatsService"]
+__all__ = ["SteamAuthService", "DotaAPIService", "StatsService", "MatchExportService"]
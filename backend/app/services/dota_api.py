@@ -1,30 +1,50 @@
+import logging
+import time
 from typing import List, Dict, Optional
 from ..config import settings
 from .valve_api import ValveAPI
 from .opendota_api import OpenDotaAPI
+from .exceptions import APIException
+
+logger = logging.getLogger(__name__)
 
 
 class DotaAPIService:
     """
     Factory/Router service that delegates API calls to the appropriate provider
     based on settings configuration.
+
+    With API_PROVIDER=multi, match details are spread across Valve and OpenDota
+    (whichever limiter can serve the next request soonest) and fail over to the
+    other provider when one is rate limited or erroring. Match history, heroes
+    and normalization go through MULTI_PRIMARY_PROVIDER.
     """
 
+    # Consecutive provider-side failures before a provider is taken out of rotation
+    DEGRADED_THRESHOLD = 3
+
     def __init__(self):
         self.provider = settings.API_PROVIDER
+        self.providers: Dict[str, object] = {}
 
-        # Initialize the appropriate API implementation
-        if self.provider == "valve":
-            self.api = ValveAPI(
+        # Initialize the appropriate API implementation(s)
+        if self.provider in ("valve", "multi"):
+            self.providers["valve"] = ValveAPI(
                 api_key=settings.STEAM_API_KEY,
                 rate_limit_delay=settings.VALVE_RATE_LIMIT_DELAY
             )
-        else:
-            self.api = OpenDotaAPI(
+        if self.provider in ("opendota", "multi"):
+            self.providers["opendota"] = OpenDotaAPI(
                 rate_limit_delay=settings.OPENDOTA_RATE_LIMIT_DELAY,
                 api_key=settings.OPENDOTA_API_KEY
             )
 
+        self.primary_provider = settings.MULTI_PRIMARY_PROVIDER if self.provider == "multi" else self.provider
+        self.api = self.providers[self.primary_provider]
+
+        self._failures: Dict[str, int] = {name: 0 for name in self.providers}
+        self._degraded_until: Dict[str, float] = {name: 0.0 for name in self.providers}
+
     async def get_match_history(
         self,
         account_id: int,
@@ -34,7 +54,7 @@ class DotaAPIService:
     ) -> List[Dict]:
         """Get match history for a player"""
         # Only pass db to OpenDota API for tracking
-        if self.provider == "opendota":
+        if self.primary_provider == "opendota":
             return await self.api.get_match_history(
                 account_id, matches_requested, start_at_match_id, db
             )
@@ -44,10 +64,24 @@ class DotaAPIService:
 
     async def get_match_details(self, match_id: int, db = None) -> Optional[Dict]:
         """Get detailed match information"""
-        # Only pass db to OpenDota API for tracking
-        if self.provider == "opendota":
-            return await self.api.get_match_details(match_id, db)
-        return await self.api.get_match_details(match_id)
+        if len(self.providers) == 1:
+            return await self._get_match_details_from(self.primary_provider, match_id, db)
+
+        last_error: Optional[APIException] = None
+        for name in self._route_order():
+            try:
+                data = await self._get_match_details_from(name, match_id, db)
+                self._failures[name] = 0
+                return data
+            except APIException as e:
+                # A 4xx other than 429 is about the match, not the provider
+                if e.status_code is not None and 400 <= e.status_code < 500 and e.status_code != 429:
+                    raise
+                self._record_failure(name)
+                logger.warning(f"Provider {name} failed for match {match_id} ({e}), failing over")
+                last_error = e
+
+        raise last_error
 
     async def get_heroes(self) -> List[Dict]:
         """Get list of all heroes"""
@@ -56,3 +90,31 @@ class DotaAPIService:
     def normalize_match_data(self, match_data: Dict, account_id: int) -> Dict:
         """Normalize match data from different API providers"""
         return self.api.normalize_match_data(match_data, account_id)
+
+    async def _get_match_details_from(self, name: str, match_id: int, db) -> Optional[Dict]:
+        # Only pass db to OpenDota API for tracking
+        if name == "opendota":
+            return await self.providers[name].get_match_details(match_id, db)
+        return await self.providers[name].get_match_details(match_id)
+
+    def _route_order(self) -> List[str]:
+        """
+        Order providers for the next detail request.
+
+        Healthy providers come first, sorted by how soon their limiter can serve
+        a request, so over time each gets a share proportional to its current rate.
+        """
+        now = time.monotonic()
+
+        def key(name: str):
+            limiter = self.providers[name].rate_limiter
+            return (self._degraded_until[name] > now, limiter.ready_in(), -limiter.current_rate)
+
+        return sorted(self.providers, key=key)
+
+    def _record_failure(self, name: str):
+        self._failures[name] += 1
+        if self._failures[name] >= self.DEGRADED_THRESHOLD:
+            cooldown = min(settings.RATE_LIMIT_MAX_DELAY * self._failures[name], 600.0)
+            self._degraded_until[name] = time.monotonic() + cooldown
+            logger.warning(f"Provider {name} degraded after {self._failures[name]} failures, cooling down {cooldown:.0f}s")
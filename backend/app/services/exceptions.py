@@ -18,3 +18,20 @@ class APIException(Exception):
         if self.status_code:
             return f"API Error {self.status_code}: {self.message}"
         return f"API Error: {self.message}"
+
+
+class RateLimitException(APIException):
+    """Exception raised when the provider answers 429 Too Many Requests"""
+
+    def __init__(self, message: str, retry_after: float = None):
+        """
+        Args:
+            message: Error message
+            retry_after: Seconds the provider asked us to wait, if known
+        """
+        super().__init__(message, status_code=429)
+        self.retry_after = retry_after
+
+
+class ArchiveCorruptError(Exception):
+    """Exception raised when a match archive record fails its integrity checks"""
@@ -0,0 +1,188 @@
+"""
+Hero matchup (against) and synergy (alongside) win rates from match_players.
+
+For each user we keep four count matrices indexed [own hero, other hero]:
+games and wins with the other hero as an enemy, and the same as an ally.
+They are filled with `bincount` over the user's match_players, read in
+server-side cursor chunks, and cached per `User.data_version`. When the
+version changes only matches fetched since the last build are counted;
+when `User.data_generation` changes (matches rewritten) they are rebuilt.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Match, MatchPlayer, User
+from ..schemas.stats import HeroPairStats
+from .match_column_store import BUILD_CHUNK_SIZE, WATERMARK_MARGIN
+
+logger = logging.getLogger(__name__)
+
+# Hero IDs are below this; anything else is ignored
+HERO_ID_LIMIT = 200
+
+
+class HeroPairCounts:
+    """Matchup and synergy count matrices for one user"""
+
+    def __init__(self, version: int, generation: int = 0):
+        self.version = version
+        self.generation = generation
+        self.watermark: Optional[datetime] = None
+        self.match_ids = np.empty(0, dtype=np.int64)
+        shape = (HERO_ID_LIMIT, HERO_ID_LIMIT)
+        self.enemy_games = np.zeros(shape, dtype=np.int32)
+        self.enemy_wins = np.zeros(shape, dtype=np.int32)
+        self.ally_games = np.zeros(shape, dtype=np.int32)
+        self.ally_wins = np.zeros(shape, dtype=np.int32)
+
+    def copy(self, version: int) -> "HeroPairCounts":
+        counts = HeroPairCounts(version, self.generation)
+        counts.watermark = self.watermark
+        for name in ("match_ids", "enemy_games", "enemy_wins", "ally_games", "ally_wins"):
+            setattr(counts, name, getattr(self, name).copy())
+        return counts
+
+    def add_rows(self, rows: List, counted: np.ndarray):
+        """
+        Count (match_id, own hero, own slot, radiant_win, other hero, other slot,
+        last_fetch_attempt) rows, skipping matches in `counted`.
+
+        `counted` is the set of match IDs from before the update rather than
+        self.match_ids, because a match's rows can span two chunks.
+        """
+        if not rows:
+            return
+        count = len(rows)
+        match_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=count)
+        own_hero = np.fromiter((r[1] or 0 for r in rows), dtype=np.int64, count=count)
+        own_radiant = np.fromiter((r[2] is not None and r[2] < 128 for r in rows), dtype=np.bool_, count=count)
+        radiant_win = np.fromiter((bool(r[3]) for r in rows), dtype=np.bool_, count=count)
+        other_hero = np.fromiter((r[4] or 0 for r in rows), dtype=np.int64, count=count)
+        other_radiant = np.fromiter((r[5] < 128 for r in rows), dtype=np.bool_, count=count)
+
+        keep = (
+            ~np.isin(match_ids, counted)
+            & (own_hero > 0) & (own_hero < HERO_ID_LIMIT)
+            & (other_hero > 0) & (other_hero < HERO_ID_LIMIT)
+        )
+        index = own_hero * HERO_ID_LIMIT + other_hero
+        won = own_radiant == radiant_win
+        ally = own_radiant == other_radiant
+        size = HERO_ID_LIMIT * HERO_ID_LIMIT
+
+        for games, wins, side in (
+            (self.ally_games, self.ally_wins, keep & ally),
+            (self.enemy_games, self.enemy_wins, keep & ~ally),
+        ):
+            games += np.bincount(index[side], minlength=size).reshape(games.shape).astype(np.int32)
+            wins += np.bincount(index[side & won], minlength=size).reshape(wins.shape).astype(np.int32)
+
+        self.match_ids = np.union1d(self.match_ids, match_ids[keep])
+        attempts = [r[6] for r in rows if r[6] is not None]
+        if attempts:
+            self.watermark = max([self.watermark, *attempts]) if self.watermark else max(attempts)
+
+    def pair_stats(self, allies: bool, hero_id: Optional[int] = None, min_games: int = 1) -> List[HeroPairStats]:
+        """
+        Win rate with (allies=True) or against each other hero, most played first.
+
+        Args:
+            hero_id: Only matches where the user played this hero
+        """
+        games = self.ally_games if allies else self.enemy_games
+        wins = self.ally_wins if allies else self.enemy_wins
+        if hero_id is not None:
+            if not 0 < hero_id < HERO_ID_LIMIT:
+                return []
+            games, wins = games[hero_id], wins[hero_id]
+        else:
+            games, wins = games.sum(axis=0), wins.sum(axis=0)
+
+        heroes = np.flatnonzero(games >= max(min_games, 1))
+        order = heroes[np.lexsort((heroes, -games[heroes]))]
+        return [
+            HeroPairStats(
+                hero_id=int(other),
+                games=int(games[other]),
+                wins=int(wins[other]),
+                losses=int(games[other] - wins[other]),
+                win_rate=float(wins[other]) / float(games[other]) * 100,
+            )
+            for other in order
+        ]
+
+
+def _select(user_id: int):
+    return (
+        select(
+            Match.id, Match.hero_id, Match.player_slot, Match.radiant_win,
+            MatchPlayer.hero_id, MatchPlayer.player_slot, Match.last_fetch_attempt,
+        )
+        .join(MatchPlayer, MatchPlayer.match_id == Match.id)
+        .where(
+            Match.user_id == user_id,
+            Match.has_details == True,
+            MatchPlayer.player_slot != Match.player_slot,
+        )
+    )
+
+
+class HeroMatchupCache:
+    """Per-process LRU of HeroPairCounts, refreshed by data version"""
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._entries: "OrderedDict[int, HeroPairCounts]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> HeroPairCounts:
+        user = db.get(User, user_id)
+        version = (user.data_version or 0) if user else 0
+        generation = (user.data_generation or 0) if user else 0
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+        if entry is not None and entry.version == version and entry.generation == generation:
+            return entry
+
+        query = _select(user_id)
+        if entry is None or entry.generation != generation:
+            entry = HeroPairCounts(version, generation)
+        elif entry.watermark is None:
+            query = query.where(Match.last_fetch_attempt.isnot(None))
+        else:
+            query = query.where(Match.last_fetch_attempt >= entry.watermark - WATERMARK_MARGIN)
+
+        # Count into a copy so concurrent readers never see a half-updated entry
+        updated = entry.copy(version)
+        result = db.execute(query.execution_options(yield_per=BUILD_CHUNK_SIZE))
+        for chunk in result.partitions():
+            updated.add_rows(chunk, entry.match_ids)
+        logger.debug(f"Hero matchups for user {user_id} at version {version}: {len(updated.match_ids)} matches")
+
+        with self._lock:
+            self._entries[user_id] = updated
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return updated
+
+
+_cache: Optional[HeroMatchupCache] = None
+
+
+def get_matchup_cache() -> HeroMatchupCache:
+    global _cache
+    if _cache is None:
+        from ..config import settings
+        _cache = HeroMatchupCache(settings.STATS_MATCHUP_CACHE_USERS)
+    return _cache
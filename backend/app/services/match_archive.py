@@ -0,0 +1,413 @@
+"""
+On-disk archive of provider match payloads, outside Postgres.
+
+Payloads are zstd-compressed and appended to segment files
+(segment-000001.dat, segment-000002.dat, ...). Each record is a header
+followed by the compressed JSON:
+
+    magic (4) | match_id (8) | compressed length (4) | blake2b-128 of the JSON (16)
+
+The digest makes records content-addressed: storing a payload identical to
+the archived one for that match is a no-op, and integrity checks can verify
+every record end to end.
+
+Lookups go through index.bin, a sorted array of (match_id, segment, offset)
+entries that is memory-mapped and binary searched, plus journal.bin, the
+unsorted entries appended since the index was last rebuilt. The journal is
+merged into the index once it reaches JOURNAL_MERGE_ENTRIES entries, and on
+compaction. A later entry for a match replaces an earlier one.
+
+Writers (Celery workers, CLI commands) serialize on an flock of
+archive.lock. Readers take no lock: index and journal are swapped in with
+atomic renames, and a lookup that races with compaction is retried.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import zstandard
+
+from ..config import settings
+from .exceptions import ArchiveCorruptError
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"DMA1"
+_HEADER = struct.Struct("<4sQI16s")
+
+INDEX_DTYPE = np.dtype([("match_id", "<u8"), ("segment", "<u4"), ("offset", "<u8")])
+JOURNAL_MERGE_ENTRIES = 50_000
+
+
+def _digest(raw: bytes) -> bytes:
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def _check_body(match_id: int, digest: bytes, data: bytes, decompressor=None) -> bytes:
+    """Decompress a record body and check it against the header digest"""
+    try:
+        raw = (decompressor or zstandard.ZstdDecompressor()).decompress(data)
+    except zstandard.ZstdError as e:
+        raise ArchiveCorruptError(f"Undecompressable record for match {match_id}: {e}") from e
+    if _digest(raw) != digest:
+        raise ArchiveCorruptError(f"Digest mismatch for match {match_id}")
+    return raw
+
+
+def _parse_body(match_id: int, raw: bytes) -> Dict:
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise ArchiveCorruptError(f"Invalid JSON in record for match {match_id}: {e}") from e
+
+
+class MatchArchive:
+    """Append-only segment files of compressed payloads with a sorted, memory-mapped index"""
+
+    def __init__(self, root: Path, segment_max_bytes: int, level: int = 3):
+        self.root = Path(root)
+        self.segment_max_bytes = segment_max_bytes
+        self.level = level
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        # Reader state, refreshed when another process changes the files
+        self._lock = threading.Lock()
+        self._index = np.empty(0, dtype=INDEX_DTYPE)
+        self._index_key = None
+        self._journal: Dict[int, Tuple[int, int]] = {}
+        self._journal_inode = None
+        self._journal_size = 0
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / "index.bin"
+
+    @property
+    def journal_path(self) -> Path:
+        return self.root / "journal.bin"
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.root / f"segment-{segment:06d}.dat"
+
+    def _segments(self) -> List[int]:
+        return sorted(int(path.stem.split("-")[1]) for path in self.root.glob("segment-*.dat"))
+
+    @contextmanager
+    def _write_lock(self):
+        with open(self.root / "archive.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # Lookup
+
+    def _refresh(self):
+        """Pick up index rebuilds and journal appends (call with self._lock held)"""
+        # The journal is opened before the index is checked: a rebuild replaces
+        # the index first, so an old journal never pairs with a newer index's
+        # missing entries
+        try:
+            journal = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            journal = None
+
+        try:
+            stat = os.stat(self.index_path)
+            index_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            index_key = None
+        if index_key != self._index_key:
+            if index_key and index_key[2] >= INDEX_DTYPE.itemsize:
+                self._index = np.memmap(self.index_path, dtype=INDEX_DTYPE, mode="r")
+            else:
+                self._index = np.empty(0, dtype=INDEX_DTYPE)
+            self._index_key = index_key
+
+        if journal is None:
+            self._journal, self._journal_inode, self._journal_size = {}, None, 0
+            return
+        with journal:
+            stat = os.fstat(journal.fileno())
+            if stat.st_ino != self._journal_inode or stat.st_size < self._journal_size:
+                self._journal, self._journal_inode, self._journal_size = {}, stat.st_ino, 0
+            if stat.st_size > self._journal_size:
+                journal.seek(self._journal_size)
+                data = journal.read(stat.st_size - self._journal_size)
+                # Ignore a partially written trailing entry
+                data = data[:len(data) - len(data) % INDEX_DTYPE.itemsize]
+                for entry in np.frombuffer(data, dtype=INDEX_DTYPE):
+                    self._journal[int(entry["match_id"])] = (int(entry["segment"]), int(entry["offset"]))
+                self._journal_size += len(data)
+
+    def _lookup(self, match_id: int) -> Optional[Tuple[int, int]]:
+        location = self._journal.get(match_id)
+        if location is not None:
+            return location
+        ids = self._index["match_id"]
+        i = int(np.searchsorted(ids, np.uint64(match_id)))
+        if i < len(ids) and int(ids[i]) == match_id:
+            return int(self._index["segment"][i]), int(self._index["offset"][i])
+        return None
+
+    def _locate(self, match_id: int) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            self._refresh()
+            return self._lookup(match_id)
+
+    def _read_record(self, segment: int, offset: int) -> Tuple[int, bytes, bytes]:
+        """(match_id, digest, compressed data) of the record at a location"""
+        with open(self._segment_path(segment), "rb") as f:
+            header = os.pread(f.fileno(), _HEADER.size, offset)
+            if len(header) < _HEADER.size:
+                raise ArchiveCorruptError(f"Truncated header in segment {segment} at {offset}")
+            magic, match_id, length, digest = _HEADER.unpack(header)
+            if magic != _MAGIC:
+                raise ArchiveCorruptError(f"Bad record magic in segment {segment} at {offset}")
+            data = os.pread(f.fileno(), length, offset + _HEADER.size)
+        if len(data) < length:
+            raise ArchiveCorruptError(f"Truncated record for match {match_id} in segment {segment}")
+        return match_id, digest, data
+
+    def get(self, match_id: int) -> Optional[Dict]:
+        """A match's archived payload, or None"""
+        for attempt in range(2):
+            location = self._locate(match_id)
+            if location is None:
+                return None
+            try:
+                record_match_id, digest, data = self._read_record(*location)
+                break
+            except FileNotFoundError:
+                # Segment removed by a compaction since the lookup; the fresh index points elsewhere
+                if attempt:
+                    raise
+        if record_match_id != match_id:
+            raise ArchiveCorruptError(f"Index entry for match {match_id} points at match {record_match_id}")
+
+        return _parse_body(match_id, _check_body(match_id, digest, data))
+
+    def __contains__(self, match_id: int) -> bool:
+        return self._locate(match_id) is not None
+
+    # Writes
+
+    def _append(self, record: bytes) -> Tuple[int, int]:
+        """Append a record to the active segment (write lock held)"""
+        segments = self._segments()
+        segment = segments[-1] if segments else 1
+        path = self._segment_path(segment)
+        offset = path.stat().st_size if path.exists() else 0
+        if offset and offset + len(record) > self.segment_max_bytes:
+            segment, offset = segment + 1, 0
+            path = self._segment_path(segment)
+        with open(path, "ab") as f:
+            f.write(record)
+        return segment, offset
+
+    def _append_journal(self, entries: np.ndarray) -> int:
+        """Append index entries to the journal, returning its length in entries"""
+        with open(self.journal_path, "ab") as f:
+            f.write(entries.tobytes())
+            return f.tell() // INDEX_DTYPE.itemsize
+
+    def put(self, match_id: int, payload: Dict) -> bool:
+        """
+        Archive a match's payload.
+
+        Returns:
+            False if the archived payload for the match is already identical
+        """
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        digest = _digest(raw)
+
+        with self._write_lock():
+            location = self._locate(match_id)
+            if location is not None:
+                try:
+                    # Only an intact stored copy counts as identical, a damaged one is replaced
+                    stored_id, stored_digest, data = self._read_record(*location)
+                    if stored_id == match_id and stored_digest == digest:
+                        _check_body(match_id, stored_digest, data)
+                        return False
+                except ArchiveCorruptError:
+                    logger.warning(f"Archived payload of match {match_id} is corrupt, writing it again")
+
+            data = zstandard.ZstdCompressor(level=self.level).compress(raw)
+            segment, offset = self._append(_HEADER.pack(_MAGIC, match_id, len(data), digest) + data)
+            journal_entries = self._append_journal(np.array([(match_id, segment, offset)], dtype=INDEX_DTYPE))
+            if journal_entries >= JOURNAL_MERGE_ENTRIES:
+                self._write_index(self._live_entries())
+        return True
+
+    def _live_entries(self) -> np.ndarray:
+        """Index and journal merged, sorted by match ID, latest entry per match"""
+        with self._lock:
+            self._refresh()
+            index = np.array(self._index)
+        journal = np.fromfile(self.journal_path, dtype=INDEX_DTYPE) if self.journal_path.exists() else index[:0]
+
+        # Stable sort keeps journal entries after index entries, in append order
+        combined = np.concatenate([index, journal])
+        combined = combined[np.argsort(combined["match_id"], kind="stable")]
+        ids = combined["match_id"]
+        last = np.append(ids[1:] != ids[:-1], True) if len(ids) else np.empty(0, dtype=bool)
+        return combined[last]
+
+    def _write_index(self, entries: np.ndarray):
+        """Atomically replace the index and empty the journal (write lock held)"""
+        for path, data in ((self.index_path, entries), (self.journal_path, entries[:0])):
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+
+    def rebuild_index(self) -> int:
+        """Merge the journal into the sorted index, returning the number of archived matches"""
+        with self._write_lock():
+            entries = self._live_entries()
+            self._write_index(entries)
+        return len(entries)
+
+    # Bulk operations
+
+    def scan(self) -> Iterator[Tuple[int, Dict]]:
+        """
+        Yield (match_id, payload) for every archived match.
+
+        Records are read in storage order, so each segment is read
+        sequentially from start to end.
+        """
+        entries = self._live_entries()
+        entries = entries[np.lexsort((entries["offset"], entries["segment"]))]
+        decompressor = zstandard.ZstdDecompressor()
+
+        for segment in np.unique(entries["segment"]):
+            with open(self._segment_path(int(segment)), "rb") as f:
+                for entry in entries[entries["segment"] == segment]:
+                    f.seek(int(entry["offset"]))
+                    magic, match_id, length, digest = _HEADER.unpack(f.read(_HEADER.size))
+                    if magic != _MAGIC or match_id != int(entry["match_id"]):
+                        raise ArchiveCorruptError(f"Bad record for match {int(entry['match_id'])} in segment {segment}")
+                    raw = _check_body(match_id, digest, f.read(length), decompressor)
+                    yield match_id, _parse_body(match_id, raw)
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite live records into new segments and delete the old ones.
+
+        Superseded and orphaned records (e.g. from a crash between the
+        segment and journal writes) are dropped. Records are copied without
+        recompressing.
+
+        Returns:
+            Live records kept and bytes reclaimed
+        """
+        with self._write_lock():
+            old_segments = self._segments()
+            old_bytes = sum(self._segment_path(s).stat().st_size for s in old_segments)
+            entries = self._live_entries()
+            order = np.lexsort((entries["offset"], entries["segment"]))
+
+            segment = (old_segments[-1] if old_segments else 0) + 1
+            new_bytes = 0
+            out = open(self._segment_path(segment), "wb")
+            try:
+                for i in order:
+                    match_id, digest, data = self._read_record(int(entries["segment"][i]), int(entries["offset"][i]))
+                    record = _HEADER.pack(_MAGIC, match_id, len(data), digest) + data
+                    if out.tell() and out.tell() + len(record) > self.segment_max_bytes:
+                        out.close()
+                        segment += 1
+                        out = open(self._segment_path(segment), "wb")
+                    entries["segment"][i] = segment
+                    entries["offset"][i] = out.tell()
+                    out.write(record)
+                    new_bytes += len(record)
+                out.flush()
+                os.fsync(out.fileno())
+            finally:
+                out.close()
+
+            self._write_index(entries)
+            for old in old_segments:
+                self._segment_path(old).unlink()
+
+        logger.info(f"Compacted match archive: {len(entries)} records, {old_bytes - new_bytes} bytes reclaimed")
+        return {"records": len(entries), "reclaimed_bytes": old_bytes - new_bytes}
+
+    def verify(self) -> Dict[str, int]:
+        """
+        Check every record in every segment (header, length, decompression,
+        digest) and that every index entry points at its match's record.
+
+        Returns:
+            Counts of records, live matches, corrupt records, trailing
+            garbage bytes and dangling index entries
+        """
+        decompressor = zstandard.ZstdDecompressor()
+        counts = {"records": 0, "live": 0, "corrupt": 0, "garbage_bytes": 0, "dangling": 0}
+        valid = set()
+
+        for segment in self._segments():
+            path = self._segment_path(segment)
+            size = path.stat().st_size
+            with open(path, "rb") as f:
+                offset = 0
+                while offset < size:
+                    header = f.read(_HEADER.size)
+                    if len(header) < _HEADER.size:
+                        counts["garbage_bytes"] += size - offset
+                        break
+                    magic, match_id, length, digest = _HEADER.unpack(header)
+                    if magic != _MAGIC or offset + _HEADER.size + length > size:
+                        # Record boundaries are lost from here on
+                        logger.error(f"Unreadable data in segment {segment} from offset {offset}")
+                        counts["garbage_bytes"] += size - offset
+                        break
+                    data = f.read(length)
+                    counts["records"] += 1
+                    try:
+                        intact = _digest(decompressor.decompress(data)) == digest
+                    except zstandard.ZstdError:
+                        intact = False
+                    if intact:
+                        valid.add((segment, offset, match_id))
+                    else:
+                        counts["corrupt"] += 1
+                        logger.error(f"Corrupt record for match {match_id} in segment {segment} at {offset}")
+                    offset += _HEADER.size + length
+
+        entries = self._live_entries()
+        counts["live"] = len(entries)
+        for match_id, segment, offset in entries.tolist():
+            if (segment, offset, match_id) not in valid:
+                counts["dangling"] += 1
+                logger.error(f"Index entry for match {match_id} has no intact record")
+        return counts
+
+
+_archive: Optional[MatchArchive] = None
+
+
+def get_match_archive() -> Optional[MatchArchive]:
+    """The configured archive, or None when MATCH_ARCHIVE_DIR is not set"""
+    global _archive
+    if _archive is None and settings.MATCH_ARCHIVE_DIR:
+        _archive = MatchArchive(
+            Path(settings.MATCH_ARCHIVE_DIR),
+            segment_max_bytes=settings.MATCH_ARCHIVE_SEGMENT_MB * 1024 * 1024,
+            level=settings.MATCH_PAYLOAD_ZSTD_LEVEL,
+        )
+    return _archive
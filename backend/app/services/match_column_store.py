@@ -0,0 +1,336 @@
+"""
+In-memory column store of users' detailed matches for StatsService.
+
+Each active user's matches are held as NumPy arrays, one per column, so any
+filter is a boolean mask and per-hero grouping is a `bincount`. Stores are
+built on first use, updated incrementally when a sync adds matches (detected
+through `User.data_version`), rebuilt when existing matches were rewritten
+(`User.data_generation`), and evicted least recently used once the total
+size exceeds STATS_COLUMN_STORE_MAX_MB.
+
+Used when STATS_ENGINE=columnar.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Match, User
+from ..schemas.stats import HeroStats, PlayerStats, TimeStats
+
+logger = logging.getLogger(__name__)
+
+# Rows read per round trip while building a store
+BUILD_CHUNK_SIZE = 50_000
+
+# Matches fetched by a sync run may commit slightly out of timestamp order
+WATERMARK_MARGIN = timedelta(minutes=10)
+
+# (name, source column, dtype); NULLs load as 0 (as the SQL engine's `or 0`)
+_COLUMNS = [
+    ("match_id", Match.id, np.int64),
+    ("hero_id", Match.hero_id, np.int16),
+    ("game_mode", Match.game_mode, np.int16),
+    ("lobby_type", Match.lobby_type, np.int16),
+    ("kills", Match.kills, np.int32),
+    ("deaths", Match.deaths, np.int32),
+    ("assists", Match.assists, np.int32),
+    ("gold_per_min", Match.gold_per_min, np.int32),
+    ("xp_per_min", Match.xp_per_min, np.int32),
+    ("hero_damage", Match.hero_damage, np.int64),
+    ("tower_damage", Match.tower_damage, np.int64),
+    ("hero_healing", Match.hero_healing, np.int64),
+]
+
+
+def _epoch(value: Optional[datetime]) -> int:
+    """Unix seconds; naive datetimes are UTC like the rest of the app"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class UserMatchColumns:
+    """Column arrays for one user's detailed matches"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], version: int, watermark: Optional[datetime], generation: int = 0):
+        self.arrays = arrays
+        self.version = version
+        self.generation = generation
+        # Latest last_fetch_attempt loaded, the starting point of incremental updates
+        self.watermark = watermark
+
+    def __len__(self) -> int:
+        return len(self.arrays["match_id"])
+
+    def __getattr__(self, name) -> np.ndarray:
+        try:
+            return self.__dict__["arrays"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays.values())
+
+    @classmethod
+    def from_rows(cls, rows: List, version: int, generation: int = 0) -> "UserMatchColumns":
+        """Build arrays from (columns..., start_time, radiant_team, radiant_win, last_fetch_attempt) rows"""
+        count = len(rows)
+        arrays = {}
+        for index, (name, _, dtype) in enumerate(_COLUMNS):
+            arrays[name] = np.fromiter((r[index] or 0 for r in rows), dtype=dtype, count=count)
+
+        offset = len(_COLUMNS)
+        # -1 marks a missing start time
+        arrays["start_time"] = np.fromiter(
+            (_epoch(r[offset]) if r[offset] else -1 for r in rows), dtype=np.int64, count=count
+        )
+        arrays["won"] = np.fromiter(
+            (r[offset + 1] is not None and r[offset + 1] == r[offset + 2] for r in rows), dtype=np.bool_, count=count
+        )
+        arrays["kda_valid"] = np.fromiter(
+            (r[4] is not None and r[5] is not None and r[6] is not None for r in rows), dtype=np.bool_, count=count
+        )
+        attempts = [r[offset + 3] for r in rows if r[offset + 3] is not None]
+        return cls(arrays, version, max(attempts) if attempts else None, generation)
+
+    def merge(self, other: "UserMatchColumns") -> "UserMatchColumns":
+        """Append matches from `other` that are not loaded yet"""
+        new = ~np.isin(other.match_id, self.match_id)
+        arrays = {name: np.concatenate([a, other.arrays[name][new]]) for name, a in self.arrays.items()}
+        watermarks = [w for w in (self.watermark, other.watermark) if w is not None]
+        return UserMatchColumns(arrays, other.version, max(watermarks) if watermarks else None, self.generation)
+
+    @property
+    def kda(self) -> np.ndarray:
+        deaths = np.maximum(self.deaths, 1)
+        return np.where(self.kda_valid, (self.kills + self.assists) / deaths, 0.0)
+
+    def mask(
+        self,
+        hero_id: Optional[int] = None,
+        game_mode: Optional[int] = None,
+        lobby_type: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> np.ndarray:
+        mask = np.ones(len(self), dtype=np.bool_)
+        if hero_id:
+            mask &= self.hero_id == hero_id
+        if game_mode:
+            mask &= self.game_mode == game_mode
+        if lobby_type is not None:
+            mask &= self.lobby_type == lobby_type
+        if start_date:
+            mask &= self.start_time >= _epoch(start_date)
+        if end_date:
+            mask &= (self.start_time >= 0) & (self.start_time <= _epoch(end_date))
+        return mask
+
+
+def _select(user_id: int):
+    return (
+        select(*(column for _, column, _ in _COLUMNS), Match.start_time, Match.radiant_team,
+               Match.radiant_win, Match.last_fetch_attempt)
+        .where(Match.user_id == user_id, Match.has_details == True)
+    )
+
+
+def _load(db: Session, query, version: int, generation: int = 0) -> UserMatchColumns:
+    rows = []
+    result = db.execute(query.execution_options(yield_per=BUILD_CHUNK_SIZE))
+    for chunk in result.partitions():
+        rows.extend(chunk)
+    return UserMatchColumns.from_rows(rows, version, generation)
+
+
+class MatchColumnStore:
+    """Process-wide LRU of UserMatchColumns bounded by a memory budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, UserMatchColumns]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> UserMatchColumns:
+        """Columns for `user_id`, built or brought up to date as needed"""
+        # get_current_user has already loaded the user, so this is normally an identity map hit
+        user = db.get(User, user_id)
+        version = (user.data_version or 0) if user else 0
+        generation = (user.data_generation or 0) if user else 0
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+
+        if entry is None or entry.generation != generation:
+            # Rewritten matches can't be merged in, they are already loaded
+            entry = _load(db, _select(user_id), version, generation)
+            logger.info(f"Built column store for user {user_id}: {len(entry)} matches, {entry.nbytes / 1e6:.1f}MB")
+        elif entry.version != version:
+            query = _select(user_id)
+            if entry.watermark is None:
+                query = query.where(Match.last_fetch_attempt.isnot(None))
+            else:
+                query = query.where(Match.last_fetch_attempt >= entry.watermark - WATERMARK_MARGIN)
+            previous = len(entry)
+            entry = entry.merge(_load(db, query, version))
+            logger.debug(f"Updated column store for user {user_id}: +{len(entry) - previous} matches")
+        else:
+            return entry
+
+        self._put(user_id, entry)
+        return entry
+
+    def invalidate(self, user_id: int):
+        """Drop a user's columns, e.g. after matches were deleted or rewritten"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def _put(self, user_id: int, entry: UserMatchColumns):
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            total = sum(e.nbytes for e in self._entries.values())
+            # Never evict the entry being returned
+            while total > self.max_bytes and len(self._entries) > 1:
+                evicted_id, evicted = self._entries.popitem(last=False)
+                total -= evicted.nbytes
+                logger.debug(f"Evicted column store for user {evicted_id}")
+
+
+_store: Optional[MatchColumnStore] = None
+
+
+def get_column_store() -> MatchColumnStore:
+    global _store
+    if _store is None:
+        from ..config import settings
+        _store = MatchColumnStore(settings.STATS_COLUMN_STORE_MAX_MB * 1024 * 1024)
+    return _store
+
+
+def _average(values: np.ndarray, count: int) -> float:
+    return float(values.sum()) / count
+
+
+def _optional_average(values: np.ndarray, count: int) -> Optional[float]:
+    """Average, or None when every value is 0/NULL (as the SQL engine does)"""
+    return _average(values, count) if values.any() else None
+
+
+def player_stats(columns: UserMatchColumns, mask: np.ndarray, most_played_heroes: List[HeroStats]) -> Optional[PlayerStats]:
+    """PlayerStats for the masked matches, or None when nothing matches"""
+    total = int(mask.sum())
+    if not total:
+        return None
+
+    wins = int(columns.won[mask].sum())
+    kda_valid = columns.kda_valid[mask]
+    valid = int(kda_valid.sum())
+    start_times = columns.start_time[mask]
+    start_times = start_times[start_times >= 0]
+
+    return PlayerStats(
+        total_matches=total,
+        total_wins=wins,
+        total_losses=total - wins,
+        win_rate=wins / total * 100,
+        avg_kills=_average(columns.kills[mask], total),
+        avg_deaths=_average(columns.deaths[mask], total),
+        avg_assists=_average(columns.assists[mask], total),
+        avg_kda=float(columns.kda[mask].sum()) / valid if valid else 0.0,
+        avg_gpm=_optional_average(columns.gold_per_min[mask], total),
+        avg_xpm=_optional_average(columns.xp_per_min[mask], total),
+        most_played_heroes=most_played_heroes,
+        recent_matches=total,
+        last_match_time=(
+            datetime.fromtimestamp(int(start_times.max()), tz=timezone.utc).isoformat()
+            if len(start_times) else None
+        ),
+    )
+
+
+def hero_stats(columns: UserMatchColumns, mask: np.ndarray, limit: Optional[int] = None) -> List[HeroStats]:
+    """Per-hero stats for the masked matches, most played first"""
+    heroes = columns.hero_id[mask].astype(np.intp)
+    if not len(heroes):
+        return []
+    size = int(heroes.max()) + 1
+
+    def by_hero(values=None) -> np.ndarray:
+        return np.bincount(heroes, weights=values, minlength=size)
+
+    games = by_hero()
+    wins = by_hero(columns.won[mask])
+    kills = by_hero(columns.kills[mask])
+    deaths = by_hero(columns.deaths[mask])
+    assists = by_hero(columns.assists[mask])
+    kda_sum = by_hero(columns.kda[mask])
+    kda_count = by_hero(columns.kda_valid[mask])
+    gpm = by_hero(columns.gold_per_min[mask])
+    xpm = by_hero(columns.xp_per_min[mask])
+    hero_damage = by_hero(columns.hero_damage[mask])
+    tower_damage = by_hero(columns.tower_damage[mask])
+    hero_healing = by_hero(columns.hero_healing[mask])
+
+    played = np.flatnonzero(games)
+    # Most played first, hero_id breaks ties
+    order = played[np.lexsort((played, -games[played]))]
+    if limit:
+        order = order[:limit]
+
+    stats = []
+    for hero_id in order:
+        total = int(games[hero_id])
+        won = int(wins[hero_id])
+        stats.append(HeroStats(
+            hero_id=int(hero_id),
+            games_played=total,
+            wins=won,
+            losses=total - won,
+            win_rate=won / total * 100,
+            avg_kills=kills[hero_id] / total,
+            avg_deaths=deaths[hero_id] / total,
+            avg_assists=assists[hero_id] / total,
+            avg_kda=kda_sum[hero_id] / kda_count[hero_id] if kda_count[hero_id] else 0.0,
+            avg_gpm=gpm[hero_id] / total if gpm[hero_id] else None,
+            avg_xpm=xpm[hero_id] / total if xpm[hero_id] else None,
+            total_hero_damage=int(hero_damage[hero_id]),
+            total_tower_damage=int(tower_damage[hero_id]),
+            total_hero_healing=int(hero_healing[hero_id]),
+        ))
+    return stats
+
+
+def time_stats(columns: UserMatchColumns, period: str, start_date: datetime, now: datetime) -> Optional[TimeStats]:
+    """TimeStats for matches since `start_date`, or None when there are none"""
+    mask = columns.start_time >= _epoch(start_date)
+    total = int(mask.sum())
+    if not total:
+        return None
+
+    wins = int(columns.won[mask].sum())
+    valid = int(columns.kda_valid[mask].sum())
+    return TimeStats(
+        period=period,
+        start_date=start_date.isoformat(),
+        end_date=now.isoformat(),
+        total_games=total,
+        wins=wins,
+        losses=total - wins,
+        win_rate=wins / total * 100,
+        avg_kills=_average(columns.kills[mask], total),
+        avg_deaths=_average(columns.deaths[mask], total),
+        avg_assists=_average(columns.assists[mask], total),
+        avg_kda=float(columns.kda[mask].sum()) / valid if valid else 0.0,
+        avg_gpm=_optional_average(columns.gold_per_min[mask], total),
+        avg_xpm=_optional_average(columns.xp_per_min[mask], total),
+    )
@@ -0,0 +1,97 @@
+"""
+Typed decoding of provider match payloads.
+
+Valve GetMatchDetails and OpenDota /matches/{id} share one schema. msgspec
+decodes straight from the response bytes into the structs below and skips
+every undeclared field without building it, which drops OpenDota's parsed
+replay data (per-minute series, logs, teamfights, chat, ...). The result is
+turned back into a plain dict with only the declared fields. That dict is
+what normalize_match_data, the shared match store and payload storage
+consume, so the stored payload is pruned too.
+
+Besides the columns we persist, a few cheap per-player scalars are kept so
+renormalize can backfill them into new columns without re-fetching.
+"""
+from typing import Any, Dict, List, Optional
+
+import msgspec
+
+
+class DecodedPlayer(msgspec.Struct, omit_defaults=True):
+    account_id: Optional[int] = None
+    player_slot: Optional[int] = None
+    hero_id: Optional[int] = None
+    kills: Optional[int] = None
+    deaths: Optional[int] = None
+    assists: Optional[int] = None
+    last_hits: Optional[int] = None
+    denies: Optional[int] = None
+    gold_per_min: Optional[int] = None
+    xp_per_min: Optional[int] = None
+    hero_damage: Optional[int] = None
+    tower_damage: Optional[int] = None
+    hero_healing: Optional[int] = None
+    level: Optional[int] = None
+    net_worth: Optional[int] = None
+    item_0: Optional[int] = None
+    item_1: Optional[int] = None
+    item_2: Optional[int] = None
+    item_3: Optional[int] = None
+    item_4: Optional[int] = None
+    item_5: Optional[int] = None
+    backpack_0: Optional[int] = None
+    backpack_1: Optional[int] = None
+    backpack_2: Optional[int] = None
+    item_neutral: Optional[int] = None
+    ability_upgrades: Optional[List[Any]] = None
+    rank_tier: Optional[int] = None
+
+    # Not persisted yet, kept for backfills
+    lane_role: Optional[int] = None
+    party_id: Optional[int] = None
+    obs_placed: Optional[int] = None
+    sen_placed: Optional[int] = None
+    camps_stacked: Optional[int] = None
+    leaver_status: Optional[int] = None
+
+
+class DecodedMatch(msgspec.Struct, omit_defaults=True):
+    match_id: Optional[int] = None
+    start_time: Optional[int] = None
+    duration: Optional[int] = None
+    game_mode: Optional[int] = None
+    lobby_type: Optional[int] = None
+    radiant_win: Optional[bool] = None
+    players: List[DecodedPlayer] = []
+
+    # Not persisted yet, kept for backfills
+    radiant_score: Optional[int] = None
+    dire_score: Optional[int] = None
+    first_blood_time: Optional[int] = None
+    cluster: Optional[int] = None
+    patch: Optional[int] = None
+    region: Optional[int] = None
+
+    # Valve answers unknown match IDs with {"result": {"error": ...}}
+    error: Optional[str] = None
+
+
+class _ValveResponse(msgspec.Struct):
+    result: Optional[DecodedMatch] = None
+
+
+# Decoders are reusable and thread-safe. strict=False accepts integral floats
+# and numeric strings where the schema says int
+_match_decoder = msgspec.json.Decoder(DecodedMatch, strict=False)
+_valve_decoder = msgspec.json.Decoder(_ValveResponse, strict=False)
+
+
+def decode_match(content: bytes) -> Dict:
+    """Decode an OpenDota match response into a pruned payload dict"""
+    return msgspec.to_builtins(_match_decoder.decode(content))
+
+
+def decode_valve_match(content: bytes) -> Optional[Dict]:
+    """Decode a Valve GetMatchDetails response (the match is under "result")"""
+    result = _valve_decoder.decode(content).result
+    return msgspec.to_builtins(result) if result is not None else None
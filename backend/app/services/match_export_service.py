@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Match, MatchPlayer
+
+# Every per-user match column except user_id (the provider payload lives in shared_matches)
+MATCH_EXPORT_COLUMNS = [c for c in Match.__table__.columns if c.name != "user_id"]
+PLAYER_EXPORT_COLUMNS = [c for c in MatchPlayer.__table__.columns if c.name not in ("id", "match_id")]
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+class MatchExportService:
+    """Streams a user's full match history with constant memory"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def iter_matches(
+        self,
+        user_id: int,
+        include_players: bool = False,
+        include_stubs: bool = False,
+        hero_id: Optional[int] = None,
+        game_mode: Optional[int] = None,
+        lobby_type: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Iterator[Dict]:
+        """
+        Yield matches newest first as plain dicts.
+
+        Rows are read through a server-side cursor in chunks of
+        EXPORT_CHUNK_SIZE, as column tuples rather than ORM objects so nothing
+        accumulates in the session. Players are loaded with one query per chunk.
+        """
+        query = select(*MATCH_EXPORT_COLUMNS).where(Match.user_id == user_id)
+
+        if not include_stubs:
+            query = query.where(Match.has_details == True)
+        if hero_id:
+            query = query.where(Match.hero_id == hero_id)
+        if game_mode:
+            query = query.where(Match.game_mode == game_mode)
+        if lobby_type is not None:
+            query = query.where(Match.lobby_type == lobby_type)
+        if start_date:
+            query = query.where(Match.start_time >= start_date)
+        if end_date:
+            query = query.where(Match.start_time <= end_date)
+
+        query = query.order_by(Match.start_time.desc(), Match.id.desc())
+        result = self.db.execute(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+
+        for chunk in result.mappings().partitions():
+            matches = [dict(row) for row in chunk]
+            if include_players:
+                players = self._players_by_match([m["id"] for m in matches])
+                for match in matches:
+                    match["players"] = players.get(match["id"], [])
+            yield from matches
+
+    def _players_by_match(self, match_ids: List[int]) -> Dict[int, List[Dict]]:
+        rows = self.db.execute(
+            select(MatchPlayer.match_id, *PLAYER_EXPORT_COLUMNS)
+            .where(MatchPlayer.match_id.in_(match_ids))
+            .order_by(MatchPlayer.match_id, MatchPlayer.player_slot)
+        ).mappings()
+
+        players: Dict[int, List[Dict]] = {}
+        for row in rows:
+            player = dict(row)
+            players.setdefault(player.pop("match_id"), []).append(player)
+        return players
+
+    @staticmethod
+    def to_ndjson(matches: Iterator[Dict]) -> Iterator[str]:
+        """One JSON object per line"""
+        for match in matches:
+            yield json.dumps(match, default=_json_default, separators=(",", ":")) + "\n"
+
+    @staticmethod
+    def to_csv(matches: Iterator[Dict], include_players: bool = False) -> Iterator[str]:
+        """
+        CSV with a header row. JSON columns (ability_upgrades, and players when
+        included) are written as JSON strings.
+        """
+        columns = [c.name for c in MATCH_EXPORT_COLUMNS] + (["players"] if include_players else [])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+
+        for count, match in enumerate(matches, start=1):
+            writer.writerow([_csv_value(match.get(c)) for c in columns])
+            # Flush the buffer every few hundred rows instead of per row
+            if count % 200 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default, separators=(",", ":"))
+    return value
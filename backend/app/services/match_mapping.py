@@ -0,0 +1,75 @@
+"""
+Column mapping from normalized provider data to database rows.
+
+Shared by the sync pipeline and the renormalize job, so a column added here
+can be backfilled from stored payloads without re-fetching anything. Bump
+NORMALIZE_VERSION whenever the mapping changes; renormalize reprocesses
+every shared match stored under an older version.
+"""
+from typing import Dict
+
+from ..models.match import item_occurrences
+
+NORMALIZE_VERSION = 1
+
+# Per-player columns copied straight from the provider's player entry
+_PLAYER_COLUMNS = (
+    "kills", "deaths", "assists", "gold_per_min", "xp_per_min", "hero_damage",
+    "tower_damage", "hero_healing", "last_hits", "denies", "level", "net_worth",
+    "item_0", "item_1", "item_2", "item_3", "item_4", "item_5",
+)
+
+# Columns of the user's own Match row copied from their player entry
+_PARTICIPATION_COLUMNS = (
+    "last_hits", "denies", "gold_per_min", "xp_per_min", "hero_damage", "tower_damage",
+    "hero_healing", "level", "item_0", "item_1", "item_2", "item_3", "item_4", "item_5",
+    "backpack_0", "backpack_1", "backpack_2", "item_neutral", "ability_upgrades",
+    "net_worth", "rank_tier",
+)
+
+
+def shared_match_values(normalized: Dict) -> Dict:
+    """Match-level SharedMatch columns"""
+    return {
+        "start_time": normalized["start_time"],
+        "duration": normalized["duration"],
+        "game_mode": normalized["game_mode"],
+        "lobby_type": normalized["lobby_type"],
+        "radiant_win": normalized["radiant_win"],
+        "normalize_version": NORMALIZE_VERSION,
+    }
+
+
+def participation_values(normalized: Dict) -> Dict:
+    """Detail columns of the user's Match row (normalized for that user's account)"""
+    player_data = normalized["player_data"]
+    values = {
+        "start_time": normalized["start_time"],
+        "duration": normalized["duration"],
+        "game_mode": normalized["game_mode"],
+        "lobby_type": normalized["lobby_type"],
+        "radiant_win": normalized["radiant_win"],
+        "hero_id": player_data.get("hero_id"),
+        "player_slot": player_data.get("player_slot", 0),
+        "radiant_team": player_data.get("player_slot", 0) < 128,
+        "kills": player_data.get("kills", 0),
+        "deaths": player_data.get("deaths", 0),
+        "assists": player_data.get("assists", 0),
+        "item_ids": item_occurrences(player_data),
+    }
+    for column in _PARTICIPATION_COLUMNS:
+        values[column] = player_data.get(column)
+    return values
+
+
+def player_values(match_id: int, player: Dict) -> Dict:
+    """MatchPlayer columns for one entry of the payload's players"""
+    values = {
+        "match_id": match_id,
+        "account_id": player.get("account_id"),
+        "player_slot": player.get("player_slot", 0),
+        "hero_id": player.get("hero_id"),
+    }
+    for column in _PLAYER_COLUMNS:
+        values[column] = player.get(column)
+    return values
@@ -0,0 +1,130 @@
+"""
+Compressed storage of provider match payloads.
+
+Payloads are serialized as compact JSON and zstd-compressed into the
+match_payloads table, one row per shared match, or into the on-disk match
+archive when MATCH_ARCHIVE_DIR is set. Reads try the archive first and fall
+back to the table; a corrupt archive record is logged and treated as
+missing, so the match is fetched again and its record rewritten. Nothing
+loads payloads unless asked to through `load_payload` / `load_payloads`.
+"""
+import json
+import logging
+from typing import Dict, Iterable, Optional
+
+import zstandard
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import MatchPayload
+from .exceptions import ArchiveCorruptError
+from .match_archive import get_match_archive
+
+logger = logging.getLogger(__name__)
+
+
+def _compress(raw: bytes) -> bytes:
+    # Compressor contexts are not thread-safe, so each call gets its own
+    return zstandard.ZstdCompressor(level=settings.MATCH_PAYLOAD_ZSTD_LEVEL).compress(raw)
+
+
+def decompress_payload(data: bytes) -> Dict:
+    return json.loads(zstandard.ZstdDecompressor().decompress(data))
+
+
+def payload_values(match_id: int, payload: Dict) -> Dict:
+    """Column values of a MatchPayload row"""
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return {"match_id": match_id, "data": _compress(raw), "raw_size": len(raw)}
+
+
+def save_payload(db: Session, match_id: int, payload: Dict):
+    """Store a match's payload unless one is already stored (caller commits)"""
+    archive = get_match_archive()
+    if archive is not None:
+        archive.put(match_id, payload)
+        return
+    db.execute(
+        pg_insert(MatchPayload)
+        .values(**payload_values(match_id, payload))
+        .on_conflict_do_nothing(index_elements=["match_id"])
+    )
+
+
+def _archived_payload(archive, match_id: int) -> Optional[Dict]:
+    try:
+        return archive.get(match_id)
+    except ArchiveCorruptError as e:
+        logger.error(f"Ignoring corrupt archived payload of match {match_id}: {e}")
+        return None
+
+
+def load_payload(db: Session, match_id: int) -> Optional[Dict]:
+    """A match's provider payload, or None if none is stored"""
+    archive = get_match_archive()
+    if archive is not None:
+        payload = _archived_payload(archive, match_id)
+        if payload is not None:
+            return payload
+    data = db.query(MatchPayload.data).filter(MatchPayload.match_id == match_id).scalar()
+    return decompress_payload(data) if data is not None else None
+
+
+def load_payloads(db: Session, match_ids: Iterable[int]) -> Dict[int, Dict]:
+    """Payloads of several matches with at most one query, keyed by match ID"""
+    payloads = {}
+    missing = list(match_ids)
+    archive = get_match_archive()
+    if archive is not None:
+        for match_id in missing:
+            payload = _archived_payload(archive, match_id)
+            if payload is not None:
+                payloads[match_id] = payload
+        missing = [match_id for match_id in missing if match_id not in payloads]
+
+    if missing:
+        rows = db.query(MatchPayload.match_id, MatchPayload.data).filter(MatchPayload.match_id.in_(missing))
+        payloads.update((match_id, decompress_payload(data)) for match_id, data in rows)
+    return payloads
+
+
+def move_payloads_to_archive(db: Session, delete: bool = False, batch_size: int = 1000) -> int:
+    """
+    Copy payloads from the match_payloads table into the archive.
+
+    Args:
+        delete: Remove each batch from the table once it is archived
+
+    Returns:
+        Number of payloads moved
+    """
+    archive = get_match_archive()
+    if archive is None:
+        raise RuntimeError("MATCH_ARCHIVE_DIR is not set")
+
+    moved = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(MatchPayload.match_id, MatchPayload.data)
+            .filter(MatchPayload.match_id > last_id)
+            .order_by(MatchPayload.match_id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        for match_id, data in rows:
+            archive.put(match_id, decompress_payload(data))
+        last_id = rows[-1][0]
+        moved += len(rows)
+
+        if delete:
+            db.query(MatchPayload).filter(
+                MatchPayload.match_id.in_([match_id for match_id, _ in rows])
+            ).delete(synchronize_session=False)
+            db.commit()
+        logger.info(f"Archived {moved} payloads")
+
+    return moved
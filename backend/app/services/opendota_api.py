@@ -1,10 +1,13 @@
 import httpx
-import asyncio
 import logging
+import time
 from typing import List, Dict, Optional
 from ..config import settings
 from datetime import datetime
-from .exceptions import APIException
+from .exceptions import APIException, RateLimitException
+from .match_decoding import decode_match
+from .rate_limiter import get_rate_limiter
+from ..metrics import PROVIDER_REQUEST_SECONDS, RATE_LIMITER_WAIT_SECONDS
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -25,11 +28,53 @@ class OpenDotaAPI:
         self.rate_limit_delay = rate_limit_delay
         self.base_url = settings.OPENDOTA_API_BASE_URL
         self.api_key = api_key
+        # The published limit is the floor; quota headers and 429s slow us down from there
+        self.rate_limiter = get_rate_limiter(
+            "opendota",
+            initial_delay=rate_limit_delay,
+            min_delay=rate_limit_delay,
+            max_delay=settings.RATE_LIMIT_MAX_DELAY,
+        )
         logger.info(f"Initialized OpenDotaAPI with base_url={self.base_url}, rate_limit={rate_limit_delay}s, api_key={'set' if api_key else 'not set'}")
 
-    async def _rate_limit_delay(self):
-        """Apply rate limiting delay"""
-        await asyncio.sleep(self.rate_limit_delay)
+    async def _get(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        params: Dict,
+        db: Optional[Session],
+        endpoint: str,
+        metric_endpoint: str,
+        retries: int = 0
+    ) -> httpx.Response:
+        """
+        Rate-limited GET that tracks every call and feeds the response back into
+        the adaptive limiter (Retry-After and X-Rate-Limit-Remaining-* headers).
+
+        Args:
+            metric_endpoint: Endpoint template used as the metrics label
+            retries: How many times to wait out a 429 before giving up
+
+        Raises:
+            RateLimitException: When the provider is still answering 429
+        """
+        for attempt in range(retries + 1):
+            RATE_LIMITER_WAIT_SECONDS.labels(provider="opendota").observe(await self.rate_limiter.wait())
+            started = time.perf_counter()
+            response = await client.get(url, params=params)
+            PROVIDER_REQUEST_SECONDS.labels(
+                provider="opendota", endpoint=metric_endpoint, status=str(response.status_code)
+            ).observe(time.perf_counter() - started)
+            self._track_api_call(db, endpoint, response.status_code)
+            if response.status_code != 429:
+                if response.is_success:
+                    self.rate_limiter.on_success(response.headers)
+                return response
+
+            retry_after = self.rate_limiter.on_rate_limited(response.headers)
+            logger.warning(f"OpenDota API 429 on {endpoint} (attempt {attempt + 1}/{retries + 1})")
+
+        raise RateLimitException(f"Rate limited requesting {endpoint}", retry_after=retry_after)
 
     def _track_api_call(self, db: Optional[Session], endpoint: str, status_code: int):
         """Track API call for cost monitoring"""
@@ -48,16 +93,15 @@ class OpenDotaAPI:
                 cost=cost,
                 status_code=status_code
             )
+            # Written with the caller's next commit; committing (or rolling
+            # back) here would also flush the caller's pending work per call
             db.add(api_call)
-            db.commit()
 
             if self.api_key:
                 logger.debug(f"Tracked OpenDota API call: {endpoint} (cost: ${cost:.4f})")
         except Exception as e:
-            logger.error(f"Failed to track API call: {e}")
             # Don't fail the request if tracking fails
-            if db:
-                db.rollback()
+            logger.error(f"Failed to track API call: {e}")
 
     async def get_match_history(
         self,
@@ -88,17 +132,20 @@ class OpenDotaAPI:
         logger.info(f"Fetching match history for account_id={account_id}, limit={params['limit']}, offset={params.get('offset', 0)}")
         logger.debug(f"Request URL: {url}")
 
-        await self._rate_limit_delay()
-
         async with httpx.AsyncClient(timeout=30.0) as client:
             try:
-                response = await client.get(url, params=params)
+                response = await self._get(
+                    client, url, params, db, endpoint, "/players/{account_id}/matches",
+                    retries=settings.RATE_LIMIT_MAX_RETRIES
+                )
                 logger.debug(f"Response status: {response.status_code}")
-                self._track_api_call(db, endpoint, response.status_code)
                 response.raise_for_status()
                 matches = response.json()
                 logger.info(f"Successfully fetched {len(matches)} matches for account_id={account_id}")
                 return matches
+            except RateLimitException:
+                logger.error(f"Rate limit retries exhausted fetching match history for account_id={account_id}")
+                raise
             except httpx.HTTPStatusError as e:
                 self._track_api_call(db, endpoint, e.response.status_code)
                 logger.error(f"HTTP error {e.response.status_code} fetching match history for account_id={account_id}: {e.response.text}")
@@ -128,17 +175,18 @@ class OpenDotaAPI:
 
         logger.debug(f"Fetching match details for match_id={match_id}")
 
-        await self._rate_limit_delay()
-
         async with httpx.AsyncClient(timeout=30.0) as client:
             try:
-                response = await client.get(url, params=params)
+                response = await self._get(client, url, params, db, endpoint, "/matches/{match_id}")
                 logger.debug(f"Match {match_id} response status: {response.status_code}")
-                self._track_api_call(db, endpoint, response.status_code)
                 response.raise_for_status()
-                data = response.json()
+                # Parsed matches run to hundreds of KB; only the fields we keep are decoded
+                match = decode_match(response.content)
                 logger.debug(f"Successfully fetched match details for match_id={match_id}")
-                return data
+                return match
+            except RateLimitException:
+                logger.warning(f"Rate limited fetching match {match_id}")
+                raise
             except httpx.HTTPStatusError as e:
                 status_code = e.response.status_code
                 error_text = e.response.text
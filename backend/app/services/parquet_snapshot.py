@@ -0,0 +1,247 @@
+"""
+Parquet snapshots of user data for offline analysis and instance migration.
+
+A snapshot is a directory with one zstd-compressed Parquet file per table
+(users, shared_matches, match_payloads, matches, match_players,
+players_encountered), for selected users or the whole database. Export reads each table through a
+server-side cursor and writes one row group per batch; import streams the
+row groups back with COPY.
+
+pyarrow is imported lazily so the API and workers start without it.
+"""
+import io
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import ARRAY, JSON, BigInteger, Boolean, DateTime, Float, Integer, LargeBinary
+
+from ..database import Base, engine
+from .shared_matches import delete_user_matches
+
+logger = logging.getLogger(__name__)
+
+# In foreign key order, so import can load them one after another
+SNAPSHOT_TABLES = (
+    "users", "shared_matches", "match_payloads", "matches", "match_players", "players_encountered",
+)
+
+# Match-level tables other users in the target database may already have;
+# rows that are already there are skipped on import
+_SHARED_TABLES = {"shared_matches", "match_payloads", "match_players"}
+
+# Surrogate keys are reassigned by the target database
+_EXCLUDED_COLUMNS = {
+    "match_players": {"id"},
+    "players_encountered": {"id"},
+}
+
+# How each table is narrowed to a set of users
+_USER_FILTERS = {
+    "users": "t.id = ANY(%(user_ids)s)",
+    "shared_matches": "t.id IN (SELECT id FROM matches WHERE user_id = ANY(%(user_ids)s))",
+    "match_payloads": "t.match_id IN (SELECT id FROM matches WHERE user_id = ANY(%(user_ids)s))",
+    "matches": "t.user_id = ANY(%(user_ids)s)",
+    "match_players": "t.match_id IN (SELECT id FROM matches WHERE user_id = ANY(%(user_ids)s))",
+    "players_encountered": "t.user_id = ANY(%(user_ids)s)",
+}
+
+DEFAULT_ROW_GROUP_SIZE = 100_000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.csv
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Parquet snapshots require pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _columns(table: str) -> List:
+    excluded = _EXCLUDED_COLUMNS.get(table, set())
+    return [c for c in Base.metadata.tables[table].columns if c.name not in excluded]
+
+
+def _arrow_type(pa, column):
+    column_type = column.type
+    if isinstance(column_type, (JSON, ARRAY)):
+        # Kept as JSON / array literal text, exactly as stored
+        return pa.string()
+    if isinstance(column_type, LargeBinary):
+        # Compressed payloads are copied as-is
+        return pa.binary()
+    if isinstance(column_type, BigInteger):
+        return pa.int64()
+    if isinstance(column_type, Integer):
+        return pa.int32()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    return pa.string()
+
+
+def arrow_schema(table: str):
+    pa = _pyarrow()
+    return pa.schema([pa.field(c.name, _arrow_type(pa, c)) for c in _columns(table)])
+
+
+def _select_sql(table: str, user_ids: Optional[List[int]]) -> str:
+    expressions = [
+        f"t.{c.name}::text" if isinstance(c.type, (JSON, ARRAY)) else f"t.{c.name}"
+        for c in _columns(table)
+    ]
+    sql = f"SELECT {', '.join(expressions)} FROM {table} t"
+    if user_ids is not None:
+        sql += f" WHERE {_USER_FILTERS[table]}"
+    return sql
+
+
+def export_snapshot(
+    output_dir: Path,
+    user_ids: Optional[List[int]] = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = "zstd",
+) -> Dict[str, int]:
+    """
+    Write a snapshot of `user_ids` (or every user) to `output_dir`.
+
+    All tables are read in one repeatable-read transaction, so the files are
+    consistent with each other.
+
+    Returns:
+        Rows written per table
+    """
+    pa = _pyarrow()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    params = {"user_ids": user_ids}
+    counts = {}
+
+    connection = engine.raw_connection()
+    try:
+        connection.cursor().execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        for table in SNAPSHOT_TABLES:
+            schema = arrow_schema(table)
+            path = output_dir / f"{table}.parquet"
+            # Named cursor = server-side cursor, rows arrive row_group_size at a time
+            cursor = connection.cursor(name=f"snapshot_{table}")
+            cursor.itersize = row_group_size
+            cursor.execute(_select_sql(table, user_ids), params)
+
+            counts[table] = 0
+            with pa.parquet.ParquetWriter(path, schema, compression=compression) as writer:
+                while True:
+                    rows = cursor.fetchmany(row_group_size)
+                    if not rows:
+                        break
+                    columns = [
+                        # psycopg2 returns bytea as memoryview
+                        [None if v is None else bytes(v) for v in values] if pa.types.is_binary(field.type)
+                        else values
+                        for values, field in zip(zip(*rows), schema)
+                    ]
+                    batch = pa.Table.from_arrays(
+                        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                        schema=schema,
+                    )
+                    writer.write_table(batch, row_group_size=row_group_size)
+                    counts[table] += len(rows)
+            cursor.close()
+            logger.info(f"Exported {counts[table]} {table} rows to {path}")
+        connection.rollback()
+    finally:
+        connection.close()
+
+    return counts
+
+
+def _csv_table(pa, batch):
+    """COPY takes bytea as hex text, so binary columns are converted first"""
+    table = pa.Table.from_batches([batch])
+    for i, field in enumerate(table.schema):
+        if pa.types.is_binary(field.type):
+            hex_values = pa.array(
+                [None if value is None else "\\x" + value.hex() for value in table.column(i).to_pylist()],
+                type=pa.string(),
+            )
+            table = table.set_column(i, field.name, hex_values)
+    return table
+
+
+def _delete_users(cursor, user_ids: List[int]):
+    delete_user_matches(cursor, user_ids)
+    for table in ("players_encountered", "sync_jobs"):
+        cursor.execute(f"DELETE FROM {table} WHERE user_id = ANY(%s)", (user_ids,))
+    cursor.execute("DELETE FROM users WHERE id = ANY(%s)", (user_ids,))
+
+
+def import_snapshot(input_dir: Path, replace: bool = False) -> Dict[str, int]:
+    """
+    Load a snapshot written by `export_snapshot` with COPY, in a single transaction.
+
+    Args:
+        replace: Delete the snapshot's users (and all their data) first.
+            Without it, users that already exist make the import fail.
+
+    Returns:
+        Rows read per table (shared rows that already existed are included)
+    """
+    pa = _pyarrow()
+    # Quote every non-null value so NULL and empty strings stay distinct for COPY
+    write_options = pa.csv.WriteOptions(include_header=False, quoting_style="all_valid")
+    counts = {}
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+
+        if replace:
+            users_path = input_dir / "users.parquet"
+            if users_path.exists():
+                user_ids = pa.parquet.read_table(users_path, columns=["id"]).column("id").to_pylist()
+                _delete_users(cursor, user_ids)
+                logger.info(f"Deleted {len(user_ids)} existing users before import")
+
+        for table in SNAPSHOT_TABLES:
+            path = input_dir / f"{table}.parquet"
+            if not path.exists():
+                logger.warning(f"{path} not found, skipping {table}")
+                continue
+
+            parquet_file = pa.parquet.ParquetFile(path)
+            column_list = ", ".join(parquet_file.schema_arrow.names)
+            target = table
+            if table in _SHARED_TABLES:
+                # COPY can't skip conflicts, so shared rows go through a staging table
+                target = f"_import_{table}"
+                cursor.execute(
+                    f"CREATE TEMP TABLE {target} ON COMMIT DROP AS SELECT {column_list} FROM {table} WITH NO DATA"
+                )
+            copy_sql = f"COPY {target} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+
+            counts[table] = 0
+            for batch in parquet_file.iter_batches():
+                sink = pa.BufferOutputStream()
+                pa.csv.write_csv(_csv_table(pa, batch), sink, write_options=write_options)
+                cursor.copy_expert(copy_sql, io.BytesIO(sink.getvalue().to_pybytes()))
+                counts[table] += batch.num_rows
+
+            if table in _SHARED_TABLES:
+                cursor.execute(
+                    f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {target} "
+                    f"ON CONFLICT DO NOTHING"
+                )
+            logger.info(f"Imported {counts[table]} {table} rows from {path}")
+
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    return counts
@@ -0,0 +1,125 @@
+"""
+Background resolution of Steam persona names for players encountered.
+
+Account IDs without a cached persona (or with one older than the refresh TTL)
+are collected across all users, most frequently seen first, and looked up
+with GetPlayerSummaries 100 at a time. Results go into the shared
+player_personas table and are then copied onto players_encountered rows.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import func, or_, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import PlayerEncountered, PlayerPersona
+from .rate_limiter import get_rate_limiter
+from .steam_auth import SteamAuthService
+
+logger = logging.getLogger(__name__)
+
+_PROPAGATE_SQL = text("""
+UPDATE players_encountered pe
+SET persona_name = pp.persona_name
+FROM player_personas pp
+WHERE pe.account_id = pp.account_id
+  AND pp.persona_name IS NOT NULL
+  AND pe.persona_name IS DISTINCT FROM pp.persona_name
+  AND (pe.persona_name IS NULL OR pe.account_id = ANY(:account_ids))
+""")
+
+
+def accounts_to_resolve(db: Session, limit: int, stale_before: datetime) -> List[int]:
+    """Unresolved account IDs first, then stale ones, each by games played together across users"""
+    rows = (
+        db.query(PlayerEncountered.account_id)
+        .outerjoin(PlayerPersona, PlayerPersona.account_id == PlayerEncountered.account_id)
+        .filter(or_(PlayerPersona.account_id.is_(None), PlayerPersona.resolved_at < stale_before))
+        .group_by(PlayerEncountered.account_id, PlayerPersona.account_id)
+        .order_by(PlayerPersona.account_id.isnot(None), func.sum(PlayerEncountered.games_together).desc())
+        .limit(limit)
+        .all()
+    )
+    return [account_id for (account_id,) in rows]
+
+
+def _save_personas(db: Session, account_ids: List[int], profiles: Dict[str, Dict]) -> int:
+    """Upsert one batch into player_personas; accounts without a profile are stored as NULL"""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for account_id in account_ids:
+        profile = profiles.get(SteamAuthService.account_id_to_steam_id(account_id))
+        rows.append({
+            "account_id": account_id,
+            "persona_name": profile.get("personaname") if profile else None,
+            "avatar_url": profile.get("avatarfull") if profile else None,
+            "resolved_at": now,
+        })
+
+    statement = insert(PlayerPersona).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[PlayerPersona.account_id],
+        set_={
+            "persona_name": statement.excluded.persona_name,
+            "avatar_url": statement.excluded.avatar_url,
+            "resolved_at": statement.excluded.resolved_at,
+        },
+    ))
+    db.commit()
+    return sum(1 for row in rows if row["persona_name"])
+
+
+async def resolve_personas(db: Session, max_batches: int, ttl: timedelta) -> Dict[str, int]:
+    """
+    Resolve up to `max_batches` x 100 account IDs and update players encountered.
+
+    Stops early when Steam rate limits or fails; the remaining accounts are
+    picked up by the next run.
+    """
+    batch_size = SteamAuthService.PLAYER_SUMMARIES_BATCH
+    account_ids = accounts_to_resolve(db, max_batches * batch_size, datetime.now(timezone.utc) - ttl)
+    steam_auth = SteamAuthService()
+    limiter = get_rate_limiter(
+        "steam",
+        initial_delay=settings.STEAM_API_RATE_LIMIT_DELAY,
+        min_delay=settings.STEAM_API_RATE_LIMIT_DELAY,
+        max_delay=settings.RATE_LIMIT_MAX_DELAY,
+    )
+
+    requested = 0
+    resolved = 0
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        for start in range(0, len(account_ids), batch_size):
+            batch = account_ids[start:start + batch_size]
+            await limiter.wait()
+            try:
+                profiles = await steam_auth.get_player_summaries_batch(
+                    [SteamAuthService.account_id_to_steam_id(a) for a in batch], client
+                )
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 429:
+                    limiter.on_rate_limited(e.response.headers)
+                logger.warning(f"GetPlayerSummaries failed with {e.response.status_code}, stopping this run")
+                break
+            except httpx.HTTPError as e:
+                logger.warning(f"GetPlayerSummaries request failed: {e}, stopping this run")
+                break
+
+            limiter.on_success({})
+            requested += len(batch)
+            resolved += _save_personas(db, batch, profiles)
+
+    # Runs even when nothing was looked up: new players encountered rows of
+    # accounts whose persona is already cached only get their name here
+    updated = db.execute(_PROPAGATE_SQL, {"account_ids": account_ids[:requested]}).rowcount
+    db.commit()
+
+    logger.info(
+        f"Persona resolution: {requested} accounts looked up, {resolved} with a profile, "
+        f"{updated} players encountered rows updated"
+    )
+    return {"requested": requested, "resolved": resolved, "updated": updated}
@@ -0,0 +1,101 @@
+"""
+Set-based rebuild of the players_encountered aggregates.
+
+The sync pipeline maintains players_encountered incrementally, one match at
+a time. This recomputes it from matches joined with match_players in a single
+INSERT ... SELECT ... GROUP BY upsert, which also repairs double counts, and
+deletes the rows it no longer produces.
+"""
+import logging
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .steam_auth import SteamAuthService
+
+logger = logging.getLogger(__name__)
+
+# users.id is a Steam ID 64; account IDs are offset from it
+_STEAM_ID_OFFSET = int(SteamAuthService.account_id_to_steam_id(0))
+
+# One statement, so the upsert and the delete share a snapshot: rows a sync
+# commits while the rebuild runs are neither counted nor deleted. Stale rows
+# are the ones the upsert did not produce, i.e. teammates that no longer
+# appear in any match.
+_REBUILD_SQL = """
+WITH upserted AS (
+    INSERT INTO players_encountered (
+        user_id, account_id, games_together, games_won, games_lost,
+        first_match_at, last_match_at, updated_at
+    )
+    SELECT
+        m.user_id,
+        mp.account_id,
+        count(*),
+        count(*) FILTER (WHERE m.radiant_team = m.radiant_win),
+        count(*) FILTER (WHERE (m.radiant_team = m.radiant_win) IS NOT TRUE),
+        min(m.start_time),
+        max(m.start_time),
+        now()
+    FROM matches m
+    JOIN match_players mp ON mp.match_id = m.id
+    WHERE m.has_details = TRUE
+      AND mp.account_id IS NOT NULL
+      AND mp.account_id <> m.user_id - :steam_id_offset
+      AND mp.player_slot <> m.player_slot
+      AND (mp.player_slot < 128) = (m.player_slot < 128)
+      {match_filter}
+    GROUP BY m.user_id, mp.account_id
+    ON CONFLICT (user_id, account_id) DO UPDATE SET
+        games_together = EXCLUDED.games_together,
+        games_won = EXCLUDED.games_won,
+        games_lost = EXCLUDED.games_lost,
+        first_match_at = EXCLUDED.first_match_at,
+        last_match_at = EXCLUDED.last_match_at,
+        updated_at = EXCLUDED.updated_at
+    RETURNING user_id, account_id
+),
+deleted AS (
+    DELETE FROM players_encountered pe
+    WHERE NOT EXISTS (
+        SELECT 1 FROM upserted u WHERE u.user_id = pe.user_id AND u.account_id = pe.account_id
+    )
+      {player_filter}
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM upserted), (SELECT count(*) FROM deleted)
+"""
+
+
+def rebuild_players_encountered(db: Session, user_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Recompute players_encountered for one user, or every user when user_id is None.
+
+    Persona names survive because existing rows are updated in place.
+    Runs in the caller's transaction and commits it.
+
+    Returns:
+        Number of rows upserted and stale rows deleted
+    """
+    started = time.perf_counter()
+    params = {"steam_id_offset": _STEAM_ID_OFFSET}
+    if user_id is not None:
+        params["user_id"] = user_id
+
+    upserted, deleted = db.execute(
+        text(_REBUILD_SQL.format(
+            match_filter="AND m.user_id = :user_id" if user_id is not None else "",
+            player_filter="AND pe.user_id = :user_id" if user_id is not None else "",
+        )),
+        params,
+    ).one()
+    db.commit()
+
+    scope = f"user {user_id}" if user_id is not None else "all users"
+    logger.info(
+        f"Rebuilt players encountered for {scope}: {upserted} rows, "
+        f"{deleted} stale removed in {time.perf_counter() - started:.2f}s"
+    )
+    return {"upserted": upserted, "deleted": deleted}
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD rate limiter shared by all requests to one API provider.
+
+    The request rate grows additively after every successful call and is cut
+    multiplicatively when the provider answers 429. Retry-After and quota headers
+    (OpenDota's X-Rate-Limit-Remaining-*) pause or stretch the spacing between
+    requests so we stay as close as possible to the real limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_delay: float,
+        min_delay: float,
+        max_delay: float,
+        increase_fraction: float = 0.02,
+        decrease_factor: float = 0.5,
+        adaptive: bool = True,
+    ):
+        """
+        Args:
+            name: Provider name, used for logging
+            initial_delay: Starting delay between requests (seconds)
+            min_delay: Fastest allowed spacing (seconds)
+            max_delay: Slowest allowed spacing (seconds)
+            increase_fraction: Additive rate step as a fraction of the max rate
+            decrease_factor: Rate multiplier applied on 429
+            adaptive: If False, behaves as a fixed delay of initial_delay
+        """
+        self.name = name
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, initial_delay)
+        self.adaptive = adaptive
+        self.decrease_factor = decrease_factor
+        self.rate_step = increase_fraction / min_delay if min_delay > 0 else increase_fraction
+        self.delay = initial_delay
+
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        self._next_request_at = 0.0
+        self._paused_until = 0.0
+        self._quota_delay = 0.0
+
+    async def wait(self) -> float:
+        """
+        Block until the next request is allowed
+
+        Returns:
+            Seconds spent waiting
+        """
+        async with self._get_lock():
+            now = time.monotonic()
+            spacing = max(self.delay, self._quota_delay)
+            ready_at = max(self._next_request_at, self._paused_until, now)
+            if ready_at > now:
+                await asyncio.sleep(ready_at - now)
+            self._next_request_at = max(ready_at, time.monotonic()) + spacing
+            return ready_at - now
+
+    def ready_in(self) -> float:
+        """Seconds until this limiter would let the next request through"""
+        now = time.monotonic()
+        return max(self._next_request_at, self._paused_until, now) - now
+
+    @property
+    def current_rate(self) -> float:
+        """Current allowed request rate (requests per second)"""
+        spacing = max(self.delay, self._quota_delay)
+        return 1.0 / spacing if spacing > 0 else float("inf")
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Each Celery task runs its own event loop via asyncio.run(), so the lock
+        # has to be recreated when the limiter is reused from a new loop.
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def on_success(self, headers: Optional[Mapping[str, str]] = None):
+        """Additive increase of the request rate after a successful call"""
+        if self.adaptive and self.delay > 0:
+            rate = 1.0 / self.delay + self.rate_step
+            self.delay = max(self.min_delay, 1.0 / rate)
+        self._apply_quota_headers(headers)
+
+    def on_rate_limited(self, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Multiplicative decrease of the request rate after a 429.
+
+        Returns:
+            Seconds the provider asked us to wait before the next request
+        """
+        if self.adaptive:
+            # Halving the rate doubles the spacing
+            self.delay = min(self.max_delay, max(self.delay, 0.01) / self.decrease_factor)
+
+        retry_after = parse_retry_after(headers) if headers is not None else None
+        if retry_after is None:
+            retry_after = self.delay
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+        logger.warning(
+            f"{self.name} rate limited: pausing {retry_after:.1f}s, delay now {self.delay:.2f}s"
+        )
+        return retry_after
+
+    def _apply_quota_headers(self, headers: Optional[Mapping[str, str]]):
+        """Spread the remaining per-minute quota over the rest of the minute"""
+        if not headers:
+            self._quota_delay = 0.0
+            return
+
+        remaining_minute = _int_header(headers, "x-rate-limit-remaining-minute")
+        remaining_day = _int_header(headers, "x-rate-limit-remaining-day")
+
+        if remaining_day is not None and remaining_day <= 0:
+            logger.warning(f"{self.name} daily quota exhausted")
+
+        if remaining_minute is None:
+            self._quota_delay = 0.0
+            return
+
+        seconds_left = 60.0 - (time.time() % 60.0)
+        if remaining_minute <= 0:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds_left)
+            self._quota_delay = 0.0
+            logger.info(f"{self.name} minute quota exhausted, pausing {seconds_left:.1f}s")
+        else:
+            self._quota_delay = min(self.max_delay, seconds_left / remaining_minute)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date"""
+    value = headers.get("retry-after")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+
+def get_rate_limiter(name: str, initial_delay: float, min_delay: float, max_delay: float) -> AdaptiveRateLimiter:
+    """
+    Return the process-wide limiter for a provider.
+
+    Limiters are shared so that every task running in the same worker keeps the
+    rate it has learned instead of starting again from the configured guess.
+    """
+    from ..config import settings
+
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = AdaptiveRateLimiter(
+            name=name,
+            initial_delay=initial_delay,
+            min_delay=min(min_delay, initial_delay),
+            max_delay=max_delay,
+            adaptive=settings.ADAPTIVE_RATE_LIMIT,
+        )
+        _limiters[name] = limiter
+    return limiter
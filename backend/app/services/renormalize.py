@@ -0,0 +1,220 @@
+"""
+Re-derive match columns from stored provider payloads, without API calls.
+
+Shared matches stored under an older match_mapping.NORMALIZE_VERSION are
+processed in ranges of match IDs. Their payloads are loaded (archive or
+match_payloads), run through the provider's normalize_match_data for every
+user who played the match and written back with one statement per table:
+
+- shared_matches: match-level columns, by primary key
+- matches: each participant's columns, by primary key
+- match_players: upserted on (match_id, player_slot)
+
+Each chunk is one transaction that also advances normalize_version, so an
+interrupted run resumes where it stopped and ranges can be processed
+concurrently, in a local process pool or as Celery tasks.
+
+Users whose matches were rewritten get their data_generation bumped, which
+makes the in-memory stats caches (column store, hero matchups) rebuild
+instead of refreshing incrementally.
+"""
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal, engine
+from ..models import Match, MatchPlayer, SharedMatch, User
+from .dota_api import DotaAPIService
+from .match_mapping import NORMALIZE_VERSION, participation_values, player_values, shared_match_values
+from .match_payloads import load_payloads
+from .steam_auth import SteamAuthService
+
+logger = logging.getLogger(__name__)
+
+RENORMALIZE_CHUNK_SIZE = 500
+
+_BOUNDARIES_SQL = text("""
+SELECT id FROM (
+    SELECT id, row_number() OVER (ORDER BY id) AS n
+    FROM shared_matches
+    WHERE normalize_version < :version
+) pending
+WHERE n % :chunk_size = 0
+ORDER BY id
+""")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _bulk_update(db: Session, table, keys: Tuple[str, ...], rows: List[Dict]):
+    """UPDATE every row in one statement, joining on `keys` against jsonb_to_recordset"""
+    dialect = db.get_bind().dialect
+    columns = list(rows[0])
+    record = ", ".join(f"{c} {table.c[c].type.compile(dialect=dialect)}" for c in columns)
+    assignments = ", ".join(f"{c} = r.{c}" for c in columns if c not in keys)
+    join = " AND ".join(f"t.{k} = r.{k}" for k in keys)
+    db.execute(
+        text(
+            f"UPDATE {table.name} t SET {assignments} "
+            f"FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r({record}) WHERE {join}"
+        ),
+        {"rows": json.dumps(rows, default=_json_default)},
+    )
+
+
+def chunk_boundaries(db: Session, chunk_size: int = RENORMALIZE_CHUNK_SIZE) -> List[Tuple[int, Optional[int]]]:
+    """
+    Split pending shared matches into (after_id, up_to_id] ranges of about
+    `chunk_size` matches. The last range is open-ended (up_to_id None).
+    """
+    ids = db.execute(_BOUNDARIES_SQL, {"version": NORMALIZE_VERSION, "chunk_size": chunk_size}).scalars().all()
+    bounds = [0, *ids]
+    return [(bounds[i], bounds[i + 1] if i + 1 < len(bounds) else None) for i in range(len(bounds))]
+
+
+def renormalize_range(
+    db: Session,
+    dota_api: DotaAPIService,
+    after_id: int,
+    up_to_id: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Renormalize pending shared matches with after_id < id <= up_to_id, and commit.
+
+    Returns:
+        Counts of matches, participations rewritten, participations the
+        payload could not be normalized for, and matches without a payload
+    """
+    query = db.query(SharedMatch.id).filter(
+        SharedMatch.id > after_id,
+        SharedMatch.normalize_version < NORMALIZE_VERSION,
+    )
+    if up_to_id is not None:
+        query = query.filter(SharedMatch.id <= up_to_id)
+    match_ids = [match_id for (match_id,) in query.order_by(SharedMatch.id)]
+    if not match_ids:
+        return {}
+
+    payloads = load_payloads(db, match_ids)
+    participants = defaultdict(list)
+    for match_id, user_id in db.query(Match.id, Match.user_id).filter(
+        Match.id.in_(match_ids),
+        Match.has_details == True
+    ):
+        participants[match_id].append(user_id)
+
+    shared_rows, match_rows, player_rows = [], [], []
+    failed = 0
+    for match_id, payload in payloads.items():
+        normalized = None
+        for user_id in participants.get(match_id, []):
+            account_id = SteamAuthService.steam_id_to_account_id(str(user_id))
+            user_normalized = dota_api.normalize_match_data(payload, account_id)
+            if not user_normalized:
+                failed += 1
+                continue
+            normalized = user_normalized
+            match_rows.append({"id": match_id, "user_id": user_id, **participation_values(user_normalized)})
+
+        # Match-level values are the same whichever participant they were normalized for
+        if normalized is not None:
+            shared_rows.append({"id": match_id, **shared_match_values(normalized)})
+            player_rows.extend(player_values(match_id, player) for player in normalized["all_players"])
+
+    if shared_rows:
+        _bulk_update(db, SharedMatch.__table__, ("id",), shared_rows)
+    if match_rows:
+        _bulk_update(db, Match.__table__, ("id", "user_id"), match_rows)
+    if player_rows:
+        insert = pg_insert(MatchPlayer).values(player_rows)
+        db.execute(insert.on_conflict_do_update(
+            constraint="uq_match_players_match_slot",
+            set_={c: insert.excluded[c] for c in player_rows[0] if c not in ("match_id", "player_slot")},
+        ))
+
+    # Matches with nothing to derive from are marked done too, or every run would revisit them
+    db.query(SharedMatch).filter(SharedMatch.id.in_(match_ids)).update(
+        {SharedMatch.normalize_version: NORMALIZE_VERSION}, synchronize_session=False
+    )
+    user_ids = {row["user_id"] for row in match_rows}
+    if user_ids:
+        db.query(User).filter(User.id.in_(user_ids)).update(
+            {User.data_version: User.data_version + 1, User.data_generation: User.data_generation + 1},
+            synchronize_session=False
+        )
+    db.commit()
+
+    return {
+        "matches": len(match_ids),
+        "participations": len(match_rows),
+        "failed": failed,
+        "missing_payload": len(match_ids) - len(payloads),
+    }
+
+
+_dota_api: Optional[DotaAPIService] = None
+
+
+def _range_job(bounds: Tuple[int, Optional[int]]) -> Dict[str, int]:
+    global _dota_api
+    if _dota_api is None:
+        _dota_api = DotaAPIService()
+    db = SessionLocal()
+    try:
+        return renormalize_range(db, _dota_api, *bounds)
+    except Exception:
+        db.rollback()
+        logger.error(f"Renormalize failed for match IDs in {bounds}", exc_info=True)
+        raise
+    finally:
+        db.close()
+
+
+def _worker_init():
+    # Connections inherited from the parent process must not be reused after fork
+    engine.dispose(close=False)
+
+
+def renormalize(workers: int = 1, chunk_size: int = RENORMALIZE_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Renormalize every pending shared match, `workers` ranges at a time.
+
+    Returns:
+        Summed counts from renormalize_range
+    """
+    db = SessionLocal()
+    try:
+        ranges = chunk_boundaries(db, chunk_size)
+    finally:
+        db.close()
+
+    totals = Counter()
+    started = time.perf_counter()
+    if workers > 1:
+        with Pool(processes=workers, initializer=_worker_init) as pool:
+            results = pool.imap_unordered(_range_job, ranges)
+            for done, result in enumerate(results, start=1):
+                totals.update(result)
+                if done % 100 == 0:
+                    logger.info(f"Renormalized {done}/{len(ranges)} ranges ({totals['matches']} matches)")
+    else:
+        for bounds in ranges:
+            totals.update(_range_job(bounds))
+
+    logger.info(
+        f"Renormalized {totals['matches']} matches to version {NORMALIZE_VERSION} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return dict(totals)
@@ -0,0 +1,78 @@
+"""
+The cross-user match store.
+
+A match is fetched from the provider once and kept in shared_matches with
+all ten match_players. Every user who played it gets their own Match row,
+derived from the stored payload when another user already fetched it.
+"""
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..models import MatchPlayer, SharedMatch
+from .match_mapping import player_values, shared_match_values
+from .match_payloads import load_payload, save_payload
+
+logger = logging.getLogger(__name__)
+
+# Removes users' matches together with the shared matches nobody else played.
+# Shared rows are deleted first (players before their match, payloads
+# cascade) because they are found through the user's matches.
+_DELETE_USER_MATCHES_SQL = (
+    """
+    DELETE FROM match_players WHERE match_id IN (
+        SELECT m.id FROM matches m WHERE m.user_id = ANY(%(user_ids)s)
+        AND NOT EXISTS (SELECT 1 FROM matches o WHERE o.id = m.id AND o.user_id <> ALL(%(user_ids)s))
+    )
+    """,
+    """
+    DELETE FROM shared_matches WHERE id IN (
+        SELECT m.id FROM matches m WHERE m.user_id = ANY(%(user_ids)s)
+        AND NOT EXISTS (SELECT 1 FROM matches o WHERE o.id = m.id AND o.user_id <> ALL(%(user_ids)s))
+    )
+    """,
+    "DELETE FROM matches WHERE user_id = ANY(%(user_ids)s)",
+)
+
+
+def get_shared_payload(db: Session, match_id: int) -> Optional[Dict]:
+    """Provider payload of a match another user already fetched, if any"""
+    return load_payload(db, match_id)
+
+
+def save_shared_match(db: Session, match_id: int, normalized: Dict) -> bool:
+    """
+    Store a normalized match and its players unless it is already stored.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING, so two workers saving the same
+    match concurrently end up with one copy. Nothing is committed.
+
+    Returns:
+        True if this call stored the match
+    """
+    inserted = db.execute(
+        pg_insert(SharedMatch)
+        .values(id=match_id, **shared_match_values(normalized))
+        .on_conflict_do_nothing(index_elements=["id"])
+    ).rowcount
+
+    if not inserted:
+        # Rewrites a payload that could not be loaded (a no-op when it is intact)
+        save_payload(db, match_id, normalized["raw_data"])
+        return False
+
+    save_payload(db, match_id, normalized["raw_data"])
+    db.add_all(MatchPlayer(**player_values(match_id, player)) for player in normalized.get("all_players", []))
+    logger.debug(f"Stored shared match {match_id}")
+    return True
+
+
+def delete_user_matches(cursor, user_ids: List[int]):
+    """
+    Delete users' matches through a DB-API cursor, along with shared matches
+    (and their players) that no other user played. The caller commits.
+    """
+    for sql in _DELETE_USER_MATCHES_SQL:
+        cursor.execute(sql, {"user_ids": list(user_ids)})
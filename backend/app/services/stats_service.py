@@ -2,14 +2,24 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_, desc
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
+from ..config import settings
 from ..models import Match, Hero, PlayerEncountered
-from ..schemas.stats import HeroStats, PlayerStats, TimeStats, PlayerEncounteredStats, DashboardStats
+from ..schemas.stats import (
+    HeroStats, PlayerStats, TimeStats, PlayerEncounteredStats, DashboardStats, ItemStats, ItemHeroStats
+)
 
 
 class StatsService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _columns(self, user_id: int):
+        """The user's in-memory match columns when STATS_ENGINE=columnar, otherwise None"""
+        if settings.STATS_ENGINE != "columnar":
+            return None
+        from .match_column_store import get_column_store
+        return get_column_store().get(self.db, user_id)
+
     def get_player_stats(
         self,
         user_id: int,
@@ -19,6 +29,14 @@ class StatsService:
         end_date: Optional[datetime] = None,
     ) -> PlayerStats:
         """Get overall player statistics"""
+        columns = self._columns(user_id)
+        if columns is not None:
+            from .match_column_store import player_stats
+            mask = columns.mask(hero_id, game_mode, start_date=start_date, end_date=end_date)
+            if not mask.any():
+                return self._empty_player_stats()
+            return player_stats(columns, mask, self.get_hero_stats(user_id, limit=5))
+
         # Only query matches with details (not stubs)
         query = self.db.query(Match).filter(
             Match.user_id == user_id,
@@ -63,6 +81,12 @@ class StatsService:
         limit: Optional[int] = None,
     ) -> List[HeroStats]:
         """Get per-hero statistics"""
+        columns = self._columns(user_id)
+        if columns is not None:
+            from .match_column_store import hero_stats
+            mask = columns.mask(hero_id, game_mode, start_date=start_date, end_date=end_date)
+            return hero_stats(columns, mask, limit)
+
         # Only query matches with details (not stubs)
         query = self.db.query(Match).filter(
             Match.user_id == user_id,
@@ -111,6 +135,65 @@ class StatsService:
 
         return hero_stats
 
+    def get_item_stats(
+        self,
+        user_id: int,
+        hero_id: Optional[int] = None,
+        game_mode: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[ItemStats]:
+        """Get most-built items with their win rates, from the item_ids index"""
+        won = (Match.radiant_team == Match.radiant_win).label("won")
+        item_id = func.unnest(Match.item_ids).label("item_id")
+        query = self.db.query(item_id, won).filter(
+            Match.user_id == user_id,
+            Match.has_details == True
+        )
+        occurrences = self._apply_filters(query, hero_id, game_mode, start_date, end_date).subquery()
+
+        games = func.count()
+        query = (
+            self.db.query(occurrences.c.item_id, games, func.count().filter(occurrences.c.won))
+            .group_by(occurrences.c.item_id)
+            .order_by(games.desc(), occurrences.c.item_id)
+        )
+        if limit:
+            query = query.limit(limit)
+
+        return [
+            ItemStats(item_id=item, games=total, wins=wins, losses=total - wins, win_rate=wins / total * 100)
+            for item, total, wins in query.all()
+        ]
+
+    def get_item_hero_stats(
+        self,
+        user_id: int,
+        item_id: int,
+        game_mode: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> List[ItemHeroStats]:
+        """Get per-hero win rates in matches where the user had `item_id`"""
+        games = func.count()
+        query = self.db.query(
+            Match.hero_id, games, func.count().filter(Match.radiant_team == Match.radiant_win)
+        ).filter(
+            Match.user_id == user_id,
+            Match.has_details == True,
+            # @> uses the GIN index on item_ids
+            Match.item_ids.contains([item_id])
+        )
+        query = self._apply_filters(query, None, game_mode, start_date, end_date)
+        rows = query.group_by(Match.hero_id).order_by(games.desc(), Match.hero_id).all()
+
+        return [
+            ItemHeroStats(hero_id=hero, games=total, wins=wins, losses=total - wins, win_rate=wins / total * 100)
+            for hero, total, wins in rows
+            if hero is not None
+        ]
+
     def get_players_encountered(
         self,
         user_id: int,
@@ -145,9 +228,17 @@ class StatsService:
         """Get time-based statistics"""
         now = datetime.utcnow()
         stats = []
+        columns = self._columns(user_id)
 
         for period in periods:
             start_date = self._get_period_start_date(now, period)
+            if columns is not None:
+                from .match_column_store import time_stats
+                period_stats = time_stats(columns, period, start_date, now)
+                if period_stats:
+                    stats.append(period_stats)
+                continue
+
             matches = (
                 self.db.query(Match)
                 .filter(
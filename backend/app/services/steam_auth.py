@@ -1,5 +1,5 @@
 import httpx
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from urllib.parse import urlencode
 from ..config import settings
 import re
@@ -8,6 +8,7 @@ import re
 class SteamAuthService:
     STEAM_OPENID_URL = "https://steamcommunity.com/openid/login"
     STEAM_API_URL = "https://api.steampowered.com"
+    PLAYER_SUMMARIES_BATCH = 100
 
     def __init__(self):
         self.api_key = settings.STEAM_API_KEY
@@ -59,6 +60,26 @@ class SteamAuthService:
             players = data.get("response", {}).get("players", [])
             return players[0] if players else None
 
+    async def get_player_summaries_batch(self, steam_ids: List[str], client: httpx.AsyncClient) -> Dict[str, Dict]:
+        """
+        Get profiles for up to 100 Steam IDs in one request.
+
+        Returns:
+            Profiles keyed by Steam ID; private or deleted accounts are missing
+        """
+        if len(steam_ids) > self.PLAYER_SUMMARIES_BATCH:
+            raise ValueError(f"GetPlayerSummaries accepts at most {self.PLAYER_SUMMARIES_BATCH} steamids")
+
+        url = f"{self.STEAM_API_URL}/ISteamUser/GetPlayerSummaries/v0002/"
+        params = {
+            "key": self.api_key,
+            "steamids": ",".join(steam_ids),
+        }
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        players = response.json().get("response", {}).get("players", [])
+        return {player["steamid"]: player for player in players}
+
     @staticmethod
     def steam_id_to_account_id(steam_id: str) -> int:
         """Convert Steam ID 64 to Dota 2 account ID (32-bit)"""
@@ -1,10 +1,13 @@
 import httpx
-import asyncio
 import logging
+import time
 from typing import List, Dict, Optional
 from ..config import settings
 from datetime import datetime
-from .exceptions import APIException
+from .exceptions import APIException, RateLimitException
+from .match_decoding import decode_valve_match
+from .rate_limiter import get_rate_limiter
+from ..metrics import PROVIDER_REQUEST_SECONDS, RATE_LIMITER_WAIT_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +19,42 @@ class ValveAPI:
         self.api_key = api_key
         self.rate_limit_delay = rate_limit_delay
         self.base_url = settings.VALVE_API_BASE_URL
+        self.rate_limiter = get_rate_limiter(
+            "valve",
+            initial_delay=rate_limit_delay,
+            min_delay=settings.VALVE_RATE_LIMIT_MIN_DELAY,
+            max_delay=settings.RATE_LIMIT_MAX_DELAY,
+        )
         logger.info(f"Initialized ValveAPI with base_url={self.base_url}, rate_limit={rate_limit_delay}s")
 
-    async def _rate_limit_delay(self):
-        """Apply rate limiting delay"""
-        await asyncio.sleep(self.rate_limit_delay)
+    async def _get(self, client: httpx.AsyncClient, url: str, params: Dict, retries: int = 0) -> httpx.Response:
+        """
+        Rate-limited GET that feeds the response back into the adaptive limiter.
+
+        Args:
+            retries: How many times to wait out a 429 before giving up
+
+        Raises:
+            RateLimitException: When the provider is still answering 429
+        """
+        # e.g. .../IDOTA2Match_570/GetMatchDetails/v1/ -> GetMatchDetails
+        endpoint = url.rstrip("/").split("/")[-2]
+        for attempt in range(retries + 1):
+            RATE_LIMITER_WAIT_SECONDS.labels(provider="valve").observe(await self.rate_limiter.wait())
+            started = time.perf_counter()
+            response = await client.get(url, params=params)
+            PROVIDER_REQUEST_SECONDS.labels(
+                provider="valve", endpoint=endpoint, status=str(response.status_code)
+            ).observe(time.perf_counter() - started)
+            if response.status_code != 429:
+                if response.is_success:
+                    self.rate_limiter.on_success(response.headers)
+                return response
+
+            retry_after = self.rate_limiter.on_rate_limited(response.headers)
+            logger.warning(f"Valve API 429 on {url} (attempt {attempt + 1}/{retries + 1})")
+
+        raise RateLimitException(f"Rate limited requesting {url}", retry_after=retry_after)
 
     async def get_match_history(
         self,
@@ -43,17 +77,18 @@ class ValveAPI:
         logger.info(f"Fetching match history for account_id={account_id}, matches_requested={matches_requested}, start_at={start_at_match_id}")
         logger.debug(f"Request URL: {url}")
 
-        await self._rate_limit_delay()
-
         async with httpx.AsyncClient(timeout=30.0) as client:
             try:
-                response = await client.get(url, params=params)
+                response = await self._get(client, url, params, retries=settings.RATE_LIMIT_MAX_RETRIES)
                 logger.debug(f"Response status: {response.status_code}")
                 response.raise_for_status()
                 data = response.json()
                 matches = data.get("result", {}).get("matches", [])
                 logger.info(f"Successfully fetched {len(matches)} matches for account_id={account_id}")
                 return matches
+            except RateLimitException:
+                logger.error(f"Rate limit retries exhausted fetching match history for account_id={account_id}")
+                raise
             except httpx.HTTPStatusError as e:
                 logger.error(f"HTTP error {e.response.status_code} fetching match history for account_id={account_id}: {e.response.text}")
                 raise
@@ -80,16 +115,17 @@ class ValveAPI:
 
         logger.debug(f"Fetching match details for match_id={match_id}")
 
-        await self._rate_limit_delay()
-
         async with httpx.AsyncClient(timeout=30.0) as client:
             try:
-                response = await client.get(url, params=params)
+                response = await self._get(client, url, params)
                 logger.debug(f"Match {match_id} response status: {response.status_code}")
                 response.raise_for_status()
-                data = response.json()
+                match = decode_valve_match(response.content)
                 logger.debug(f"Successfully fetched match details for match_id={match_id}")
-                return data.get("result")
+                return match
+            except RateLimitException:
+                logger.warning(f"Rate limited fetching match {match_id}")
+                raise
             except httpx.HTTPStatusError as e:
                 status_code = e.response.status_code
                 error_text = e.response.text
@@ -2,10 +2,18 @@ from .celery_app import celery_app
 from .collect_match_ids_task import collect_match_ids
 from .fetch_match_details_task import fetch_match_details
 from .periodic_sync_task import periodic_sync
+from .resolve_personas_task import resolve_personas
+from .rebuild_players_encountered_task import rebuild_players_encountered, rebuild_players_encountered_per_user
+from .renormalize_task import renormalize_matches, renormalize_all
 
 __all__ = [
     "celery_app",
     "collect_match_ids",
     "fetch_match_details",
     "periodic_sync",
+    "rebuild_players_encountered",
+    "resolve_personas",
+    "rebuild_players_encountered_per_user",
+    "renormalize_matches",
+    "renormalize_all",
 ]
@@ -1,6 +1,6 @@
 from celery import Celery
 from celery.schedules import crontab
-from celery.signals import worker_process_init
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready
 from ..config import settings
 from ..logging_config import setup_logging
 import logging
@@ -13,6 +13,9 @@ celery_app = Celery(
         "app.tasks.collect_match_ids_task",
         "app.tasks.fetch_match_details_task",
         "app.tasks.periodic_sync_task",
+        "app.tasks.rebuild_players_encountered_task",
+        "app.tasks.renormalize_task",
+        "app.tasks.resolve_personas_task",
     ]
 )
 
@@ -31,6 +34,22 @@ def setup_celery_logging(**kwargs):
     logger.info(f"Celery worker logging initialized with level: {settings.LOG_LEVEL}")
     logger.debug("Celery and application logging configured for stdout output")
 
+@worker_ready.connect
+def start_metrics_exporter(sender=None, **kwargs):
+    """Expose merged worker metrics from the main worker process"""
+    from ..metrics import start_worker_exporter
+    start_worker_exporter(celery_app, settings.WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def cleanup_process_metrics(pid=None, **kwargs):
+    """Drop live gauges of a prefork child that exited"""
+    import os
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
 celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
@@ -48,4 +67,8 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.periodic_sync_task.periodic_sync",
         "schedule": crontab(minute=f"*/{settings.SYNC_INTERVAL_MINUTES}"),
     },
+    "resolve-personas": {
+        "task": "app.tasks.resolve_personas_task.resolve_personas",
+        "schedule": crontab(minute=f"*/{settings.PERSONA_RESOLVE_INTERVAL_MINUTES}"),
+    },
 }
@@ -30,7 +30,9 @@ class DatabaseTask(Task):
             self._db = None
 
 
-@celery_app.task(base=DatabaseTask, bind=True)
+# Acknowledged only once done, so a worker killed mid-walk (restart, deploy)
+# hands the task to another worker, which resumes from the job's checkpoint
+@celery_app.task(base=DatabaseTask, bind=True, acks_late=True, reject_on_worker_lost=True)
 def collect_match_ids(self, user_id: int, job_id: int, full_sync: bool = False):
     """
     Phase 1: Collect match IDs only (fast, reliable)
@@ -51,6 +53,9 @@ def collect_match_ids(self, user_id: int, job_id: int, full_sync: bool = False):
     if not sync_job:
         logger.error(f"Sync job {job_id} not found")
         return {"error": "Sync job not found"}
+    if sync_job.status == JobStatus.CANCELLED:
+        logger.info(f"Sync job {job_id} was cancelled, not running it")
+        return {"error": "Sync job cancelled"}
 
     # Update job status
     sync_job.status = JobStatus.RUNNING
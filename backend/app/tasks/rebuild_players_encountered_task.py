@@ -0,0 +1,39 @@
+import logging
+from typing import Optional
+from .celery_app import celery_app
+from ..database import SessionLocal
+from ..models import User
+from ..services.players_encountered import rebuild_players_encountered as rebuild
+from .fetch_match_details_task import DatabaseTask
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(base=DatabaseTask, bind=True)
+def rebuild_players_encountered(self, user_id: Optional[int] = None):
+    """
+    Recompute players encountered for one user, or all users in a single pass
+
+    Args:
+        user_id: User ID, or None for every user
+    """
+    try:
+        return rebuild(self.db, user_id)
+    except Exception:
+        self.db.rollback()
+        logger.error(f"Failed to rebuild players encountered for user_id={user_id}", exc_info=True)
+        raise
+
+
+@celery_app.task
+def rebuild_players_encountered_per_user():
+    """Queue one rebuild task per user so the work spreads across workers"""
+    db = SessionLocal()
+    try:
+        user_ids = [user_id for (user_id,) in db.query(User.id).all()]
+    finally:
+        db.close()
+
+    for user_id in user_ids:
+        rebuild_players_encountered.delay(user_id)
+    return {"queued_users": len(user_ids)}
@@ -0,0 +1,40 @@
+import logging
+from typing import Optional
+from .celery_app import celery_app
+from ..database import SessionLocal
+from ..services import DotaAPIService
+from ..services.renormalize import RENORMALIZE_CHUNK_SIZE, chunk_boundaries, renormalize_range
+from .fetch_match_details_task import DatabaseTask
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(base=DatabaseTask, bind=True)
+def renormalize_matches(self, after_id: int, up_to_id: Optional[int] = None):
+    """
+    Re-derive columns of pending shared matches in (after_id, up_to_id] from stored payloads
+
+    Args:
+        after_id: Exclusive lower match ID bound
+        up_to_id: Inclusive upper match ID bound, or None for no bound
+    """
+    try:
+        return renormalize_range(self.db, DotaAPIService(), after_id, up_to_id)
+    except Exception:
+        self.db.rollback()
+        logger.error(f"Failed to renormalize matches in ({after_id}, {up_to_id}]", exc_info=True)
+        raise
+
+
+@celery_app.task
+def renormalize_all(chunk_size: int = RENORMALIZE_CHUNK_SIZE):
+    """Queue one renormalize task per range of pending matches so the work spreads across workers"""
+    db = SessionLocal()
+    try:
+        ranges = chunk_boundaries(db, chunk_size)
+    finally:
+        db.close()
+
+    for after_id, up_to_id in ranges:
+        renormalize_matches.delay(after_id, up_to_id)
+    return {"queued_ranges": len(ranges)}
@@ -0,0 +1,29 @@
+import asyncio
+import logging
+from datetime import timedelta
+from .celery_app import celery_app
+from ..config import settings
+from ..services.persona_resolver import resolve_personas as resolve
+from .fetch_match_details_task import DatabaseTask
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(base=DatabaseTask, bind=True)
+def resolve_personas(self, max_batches: int = None):
+    """
+    Fill persona names of players encountered from Steam, 100 accounts per call
+
+    Args:
+        max_batches: GetPlayerSummaries calls allowed this run (default PERSONA_RESOLVE_MAX_BATCHES)
+    """
+    try:
+        return asyncio.run(resolve(
+            self.db,
+            max_batches=max_batches or settings.PERSONA_RESOLVE_MAX_BATCHES,
+            ttl=timedelta(hours=settings.PERSONA_REFRESH_HOURS),
+        ))
+    except Exception:
+        self.db.rollback()
+        logger.error("Persona resolution failed", exc_info=True)
+        raise
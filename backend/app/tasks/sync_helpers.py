@@ -1,14 +1,63 @@
 import logging
+import random
+import time
+from collections import deque
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from datetime import datetime
-from typing import Dict, Optional
-from ..models import User, Match, MatchPlayer, PlayerEncountered, SyncJob
+from sqlalchemy import func
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from ..config import settings
+from ..models import User, Match, PlayerEncountered, SyncJob
+from ..models.sync_job import JobStatus, JobType
 from ..services import DotaAPIService
-from ..services.exceptions import APIException
+from ..services.exceptions import APIException, RateLimitException
+from ..services.match_mapping import participation_values
+from ..services.shared_matches import get_shared_payload, save_shared_match
+from .. import metrics
 
 logger = logging.getLogger(__name__)
 
+# Phase 2 loads and commits stubs this many at a time. Loading each chunk
+# right after the previous commit means its objects are never expired (and
+# refreshed one by one) before they are processed.
+STUB_CHUNK_SIZE = 25
+
+# Failed fetches that count as a retry (anything but 500/429) give up after this many
+MAX_FETCH_RETRIES = 3
+
+
+async def _history_pages(
+    db: Session,
+    account_id: int,
+    dota_api: DotaAPIService,
+    cursor: Optional[int] = None
+) -> AsyncIterator[Tuple[List[int], int]]:
+    """
+    Walk the account's match history newest first, yielding each page's
+    match IDs with the cursor to resume after it.
+
+    OpenDota is paginated by offset, Valve by the last match ID seen.
+    """
+    is_opendota = dota_api.primary_provider == "opendota"
+
+    while True:
+        matches = await dota_api.get_match_history(
+            account_id=account_id,
+            matches_requested=100,
+            start_at_match_id=(cursor or 0) if is_opendota else cursor,
+            db=db
+        )
+
+        if not matches:
+            return
+
+        page_ids = [match_summary.get("match_id") for match_summary in matches]
+        cursor = (cursor or 0) + len(matches) if is_opendota else page_ids[-1]
+        yield page_ids, cursor
+
+        if len(matches) < 100:
+            return
+
 
 async def collect_match_ids_phase(
     db: Session,
@@ -21,121 +70,78 @@ async def collect_match_ids_phase(
     """
     Phase 1: Collect match IDs only
 
+    A full sync checkpoints its pagination cursor on the sync job after every
+    page and resumes from it when the job is run again. An incremental sync
+    pages back to the user's high-water mark, the newest match ID an earlier
+    collection got to, and moves the mark up when it's done.
+
     Args:
         full_sync: If True, collect all historical matches. If False, only new matches.
     """
     match_ids_collected = 0
+    started = time.perf_counter()
 
     if full_sync:
         # Full sync: collect all historical matches
         logger.info(f"Full sync: Collecting all match IDs for user {user.id}")
 
-        # Determine pagination method based on API provider
-        from ..config import settings
-        is_opendota = settings.API_PROVIDER == "opendota"
-
-        if is_opendota:
-            # OpenDota uses offset-based pagination
-            offset = 0
-
-            while True:
-                matches = await dota_api.get_match_history(
-                    account_id=account_id,
-                    matches_requested=100,
-                    start_at_match_id=offset,  # OpenDota interprets this as offset
-                    db=db
-                )
-
-                if not matches:
-                    break
-
-                for match_summary in matches:
-                    match_id = match_summary.get("match_id")
-
-                    # Save stub (or get existing)
-                    save_match_stub(db, user.id, match_id)
-                    match_ids_collected += 1
-
-                # Update progress after each batch
-                offset += len(matches)
-                sync_job.total_matches = match_ids_collected
-                db.commit()
-
-                logger.info(f"Collected {match_ids_collected} match IDs so far (offset: {offset})")
-
-                if len(matches) < 100:
-                    break
-        else:
-            # Valve API uses match_id-based pagination
-            start_at_match_id = None
-
-            while True:
-                matches = await dota_api.get_match_history(
-                    account_id=account_id,
-                    matches_requested=100,
-                    start_at_match_id=start_at_match_id,
-                    db=db
-                )
-
-                if not matches:
-                    break
-
-                for match_summary in matches:
-                    match_id = match_summary.get("match_id")
-                    start_at_match_id = match_id  # For pagination
-
-                    # Save stub (or get existing)
-                    save_match_stub(db, user.id, match_id)
-                    match_ids_collected += 1
-
-                # Update progress after each batch
-                sync_job.total_matches = match_ids_collected
-                db.commit()
-
-                logger.info(f"Collected {match_ids_collected} match IDs so far")
+        # A retried or re-dispatched job continues from its last checkpoint.
+        # New matches played since shift OpenDota offsets forward, so a resumed
+        # walk can only see a few pages twice, never skip any
+        cursor = sync_job.cursor
+        if cursor is not None:
+            match_ids_collected = sync_job.total_matches or 0
+            logger.info(f"Resuming match ID collection at cursor {cursor} ({match_ids_collected} collected)")
+        history_known = user.history_collected_at is not None
+
+        async for page_ids, cursor in _history_pages(db, account_id, dota_api, cursor):
+            new_ids = save_match_stubs(db, user.id, page_ids)
+            match_ids_collected += len(page_ids)
+
+            # Checkpoint the cursor with the page's stubs
+            sync_job.cursor = cursor
+            sync_job.total_matches = match_ids_collected
+            metrics.commit(db, "collect")
+
+            logger.info(f"Collected {match_ids_collected} match IDs so far (cursor: {cursor})")
+
+            if history_known and not new_ids:
+                # A whole page of known stubs: the rest was collected by an earlier full sync
+                logger.info(f"Reached previously collected history at cursor {cursor}")
+                break
 
-                if len(matches) < 100:
-                    break
+        # Everything up to the user's newest stub has been collected now
+        user.high_water_match_id = db.query(func.max(Match.id)).filter(Match.user_id == user.id).scalar()
+        user.history_collected_at = datetime.utcnow()
+        sync_job.cursor = None
+        metrics.commit(db, "collect")
     else:
         # Incremental sync: collect only new matches
-        logger.info(f"Incremental sync: Collecting new match IDs for user {user.id}")
-
-        # Get most recent match with details
-        latest_match = (
-            db.query(Match)
-            .filter(
-                Match.user_id == user.id,
-                Match.has_details == True
-            )
-            .order_by(Match.id.desc())
-            .first()
-        )
-
-        latest_match_id = latest_match.id if latest_match else None
-
-        # Fetch recent matches
-        matches = await dota_api.get_match_history(
-            account_id=account_id,
-            matches_requested=100,
-            db=db
-        )
-
-        for match_summary in matches:
-            match_id = match_summary.get("match_id")
-
-            # Stop if we've reached matches we already have
-            if latest_match_id and match_id <= latest_match_id:
+        high_water = user.high_water_match_id
+        logger.info(f"Incremental sync: Collecting match IDs above {high_water} for user {user.id}")
+
+        newest = high_water
+        async for page_ids, _ in _history_pages(db, account_id, dota_api):
+            new_ids = [match_id for match_id in page_ids if high_water is None or match_id > high_water]
+            save_match_stubs(db, user.id, new_ids)
+            match_ids_collected += len(new_ids)
+            if new_ids:
+                newest = max(newest or 0, *new_ids)
+
+            # Update progress
+            sync_job.total_matches = match_ids_collected
+            metrics.commit(db, "collect")
+
+            # Without a mark (nothing collected yet) one page is enough; the
+            # rest of the history is a full sync's job
+            if high_water is None or len(new_ids) < len(page_ids):
                 break
 
-            # Save stub (or get existing)
-            save_match_stub(db, user.id, match_id)
-            match_ids_collected += 1
-
-        # Update progress
-        sync_job.total_matches = match_ids_collected
-        db.commit()
+        user.high_water_match_id = newest
+        metrics.commit(db, "collect")
 
     logger.info(f"Phase 1 complete: Collected {match_ids_collected} match IDs")
+    _record_phase_metrics(db, user.id, "collect", {"collected": match_ids_collected}, started)
 
     return {
         "match_ids_collected": match_ids_collected
@@ -151,37 +157,72 @@ async def fetch_match_details_phase(
 ) -> Dict:
     """
     Phase 2: Fetch match details for stubs
+
+    Stubs are loaded and committed STUB_CHUNK_SIZE at a time, newest match
+    ID first, and processed matches are expunged after each commit, so memory
+    stays flat however large the backlog is. Every commit bumps the user's
+    data_version, so stats show recent matches while older ones are still
+    being fetched (see synced_back_to).
     """
     logger.info(f"Phase 2: Fetching match details for user {user.id}")
 
-    # Get all stubs (has_details IS NULL) and failed with retries left
-    stubs = db.query(Match).filter(
-        Match.user_id == user.id,
-        or_(
-            Match.has_details.is_(None),  # New stubs
-            and_(
-                Match.has_details == False,
-                Match.retry_count < 3  # Failed but retries left
-            )
-        )
-    ).all()
+    # Stubs and failed matches whose retry is due; ones that failed during this
+    # run are rescheduled past due_by and not picked up again
+    due_by = datetime.utcnow()
+    pending = db.query(Match).filter(Match.user_id == user.id, _pending_details(due_by))
+    total = pending.count()
 
+    started = time.perf_counter()
     details_fetched = 0
     details_failed = 0
     api_down = 0
+    rate_limited = 0
+    details_shared = 0
     batch = []
-    BATCH_SIZE = 25
+    batch_fetched = 0
 
     # Update total for progress tracking
-    sync_job.total_matches = len(stubs)
+    sync_job.total_matches = total
     db.commit()
 
-    for i, match in enumerate(stubs):
-        logger.debug(f"Fetching details for match_id={match.id} (attempt {match.retry_count + 1})")
+    # Rate-limited matches go back on the queue instead of using up a retry
+    queue = deque()
+    requeues: Dict[int, int] = {}
+    last_match_id = None
+
+    while True:
+        if not queue:
+            # Keyset pagination, newest first: stubs left as stubs by this run are behind the cursor
+            chunk_query = pending
+            if last_match_id is not None:
+                chunk_query = chunk_query.filter(Match.id < last_match_id)
+            chunk = chunk_query.order_by(Match.id.desc()).limit(STUB_CHUNK_SIZE).all()
+            if not chunk:
+                break
+            last_match_id = chunk[-1].id
+            queue.extend(chunk)
+
+        match = queue.popleft()
+        error_code = None
 
         try:
-            match_details = await dota_api.get_match_details(match.id, db=db)
-            error_code = None
+            # Matches another user already fetched are derived from the stored payload
+            match_details = get_shared_payload(db, match.id)
+            if match_details is not None:
+                details_shared += 1
+                logger.debug(f"Using shared details for match_id={match.id}")
+            else:
+                logger.debug(f"Fetching details for match_id={match.id} (attempt {match.retry_count + 1})")
+                match_details = await dota_api.get_match_details(match.id, db=db)
+        except RateLimitException as e:
+            requeues[match.id] = requeues.get(match.id, 0) + 1
+            if requeues[match.id] <= settings.RATE_LIMIT_MAX_REQUEUES:
+                logger.info(f"Match {match.id} rate limited, requeued ({requeues[match.id]}/{settings.RATE_LIMIT_MAX_REQUEUES})")
+                queue.append(match)
+                continue
+            match_details = None
+            error_code = e.status_code
+            logger.warning(f"Match {match.id} still rate limited, leaving as stub for the next run")
         except APIException as e:
             match_details = None
             error_code = e.status_code
@@ -197,57 +238,149 @@ async def fetch_match_details_phase(
 
         if success:
             details_fetched += 1
+            batch_fetched += 1
         else:
             if error_code == 500:
                 api_down += 1
+            elif error_code == 429:
+                rate_limited += 1
             else:
                 details_failed += 1
 
         batch.append(match)
 
-        # Commit in batches of 25
-        if len(batch) >= BATCH_SIZE or i == len(stubs) - 1:
-            sync_job.processed_matches = details_fetched + details_failed + api_down
-            db.commit()
-            logger.info(f"Batch committed: {details_fetched}/{len(stubs)} successful")
+        # Commit in batches of 25 (and at the end of every chunk)
+        if len(batch) >= STUB_CHUNK_SIZE or not queue:
+            sync_job.processed_matches = details_fetched + details_failed + api_down + rate_limited
+            if batch_fetched:
+                # Lets stats caches pick up the new matches
+                user.data_version = (user.data_version or 0) + 1
+            metrics.commit(db, "details")
+            logger.info(f"Batch committed: {details_fetched}/{total} successful")
+            for processed in batch:
+                db.expunge(processed)
             batch = []
+            batch_fetched = 0
 
-    logger.info(f"Phase 2 complete: {details_fetched} successful, {details_failed} failed, {api_down} API errors (500)")
+    logger.info(f"Phase 2 complete: {details_fetched} successful ({details_shared} from shared matches), {details_failed} failed, {api_down} API errors (500), {rate_limited} rate limited (429)")
+    _record_phase_metrics(db, user.id, "details", {
+        "fetched": details_fetched,
+        "failed": details_failed,
+        "api_down": api_down,
+        "rate_limited": rate_limited,
+    }, started)
 
     return {
         "details_fetched": details_fetched,
+        "details_shared": details_shared,
         "details_failed": details_failed,
-        "api_down": api_down
+        "api_down": api_down,
+        "rate_limited": rate_limited
     }
 
 
-def save_match_stub(db: Session, user_id: int, match_id: int) -> Match:
+def _pending_details(due_by: Optional[datetime] = None):
     """
-    Create a match stub with just the ID.
-    Returns existing match if already present.
+    Filter for matches phase 2 still has to fetch, or only those due by
+    `due_by`. Matches with details or out of retries have no next_attempt_at.
+    """
+    if due_by is None:
+        return Match.next_attempt_at.isnot(None)
+    return Match.next_attempt_at <= due_by
 
-    Args:
-        db: Database session
-        user_id: User ID who played the match
-        match_id: Match ID from API
+
+def _schedule_retry(match: Match, previous_attempt: Optional[datetime], now: datetime):
+    """
+    Set when a failed match is due again: twice the delay it last waited
+    (RETRY_BACKOFF_BASE_MINUTES after a first failure, at most
+    RETRY_BACKOFF_MAX_HOURS), jittered so matches that failed together don't
+    all come due in the same run. Matches out of retries are not rescheduled.
+    """
+    if match.has_details is False and match.retry_count >= MAX_FETCH_RETRIES:
+        match.next_attempt_at = None
+        return
+
+    delay = settings.RETRY_BACKOFF_BASE_MINUTES * 60
+    if previous_attempt is not None and match.next_attempt_at is not None:
+        delay = max(delay, 2 * (match.next_attempt_at - previous_attempt).total_seconds())
+    delay = min(delay, settings.RETRY_BACKOFF_MAX_HOURS * 3600)
+    match.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def synced_back_to(db: Session, user_id: int) -> Optional[datetime]:
+    """
+    Start time of the oldest match the user's history is complete back to.
+
+    Phase 2 works newest first, so every match from this point on has been
+    fetched (or has given up retrying) while older ones may still be stubs.
+    None until the newest pending match has been fetched.
+    """
+    newest_pending = db.query(func.max(Match.id)).filter(
+        Match.user_id == user_id, _pending_details()
+    ).scalar()
+
+    query = db.query(func.min(Match.start_time)).filter(
+        Match.user_id == user_id,
+        Match.has_details == True
+    )
+    if newest_pending is not None:
+        query = query.filter(Match.id > newest_pending)
+    return query.scalar()
+
+
+def _record_phase_metrics(db: Session, user_id: int, phase: str, outcomes: Dict[str, int], started: float):
+    """Export per-phase outcome counters, throughput and the user's remaining stub backlog"""
+    elapsed = time.perf_counter() - started
+    for outcome, count in outcomes.items():
+        if count:
+            metrics.SYNC_MATCHES.labels(phase=phase, outcome=outcome).inc(count)
+    total = sum(outcomes.values())
+    metrics.SYNC_PHASE_THROUGHPUT.labels(phase=phase).set(total / elapsed if elapsed > 0 else 0.0)
+
+    backlog = db.query(Match).filter(Match.user_id == user_id, Match.has_details.is_(None)).count()
+    metrics.STUB_BACKLOG.labels(user_id=str(user_id)).set(backlog)
+
+
+def save_match_stubs(db: Session, user_id: int, match_ids: List[int]) -> List[int]:
+    """
+    Create stubs for the match IDs the user doesn't have yet, with one query
+    for the ones they do.
 
     Returns:
-        Match object (either existing or newly created stub)
+        IDs of the newly created stubs
     """
-    existing = db.query(Match).filter(Match.id == match_id).first()
-    if existing:
-        return existing
-
-    stub = Match(
-        id=match_id,
-        user_id=user_id,
-        has_details=None  # NULL indicates stub without details
+    match_ids = list(dict.fromkeys(match_ids))
+    known = {
+        match_id for (match_id,) in db.query(Match.id).filter(
+            Match.user_id == user_id,
+            Match.id.in_(match_ids)
+        )
+    }
+    new_ids = [match_id for match_id in match_ids if match_id not in known]
+    now = datetime.utcnow()
+    db.add_all(
+        Match(id=match_id, user_id=user_id, has_details=None, next_attempt_at=now)
+        for match_id in new_ids
     )
-    db.add(stub)
     db.flush()  # Don't commit yet, caller will batch commit
+    return new_ids
 
-    logger.debug(f"Created match stub for match_id={match_id}")
-    return stub
+
+def interrupted_collection(db: Session, user_id: int) -> Optional[SyncJob]:
+    """
+    The user's latest full sync job if it failed or was cancelled part way
+    through collecting match IDs, so a new full sync can resume it instead
+    of starting over.
+    """
+    job = (
+        db.query(SyncJob)
+        .filter(SyncJob.user_id == user_id, SyncJob.job_type == JobType.SYNC_ALL)
+        .order_by(SyncJob.created_at.desc())
+        .first()
+    )
+    if job and job.status in (JobStatus.FAILED, JobStatus.CANCELLED) and job.cursor is not None:
+        return job
+    return None
 
 
 def update_match_with_details(
@@ -274,104 +407,69 @@ def update_match_with_details(
 
     Retry Logic:
         - 500 errors: Leave has_details=NULL, don't count as retry (API down)
+        - 429 errors: Leave has_details=NULL, don't count as retry (rate limited)
         - Other errors: Set has_details=FALSE, increment retry_count
         - Max 3 retries for non-500 errors
+        - Failures set next_attempt_at with exponential backoff (_schedule_retry)
     """
+    savepoint = None
+    previous_attempt = match.last_fetch_attempt
+    now = datetime.utcnow()
     try:
         # Handle API errors
         if match_data is None:
-            match.last_fetch_attempt = datetime.utcnow()
 
             if error_status_code == 500:
                 # API is down, don't count as retry, leave as stub
                 match.has_details = None
                 match.fetch_error = "API returned 500 (server error)"
                 logger.warning(f"Match {match.id}: API 500 error, will retry later")
+            elif error_status_code == 429:
+                # Rate limited, not the match's fault, leave as stub
+                match.has_details = None
+                match.fetch_error = "API returned 429 (rate limited)"
+                logger.warning(f"Match {match.id}: API 429 rate limit, will retry later")
             else:
                 # Other error, count as retry
                 match.has_details = False
                 match.retry_count += 1
                 match.fetch_error = f"HTTP {error_status_code}" if error_status_code else "Unknown error"
-                logger.error(f"Match {match.id}: Error (retry {match.retry_count}/3)")
+                logger.error(f"Match {match.id}: Error (retry {match.retry_count}/{MAX_FETCH_RETRIES})")
 
+            _schedule_retry(match, previous_attempt, now)
+            match.last_fetch_attempt = now
             return False
 
         normalized = dota_api.normalize_match_data(match_data, account_id)
         if not normalized:
             match.has_details = False
             match.retry_count += 1
-            match.last_fetch_attempt = datetime.utcnow()
             match.fetch_error = "Failed to normalize match data"
+            _schedule_retry(match, previous_attempt, now)
+            match.last_fetch_attempt = now
             return False
 
         player_data = normalized["player_data"]
 
+        # Match, players and teammate counts are written together or not at
+        # all, so a failure here can't leave players encountered counted twice
+        # when the match is retried
+        savepoint = db.begin_nested()
+
+        # No-op when another user's sync already stored this match
+        save_shared_match(db, match.id, normalized)
+
         # Update match with details
-        match.start_time = normalized["start_time"]
-        match.duration = normalized["duration"]
-        match.game_mode = normalized["game_mode"]
-        match.lobby_type = normalized["lobby_type"]
-        match.radiant_win = normalized["radiant_win"]
-        match.hero_id = player_data.get("hero_id")
-        match.player_slot = player_data.get("player_slot", 0)
-        match.radiant_team = (player_data.get("player_slot", 0) < 128)
-        match.kills = player_data.get("kills", 0)
-        match.deaths = player_data.get("deaths", 0)
-        match.assists = player_data.get("assists", 0)
-        match.last_hits = player_data.get("last_hits")
-        match.denies = player_data.get("denies")
-        match.gold_per_min = player_data.get("gold_per_min")
-        match.xp_per_min = player_data.get("xp_per_min")
-        match.hero_damage = player_data.get("hero_damage")
-        match.tower_damage = player_data.get("tower_damage")
-        match.hero_healing = player_data.get("hero_healing")
-        match.level = player_data.get("level")
-        match.item_0 = player_data.get("item_0")
-        match.item_1 = player_data.get("item_1")
-        match.item_2 = player_data.get("item_2")
-        match.item_3 = player_data.get("item_3")
-        match.item_4 = player_data.get("item_4")
-        match.item_5 = player_data.get("item_5")
-        match.backpack_0 = player_data.get("backpack_0")
-        match.backpack_1 = player_data.get("backpack_1")
-        match.backpack_2 = player_data.get("backpack_2")
-        match.item_neutral = player_data.get("item_neutral")
-        match.ability_upgrades = player_data.get("ability_upgrades")
-        match.net_worth = player_data.get("net_worth")
-        match.rank_tier = player_data.get("rank_tier")
-        match.raw_data = normalized["raw_data"]
+        for column, value in participation_values(normalized).items():
+            setattr(match, column, value)
         match.has_details = True
+        match.next_attempt_at = None
+        match.last_fetch_attempt = now
         match.fetch_error = None
 
-        # Save all players in match
+        # Collect teammates for players encountered
+        teammates = []
         for player in normalized.get("all_players", []):
-            match_player = MatchPlayer(
-                match_id=match.id,
-                account_id=player.get("account_id"),
-                player_slot=player.get("player_slot", 0),
-                hero_id=player.get("hero_id"),
-                kills=player.get("kills"),
-                deaths=player.get("deaths"),
-                assists=player.get("assists"),
-                gold_per_min=player.get("gold_per_min"),
-                xp_per_min=player.get("xp_per_min"),
-                hero_damage=player.get("hero_damage"),
-                tower_damage=player.get("tower_damage"),
-                hero_healing=player.get("hero_healing"),
-                last_hits=player.get("last_hits"),
-                denies=player.get("denies"),
-                level=player.get("level"),
-                net_worth=player.get("net_worth"),
-                item_0=player.get("item_0"),
-                item_1=player.get("item_1"),
-                item_2=player.get("item_2"),
-                item_3=player.get("item_3"),
-                item_4=player.get("item_4"),
-                item_5=player.get("item_5"),
-            )
-            db.add(match_player)
-
-            # Update players encountered (teammates)
             player_account_id = player.get("account_id")
             if player_account_id and player_account_id != account_id:
                 player_slot = player.get("player_slot", 0)
@@ -379,58 +477,73 @@ def update_match_with_details(
                 same_team = (player_slot < 128) == (user_slot < 128)
 
                 if same_team:
-                    update_player_encountered(
-                        db, match.user_id, player_account_id,
-                        match.radiant_team == match.radiant_win,
-                        normalized["start_time"]
-                    )
+                    teammates.append(player_account_id)
+
+        update_players_encountered(
+            db, match.user_id, teammates,
+            match.radiant_team == match.radiant_win,
+            normalized["start_time"]
+        )
 
+        savepoint.commit()
         logger.info(f"Successfully updated match {match.id} with details")
         return True
 
     except Exception as e:
+        if savepoint is not None and savepoint.is_active:
+            savepoint.rollback()
         match.has_details = False
         match.retry_count += 1
-        match.last_fetch_attempt = datetime.utcnow()
         match.fetch_error = str(e)
+        _schedule_retry(match, previous_attempt, now)
+        match.last_fetch_attempt = now
         logger.error(f"Error updating match {match.id} with details: {e}", exc_info=True)
         return False
 
 
-def update_player_encountered(
+def update_players_encountered(
     db: Session,
     user_id: int,
-    account_id: int,
+    account_ids: List[int],
     won: bool,
     match_time: datetime
 ):
-    """Update or create player encountered record"""
-    player = (
-        db.query(PlayerEncountered)
-        .filter(
+    """
+    Update or create player encountered records for a match's teammates.
+
+    Existing records are loaded with a single query. The session is flushed
+    (not committed) so that later matches in the same batch see new records;
+    the caller commits.
+    """
+    if not account_ids:
+        return
+
+    existing = {
+        player.account_id: player
+        for player in db.query(PlayerEncountered).filter(
             PlayerEncountered.user_id == user_id,
-            PlayerEncountered.account_id == account_id
+            PlayerEncountered.account_id.in_(account_ids)
         )
-        .first()
-    )
+    }
 
-    if player:
-        player.games_together += 1
-        if won:
-            player.games_won += 1
+    for account_id in set(account_ids):
+        player = existing.get(account_id)
+        if player:
+            player.games_together += 1
+            if won:
+                player.games_won += 1
+            else:
+                player.games_lost += 1
+            player.last_match_at = match_time
         else:
-            player.games_lost += 1
-        player.last_match_at = match_time
-    else:
-        player = PlayerEncountered(
-            user_id=user_id,
-            account_id=account_id,
-            games_together=1,
-            games_won=1 if won else 0,
-            games_lost=0 if won else 1,
-            first_match_at=match_time,
-            last_match_at=match_time
-        )
-        db.add(player)
-
-    db.commit()
+            db.add(PlayerEncountered(
+                user_id=user_id,
+                account_id=account_id,
+                games_together=1,
+                games_won=1 if won else 0,
+                games_lost=0 if won else 1,
+                first_match_at=match_time,
+                last_match_at=match_time
+            ))
+
+    db.flush()
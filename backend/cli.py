@@ -7,7 +7,8 @@ import asyncio
 from app.database import SessionLocal
 from app.models import User, SyncJob
 from app.models.sync_job import JobStatus, JobType
-from app.tasks import sync_matches_full, sync_matches_incremental
+from app.tasks import collect_match_ids, fetch_match_details
+from app.tasks.sync_helpers import interrupted_collection
 from app.services import DotaAPIService
 from app.config import settings
 
@@ -29,18 +30,36 @@ def sync_user(steam_id: str):
             click.echo(f"User with Steam ID {steam_id} not found")
             return
 
-        # Create sync job
-        sync_job = SyncJob(
+        # Resume an interrupted ID collection, or create a new sync job
+        sync_job = interrupted_collection(db, user.id)
+        if sync_job:
+            click.echo(f"Resuming interrupted job {sync_job.id} at cursor {sync_job.cursor}")
+            sync_job.status = JobStatus.PENDING
+            sync_job.error_message = None
+            sync_job.completed_at = None
+        else:
+            sync_job = SyncJob(
+                user_id=user.id,
+                job_type=JobType.SYNC_ALL,
+                status=JobStatus.PENDING
+            )
+            db.add(sync_job)
+        db.commit()
+        db.refresh(sync_job)
+
+        # Trigger sync: collect all IDs, then fetch details
+        task = collect_match_ids.delay(user.id, sync_job.id, full_sync=True)
+        sync_job.task_id = task.id
+        details_job = SyncJob(
             user_id=user.id,
-            job_type=JobType.FULL_SYNC,
+            job_type=JobType.FETCH_MATCH_DETAILS,
             status=JobStatus.PENDING
         )
-        db.add(sync_job)
+        db.add(details_job)
         db.commit()
-        db.refresh(sync_job)
+        db.refresh(details_job)
+        fetch_match_details.apply_async((user.id, details_job.id), link_error=None)
 
-        # Trigger sync
-        task = sync_matches_full.delay(user.id, sync_job.id)
         click.echo(f"Sync job {sync_job.id} triggered for user {user.persona_name}")
         click.echo(f"Task ID: {task.id}")
 
@@ -60,15 +79,26 @@ def sync_all():
             # Create sync job
             sync_job = SyncJob(
                 user_id=user.id,
-                job_type=JobType.INCREMENTAL_SYNC,
+                job_type=JobType.SYNC_INCREMENTAL,
                 status=JobStatus.PENDING
             )
             db.add(sync_job)
             db.commit()
             db.refresh(sync_job)
 
-            # Trigger sync
-            task = sync_matches_incremental.delay(user.id, sync_job.id)
+            # Trigger sync: collect new IDs, then fetch details
+            task = collect_match_ids.delay(user.id, sync_job.id, full_sync=False)
+            sync_job.task_id = task.id
+            details_job = SyncJob(
+                user_id=user.id,
+                job_type=JobType.FETCH_MATCH_DETAILS,
+                status=JobStatus.PENDING
+            )
+            db.add(details_job)
+            db.commit()
+            db.refresh(details_job)
+            fetch_match_details.apply_async((user.id, details_job.id), link_error=None)
+
             click.echo(f"  - {user.persona_name}: Job {sync_job.id}, Task {task.id}")
 
     finally:
@@ -108,7 +138,7 @@ def init_heroes():
         click.echo(f"Found {len(heroes_data)} heroes")
 
         for hero_data in heroes_data:
-            if settings.API_PROVIDER == "valve":
+            if dota_api.primary_provider == "valve":
                 hero_id = hero_data.get("id")
                 name = hero_data.get("name", "").replace("npc_dota_hero_", "")
                 localized_name = hero_data.get("localized_name", name)
@@ -210,5 +240,320 @@ def clean_stuck_jobs():
         db.close()
 
 
+@cli.command()
+@click.option('--user', 'steam_id', default=None, help='Only rebuild this Steam ID')
+@click.option('--parallel', is_flag=True, help='Queue one Celery task per user instead of a single pass here')
+def rebuild_encountered(steam_id, parallel):
+    """Recompute players encountered from matches and match players"""
+    import time
+    from app.services.players_encountered import rebuild_players_encountered
+    from app.tasks import rebuild_players_encountered_per_user
+
+    if parallel:
+        result = rebuild_players_encountered_per_user.delay()
+        click.echo(f"Queued per-user rebuild (task {result.id})")
+        return
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counts = rebuild_players_encountered(db, int(steam_id) if steam_id else None)
+        click.echo(f"Upserted {counts['upserted']:,} rows, removed {counts['deleted']:,} stale rows "
+                   f"in {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+
+
+@cli.command()
+@click.option('--workers', default=1, type=int, help='Processes renormalizing ranges in parallel')
+@click.option('--chunk-size', default=500, type=int, help='Matches per range (one transaction each)')
+@click.option('--celery', 'use_celery', is_flag=True, help='Queue one Celery task per range instead')
+def renormalize(workers, chunk_size, use_celery):
+    """Re-derive match columns from stored payloads (no API calls)"""
+    import time
+    from app.services.match_mapping import NORMALIZE_VERSION
+    from app.services.renormalize import renormalize as run
+    from app.tasks import renormalize_all
+
+    if use_celery:
+        result = renormalize_all.delay(chunk_size)
+        click.echo(f"Queued renormalize to version {NORMALIZE_VERSION} (task {result.id})")
+        return
+
+    started = time.perf_counter()
+    counts = run(workers=workers, chunk_size=chunk_size)
+    click.echo(f"Renormalized {counts.get('matches', 0):,} matches ({counts.get('participations', 0):,} user rows) "
+               f"to version {NORMALIZE_VERSION} in {time.perf_counter() - started:.1f}s")
+    if counts.get('failed') or counts.get('missing_payload'):
+        click.echo(f"{counts.get('failed', 0):,} user rows could not be normalized, "
+                   f"{counts.get('missing_payload', 0):,} matches have no stored payload")
+
+
+@cli.command()
+@click.option('--max-batches', default=None, type=int, help='GetPlayerSummaries calls allowed (100 accounts each)')
+def resolve_personas(max_batches):
+    """Fill persona names of players encountered from Steam"""
+    from datetime import timedelta
+    from app.services.persona_resolver import resolve_personas as resolve
+
+    db = SessionLocal()
+    try:
+        result = asyncio.run(resolve(
+            db,
+            max_batches=max_batches or settings.PERSONA_RESOLVE_MAX_BATCHES,
+            ttl=timedelta(hours=settings.PERSONA_REFRESH_HOURS),
+        ))
+        click.echo(f"Looked up {result['requested']} accounts, {result['resolved']} with a profile, "
+                   f"updated {result['updated']} players encountered rows")
+    finally:
+        db.close()
+
+
+def _require_archive():
+    from app.services.match_archive import get_match_archive
+
+    archive = get_match_archive()
+    if archive is None:
+        raise click.ClickException("MATCH_ARCHIVE_DIR is not set")
+    return archive
+
+
+@cli.command()
+@click.option('--delete', is_flag=True, help='Remove payloads from Postgres once archived')
+def archive_import(delete):
+    """Move match payloads stored in Postgres into the on-disk archive"""
+    from app.services.match_payloads import move_payloads_to_archive
+
+    archive = _require_archive()
+    db = SessionLocal()
+    try:
+        moved = move_payloads_to_archive(db, delete=delete)
+        count = archive.rebuild_index()
+        click.echo(f"Archived {moved:,} payloads ({count:,} matches in the archive)")
+    finally:
+        db.close()
+
+
+@cli.command()
+def archive_verify():
+    """Check every record and index entry of the match archive"""
+    counts = _require_archive().verify()
+    click.echo(f"{counts['records']:,} records, {counts['live']:,} matches indexed")
+    problems = counts['corrupt'] + counts['dangling'] + counts['garbage_bytes']
+    if problems:
+        click.echo(f"{counts['corrupt']:,} corrupt records, {counts['dangling']:,} dangling index entries, "
+                   f"{counts['garbage_bytes']:,} unreadable bytes")
+        raise SystemExit(1)
+    click.echo("Archive OK")
+
+
+@cli.command()
+def archive_compact():
+    """Rewrite the match archive without superseded records"""
+    counts = _require_archive().compact()
+    click.echo(f"Kept {counts['records']:,} records, reclaimed {counts['reclaimed_bytes'] / 1024 / 1024:.1f} MB")
+
+
+@cli.command()
+@click.option('--host', default='0.0.0.0', help='Interface to bind')
+@click.option('--port', default=8555, type=int, help='Port to listen on')
+@click.option('--matches-per-account', default=500, type=int, help='History length served per account')
+@click.option('--latency-ms', default=50.0, type=float, help='Mean response latency')
+@click.option('--error-rate', default=0.0, type=float, help='Fraction of detail requests answered 500')
+@click.option('--not-found-rate', default=0.0, type=float, help='Fraction of detail requests answered 404')
+@click.option('--throttle-rate', default=0.0, type=float, help='Fraction of requests answered 429')
+@click.option('--rate-limit', default=None, type=int, help='Requests per minute per provider before 429s')
+def simulate_providers(host, port, matches_per_account, latency_ms, error_rate, not_found_rate, throttle_rate, rate_limit):
+    """Run a local stand-in for the Valve and OpenDota APIs"""
+    import uvicorn
+    from app.devtools.provider_simulator import SimulatorConfig, create_app
+
+    config = SimulatorConfig(
+        matches_per_account=matches_per_account,
+        latency_ms=latency_ms,
+        error_rate=error_rate,
+        not_found_rate=not_found_rate,
+        throttle_rate=throttle_rate,
+        rate_limit_per_minute=rate_limit,
+    )
+    click.echo(f"Valve base URL:    http://{host}:{port}")
+    click.echo(f"OpenDota base URL: http://{host}:{port}/api")
+    uvicorn.run(create_app(config), host=host, port=port, log_level="warning")
+
+
+@cli.command()
+@click.option('--provider', type=click.Choice(['valve', 'opendota', 'multi']), default='opendota')
+@click.option('--simulator-url', default=None, help='Use a running simulator instead of an embedded one')
+@click.option('--matches', default=500, type=int, help='History length served by the embedded simulator')
+@click.option('--latency-ms', default=20.0, type=float, help='Embedded simulator mean latency')
+@click.option('--error-rate', default=0.0, type=float, help='Embedded simulator 500 rate')
+@click.option('--throttle-rate', default=0.0, type=float, help='Embedded simulator 429 rate')
+@click.option('--rate-limit-delay', default=0.0, type=float, help='Client-side delay between requests')
+@click.option('--trace-memory', is_flag=True, help='Report peak Python allocations (slower)')
+@click.option('--keep-data', is_flag=True, help='Keep the benchmark user and matches afterwards')
+def benchmark_sync(provider, simulator_url, matches, latency_ms, error_rate, throttle_rate, rate_limit_delay, trace_memory, keep_data):
+    """Measure phase 1 + phase 2 sync throughput against the provider simulator"""
+    from app.devtools.provider_simulator import SimulatorConfig
+    from app.devtools.sync_benchmark import run_sync_benchmark, start_simulator_thread
+
+    if simulator_url is None:
+        simulator_url = start_simulator_thread(SimulatorConfig(
+            matches_per_account=matches,
+            latency_ms=latency_ms,
+            error_rate=error_rate,
+            throttle_rate=throttle_rate,
+        ))
+        click.echo(f"Started embedded simulator at {simulator_url}")
+
+    result = run_sync_benchmark(
+        simulator_url,
+        provider=provider,
+        rate_limit_delay=rate_limit_delay,
+        trace_memory=trace_memory,
+        keep_data=keep_data,
+    )
+    click.echo(result.report())
+
+
+@cli.command()
+@click.option('--scales', default='10000,100000,1000000', help='Comma-separated match counts to benchmark')
+@click.option('--repeat', default=10, type=int, help='Timed runs per case')
+@click.option('--case', 'cases', multiple=True, help='Only run cases containing this string (repeatable)')
+@click.option('--no-raw-data', is_flag=True, help='Seed matches without raw_data')
+@click.option('--reseed', is_flag=True, help='Drop and reseed benchmark users')
+@click.option('--baseline', default=None, type=click.Path(), help='Baseline JSON file')
+@click.option('--save-baseline', is_flag=True, help='Write results as the new baseline')
+@click.option('--tolerance', default=0.25, type=float, help='Allowed p95 growth before failing')
+def benchmark_stats(scales, repeat, cases, no_raw_data, reseed, baseline, save_baseline, tolerance):
+    """Benchmark StatsService and stats/match routes at several history sizes"""
+    from pathlib import Path
+    from app.devtools.stats_benchmark import (
+        DEFAULT_BASELINE_PATH, compare_to_baseline, run_stats_benchmark, save_baseline as write_baseline
+    )
+
+    baseline_path = Path(baseline) if baseline else DEFAULT_BASELINE_PATH
+    report = run_stats_benchmark(
+        scales=[int(s) for s in scales.split(',') if s],
+        repeat=repeat,
+        cases=list(cases) or None,
+        with_raw_data=not no_raw_data,
+        reseed=reseed,
+    )
+    click.echo(report.table())
+
+    if save_baseline:
+        write_baseline(report, baseline_path)
+        click.echo(f"\nBaseline written to {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        click.echo(f"\nNo baseline at {baseline_path}, run with --save-baseline to create one")
+        return
+
+    regressions = compare_to_baseline(report, baseline_path, tolerance)
+    if regressions:
+        click.echo(f"\n{len(regressions)} regression(s) against {baseline_path}:")
+        for regression in regressions:
+            click.echo(f"  - {regression}")
+        raise SystemExit(1)
+    click.echo(f"\nNo regressions against {baseline_path}")
+
+
+@cli.command()
+@click.option('--users', default=10, type=int, help='Number of users to generate')
+@click.option('--matches', default=1000, type=int, help='Matches per user')
+@click.option('--user-offset', default=0, type=int, help='Index of the first generated user')
+@click.option('--seed', default=1, type=int, help='Random seed')
+@click.option('--stub-fraction', default=0.0, type=float, help='Fraction of each history left as stubs')
+@click.option('--no-raw-data', is_flag=True, help='Skip raw_data payloads')
+@click.option('--workers', default=1, type=int, help='Parallel worker processes (one user per process at a time)')
+def generate_data(users, matches, user_offset, seed, stub_fraction, no_raw_data, workers):
+    """Bulk-generate synthetic users, matches and players for load testing"""
+    from app.database import init_db
+    from app.devtools.data_generator import generate_dataset
+
+    init_db()
+    click.echo(f"Generating {users} users x {matches} matches with {workers} worker(s)...")
+    result = generate_dataset(
+        users=users,
+        matches_per_user=matches,
+        user_offset=user_offset,
+        seed=seed,
+        with_raw_data=not no_raw_data,
+        stub_fraction=stub_fraction,
+        workers=workers,
+    )
+    click.echo(f"Users:               {result.users}")
+    click.echo(f"Matches:             {result.matches}")
+    click.echo(f"Match players:       {result.match_players}")
+    click.echo(f"Players encountered: {result.players_encountered}")
+    click.echo(f"Took {result.seconds:.1f}s ({result.rows_per_second:,.0f} rows/sec)")
+
+
+@cli.command()
+@click.option('--scales', default='50,500', help='Comma-separated match counts of the seeded users')
+@click.option('--case', 'cases', multiple=True, help='Only run cases containing this string (repeatable)')
+def check_query_budgets(scales, cases):
+    """Check that routes and services run a constant number of SQL queries"""
+    from app.devtools.query_budget import run_query_budgets
+
+    results = run_query_budgets(
+        scales=[int(s) for s in scales.split(',') if s],
+        cases=list(cases) or None,
+    )
+    for result in results:
+        counts = " ".join(f"{count:>4}" for count in result.counts.values())
+        click.echo(f"{'ok' if result.ok else 'FAIL':<5} {result.name:<36} budget {result.budget:>3}  queries {counts}")
+
+    failures = [r for r in results if not r.ok]
+    if failures:
+        click.echo(f"\n{len(failures)} case(s) over budget:\n")
+        for result in failures:
+            click.echo(result.failure_report() + "\n")
+        raise SystemExit(1)
+    click.echo(f"\nAll {len(results)} cases within budget")
+
+
+@cli.command()
+@click.argument('output_dir', type=click.Path(file_okay=False))
+@click.option('--user', 'steam_ids', multiple=True, help='Only export this Steam ID (repeatable, default all users)')
+@click.option('--row-group-size', default=100_000, type=int, help='Rows per Parquet row group')
+@click.option('--compression', default='zstd', type=click.Choice(['zstd', 'snappy', 'gzip', 'none']))
+def export_snapshot(output_dir, steam_ids, row_group_size, compression):
+    """Write users, matches, match players and players encountered as Parquet"""
+    import time
+    from pathlib import Path
+    from app.services.parquet_snapshot import export_snapshot as write_snapshot
+
+    started = time.perf_counter()
+    counts = write_snapshot(
+        Path(output_dir),
+        user_ids=[int(s) for s in steam_ids] or None,
+        row_group_size=row_group_size,
+        compression=compression,
+    )
+    for table, rows in counts.items():
+        click.echo(f"{table:<20} {rows:>12,} rows")
+    click.echo(f"Snapshot written to {output_dir} in {time.perf_counter() - started:.1f}s")
+
+
+@cli.command()
+@click.argument('input_dir', type=click.Path(exists=True, file_okay=False))
+@click.option('--replace', is_flag=True, help="Delete the snapshot's users from this database first")
+def import_snapshot(input_dir, replace):
+    """Load a Parquet snapshot written by export-snapshot"""
+    import time
+    from pathlib import Path
+    from app.database import init_db
+    from app.services.parquet_snapshot import import_snapshot as load_snapshot
+
+    init_db()
+    started = time.perf_counter()
+    counts = load_snapshot(Path(input_dir), replace=replace)
+    for table, rows in counts.items():
+        click.echo(f"{table:<20} {rows:>12,} rows")
+    click.echo(f"Snapshot imported in {time.perf_counter() - started:.1f}s")
+
+
 if __name__ == "__main__":
     cli()